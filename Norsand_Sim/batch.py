@@ -0,0 +1,144 @@
+# batch.py
+# Vectorized NorSand triaxial simulation over many parameter sets at once
+import numpy as np
+
+try:
+    from .material import compute_gmax, compute_ec, compute_yield_function
+    from .results import RESULT_FIELDS
+except ImportError:  # run as a script from inside Norsand_Sim/
+    from material import compute_gmax, compute_ec, compute_yield_function
+    from results import RESULT_FIELDS
+
+# Defaults applied to optional parameters, matching NorSandTriaxialSimulation
+BATCH_DEFAULTS = {
+    "K_over_G": 2.0,
+    "H0": 5.0,
+    "HY": 10.0,
+    "num_steps": 4000,
+    "max_strain": 0.3,
+    "undrained": False,
+}
+REQUIRED_PARAMS = ("N", "lambda", "Mc", "chi", "e0", "sigM0")
+
+
+def _as_columns(param_sets):
+    """Normalise a list of param dicts, a dict of sequences or a DataFrame to column arrays."""
+    if isinstance(param_sets, (list, tuple)):
+        keys = {key for row in param_sets for key in row}
+        return {key: np.asarray([row.get(key, BATCH_DEFAULTS.get(key)) for row in param_sets]) for key in keys}
+    return {key: np.asarray(param_sets[key]) for key in param_sets.keys()}
+
+
+class BatchNorSandSimulation:
+    """
+    Run NorSandTriaxialSimulation for a whole table of parameter sets in one pass.
+
+    Every run shares the same num_steps; all other parameters (including
+    max_strain and the undrained flag) may vary per run. Each step updates the
+    whole batch at once, with the elastic/plastic branch applied as a mask.
+    """
+
+    def __init__(self, param_sets):
+        columns = _as_columns(param_sets)
+        missing = [name for name in REQUIRED_PARAMS if name not in columns]
+        if missing:
+            raise KeyError(f"Missing NorSand parameters: {missing}")
+
+        self.size = len(columns["N"])
+
+        def column(name, dtype=np.float64):
+            values = columns.get(name, BATCH_DEFAULTS.get(name))
+            return np.broadcast_to(np.asarray(values, dtype=dtype), (self.size,)).copy()
+
+        self.n = column("N")
+        self.lambda_ = column("lambda")
+        self.mc = column("Mc")
+        self.chi = column("chi")
+        self.e0 = column("e0")
+        self.sigm0 = column("sigM0")
+        self.pref = 100.0
+        self.k_over_g = column("K_over_G")
+        self.h0 = column("H0")
+        self.hy = column("HY")
+        self.max_strain = column("max_strain")
+        self.undrained = column("undrained", dtype=bool)
+
+        num_steps = np.unique(column("num_steps", dtype=np.int64))
+        if len(num_steps) != 1:
+            raise ValueError(f"All parameter sets in a batch must share num_steps, got {num_steps.tolist()}")
+        self.num_steps = int(num_steps[0])
+
+        self.results = None
+
+    def run(self):
+        """
+        Run every parameter set and return a dict of (runs, num_steps) arrays,
+        one per output channel, laid out like NorSandTriaxialSimulation.run().
+        """
+        d_eps = self.max_strain / (self.num_steps - 1)
+        undrained = self.undrained
+        drained = ~undrained
+
+        e = self.e0.copy()
+        sigm = self.sigm0.copy()
+        sigq = np.zeros(self.size)
+        pimg = self.sigm0.copy()
+        ep1 = np.zeros(self.size)
+        epv = np.zeros(self.size)
+        u = np.zeros(self.size)
+
+        # Written one step (row) at a time, handed back transposed as (runs, steps)
+        buffers = {name: np.empty((self.num_steps, self.size)) for name in RESULT_FIELDS if name != "step"}
+
+        for step in range(self.num_steps):
+            gmax = compute_gmax(e, sigm)
+            kmax = gmax * self.k_over_g
+            ec = compute_ec(self.n, self.lambda_, sigm, self.pref)
+            psi = e - ec
+            f = compute_yield_function(sigq, sigm, psi, pimg, self.mc, self.n)
+            plastic = f > 0
+
+            # Elastic predictor
+            depv_el = np.where(undrained, 0.0, d_eps / 3)
+            dsigq_el = 3 * gmax * (d_eps - depv_el / 3)
+
+            # Plastic corrector
+            depv_pl = self.chi * psi * d_eps
+            dep1_pl = d_eps + depv_pl / 3
+            dsigq_pl = 3 * gmax * (dep1_pl - depv_pl / 3)
+            dsigm_pl = kmax * depv_pl
+
+            depv = np.where(plastic, depv_pl, depv_el)
+            sigq = sigq + np.where(plastic, dsigq_pl, dsigq_el)
+            sigm = sigm + np.where(
+                drained, np.where(plastic, dsigm_pl, kmax * depv_el), 0.0
+            )
+            u = u + np.where(
+                undrained, np.where(plastic, dsigm_pl, kmax * d_eps / 3), 0.0
+            )
+            e = np.where(plastic & drained, e - (1 + e) * depv_pl, e)
+            pimg = np.where(plastic, pimg + (self.h0 + self.hy * psi) * d_eps * pimg, pimg)
+
+            ep1 = ep1 + d_eps
+            epv = epv + depv
+
+            buffers["eps1"][step] = ep1
+            buffers["epsV"][step] = epv
+            buffers["p"][step] = np.where(undrained, sigm - u, sigm)
+            buffers["q"][step] = sigq
+            buffers["e"][step] = e
+            buffers["psi"][step] = psi
+            buffers["pimg"][step] = pimg
+            buffers["yield_f"][step] = f
+            buffers["pore_pressure"][step] = np.where(undrained, u, 0.0)
+
+        results = {name: buffer.T for name, buffer in buffers.items()}
+        results["step"] = np.broadcast_to(np.arange(self.num_steps), (self.size, self.num_steps))
+        self.results = results
+        return results
+
+    def run_results(self, index):
+        """Return the columns of a single run from the last batch, as 1D arrays."""
+        if self.results is None:
+            raise RuntimeError("run() must be called before run_results()")
+        return {name: values[index] for name, values in self.results.items()}
@@ -0,0 +1,127 @@
+# kernel.py
+# Compiled NorSand shear loop, used by NorSandTriaxialSimulation.run when Numba is installed
+import importlib.util
+import types
+
+import numpy as np
+
+try:
+    from .material import compute_gmax, compute_ec, compute_yield_function
+except ImportError:  # run as a script from inside Norsand_Sim/
+    from material import compute_gmax, compute_ec, compute_yield_function
+
+# Optional dependency (pip install calipyr[jit]); only imported when the kernel is first compiled
+HAVE_NUMBA = importlib.util.find_spec("numba") is not None
+
+# Rows of the output block written by shear_kernel, in order
+KERNEL_FIELDS = ("eps1", "epsV", "p", "q", "e", "psi", "pimg", "yield_f", "pore_pressure")
+
+# Helpers called by shear_kernel_py; compiled_shear_kernel swaps in compiled ones for its copy
+_gmax, _ec, _yield = compute_gmax, compute_ec, compute_yield_function
+_compiled_kernel = None
+
+
+def shear_kernel_py(state, material, d_eps, undrained, out):
+    """
+    Run the drained/undrained shear update of NorSandTriaxialSimulation.run on
+    plain floats and arrays.
+
+    state    - float64[7]: e, sigm, sigq, pimg, ep1, epv, u (updated in place)
+    material - float64[8]: N, lambda, Mc, chi, pref, K_over_G, H0, HY
+    out      - float64[9, num_steps], rows as in KERNEL_FIELDS
+
+    Drained steps leave u unchanged, so a state carried over from an
+    undrained stage keeps its pore pressure; p' is written as sigm - u.
+    """
+    e, sigm, sigq, pimg, ep1, epv, u = state[0], state[1], state[2], state[3], state[4], state[5], state[6]
+    n, lambda_, mc, chi, pref, k_over_g, h0, hy = (
+        material[0], material[1], material[2], material[3], material[4], material[5], material[6], material[7]
+    )
+
+    # One row view per field: indexing a 1D row is cheaper than out[row, step] in the Python loop
+    out_eps1, out_epsv, out_p, out_q, out_e, out_psi, out_pimg, out_f, out_u = (
+        out[0], out[1], out[2], out[3], out[4], out[5], out[6], out[7], out[8]
+    )
+
+    for step in range(out.shape[1]):
+        gmax = _gmax(e, sigm)
+        kmax = gmax * k_over_g
+        ec = _ec(n, lambda_, sigm, pref)
+        psi = e - ec
+        f = _yield(sigq, sigm, psi, pimg, mc, n)
+
+        if f <= 0:
+            # Elastic predictor
+            dep1 = d_eps
+            depv = 0.0 if undrained else dep1 / 3
+            sigq += 3 * gmax * (dep1 - depv / 3)
+            sigm += 0 if undrained else kmax * depv
+            u += 0 if not undrained else kmax * dep1 / 3
+        else:
+            # Plastic corrector
+            depg = d_eps
+            d = chi * psi
+            depv = d * depg
+            dep1 = depg + depv / 3
+
+            dsigq = 3 * gmax * (dep1 - depv / 3)
+            dsigm = kmax * depv
+
+            sigq += dsigq
+            if undrained:
+                u += dsigm
+            else:
+                sigm += dsigm
+                e -= (1 + e) * depv
+
+            h = h0 + hy * psi
+            pimg += h * depg * pimg
+
+        ep1 += d_eps
+        epv += depv
+
+        out_eps1[step] = ep1
+        out_epsv[step] = epv
+        out_p[step] = sigm - u
+        out_q[step] = sigq
+        out_e[step] = e
+        out_psi[step] = psi
+        out_pimg[step] = pimg
+        out_f[step] = f
+        out_u[step] = u
+
+    state[0], state[1], state[2], state[3], state[4], state[5], state[6] = e, sigm, sigq, pimg, ep1, epv, u
+
+
+def compiled_shear_kernel():
+    """
+    shear_kernel_py compiled with Numba. Numba is imported and the kernel
+    compiled (or loaded from Numba's cache) on the first call only, so
+    importing the simulator stays NumPy-only.
+    """
+    global _compiled_kernel
+    if _compiled_kernel is None:
+        from numba import njit
+
+        # The kernel's code with its helpers resolved to compiled versions in a copy of
+        # the module globals, so shear_kernel_py itself keeps calling pure Python
+        compiled_globals = dict(
+            shear_kernel_py.__globals__,
+            _gmax=njit(cache=True)(compute_gmax),
+            _ec=njit(cache=True)(compute_ec),
+            _yield=njit(cache=True)(compute_yield_function),
+        )
+        kernel = types.FunctionType(shear_kernel_py.__code__, compiled_globals)
+        _compiled_kernel = njit(cache=True)(kernel)
+    return _compiled_kernel
+
+
+def shear_kernel(state, material, d_eps, undrained, out):
+    """shear_kernel_py, run compiled when Numba is installed (see compiled_shear_kernel)."""
+    kernel = compiled_shear_kernel() if HAVE_NUMBA else shear_kernel_py
+    kernel(state, material, d_eps, undrained, out)
+
+
+def allocate_kernel_output(num_steps):
+    """Output block for shear_kernel; row i is the column KERNEL_FIELDS[i]."""
+    return np.empty((len(KERNEL_FIELDS), num_steps), dtype=np.float64)
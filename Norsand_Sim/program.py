@@ -0,0 +1,224 @@
+# program.py
+# Multi-stage loading programs (consolidation, shear, unload/reload) run as one NorSand simulation
+import numpy as np
+
+try:
+    from .kernel import HAVE_NUMBA, KERNEL_FIELDS, allocate_kernel_output, compiled_shear_kernel, shear_kernel_py
+    from .material import compute_gmax, compute_ec, compute_yield_function, compute_mpsi
+    from .simulation import OUTPUT_FORMATS, NorSandTriaxialSimulation
+except ImportError:  # run as a script from inside Norsand_Sim/
+    from kernel import HAVE_NUMBA, KERNEL_FIELDS, allocate_kernel_output, compiled_shear_kernel, shear_kernel_py
+    from material import compute_gmax, compute_ec, compute_yield_function, compute_mpsi
+    from simulation import OUTPUT_FORMATS, NorSandTriaxialSimulation
+
+STAGE_TYPES = ("consolidation", "shear", "unload_reload")
+
+
+def isotropic_consolidation(p_target, num_steps=100, name="Consolidation"):
+    """Drained isotropic consolidation to mean effective stress p_target, taking q to zero."""
+    return {"type": "consolidation", "name": name, "path": "isotropic", "k0": None,
+            "p_target": float(p_target), "num_steps": int(num_steps)}
+
+
+def k0_consolidation(p_target, num_steps=100, k0=None, name="Consolidation"):
+    """
+    Drained one-dimensional consolidation to p_target along the K0 stress path
+    q = 3(1 - K0) / (1 + 2K0) p'. k0=None uses the material's K0 parameter.
+    """
+    return {"type": "consolidation", "name": name, "path": "k0", "k0": None if k0 is None else float(k0),
+            "p_target": float(p_target), "num_steps": int(num_steps)}
+
+
+def shear(strain, num_steps, undrained=False, name="Shear"):
+    """Strain-controlled axial shear by strain (m/m) in num_steps equal increments."""
+    return {"type": "shear", "name": name, "strain": float(strain), "num_steps": int(num_steps),
+            "undrained": bool(undrained)}
+
+
+def unload_reload(q_min=0.0, num_steps=100, undrained=False, name="Unload-reload"):
+    """
+    Stress-controlled unloading to deviator stress q_min and reloading to the
+    starting q, half the steps each way. The path stays inside the yield
+    surface, so the loop is elastic.
+    """
+    return {"type": "unload_reload", "name": name, "q_min": float(q_min), "num_steps": int(num_steps),
+            "undrained": bool(undrained)}
+
+
+def _write_row(out, step, e, sigm, sigq, pimg, ep1, epv, u, psi, f):
+    """Write one step of state into an output block laid out as KERNEL_FIELDS."""
+    out[0, step] = ep1
+    out[1, step] = epv
+    out[2, step] = sigm - u
+    out[3, step] = sigq
+    out[4, step] = e
+    out[5, step] = psi
+    out[6, step] = pimg
+    out[7, step] = f
+    out[8, step] = u
+
+
+def _dissipate(state):
+    """Drain the excess pore pressure of a kernel state vector, keeping p' = sigm - u."""
+    state[1] -= state[6]
+    state[6] = 0.0
+
+
+class NorSandProgramSimulation(NorSandTriaxialSimulation):
+    """
+    Run a loading program - a list of stages built with isotropic_consolidation,
+    k0_consolidation, shear and unload_reload - as one simulation.
+
+    State (e, p', q, pimg, strains and pore pressure) carries from each stage
+    into the next. Every step of every stage is written to one output buffer,
+    with a "stage" column holding the stage's index in the program. A drained
+    stage first lets any excess pore pressure from an earlier undrained stage
+    dissipate at constant p': u goes to zero and p' = sigm from then on.
+    """
+
+    def __init__(self, params, stages):
+        super().__init__(params)
+        if not stages:
+            raise ValueError("A loading program needs at least one stage")
+        for stage in stages:
+            if stage.get("type") not in STAGE_TYPES:
+                raise ValueError(f"Unknown stage type: {stage.get('type')!r} (expected one of {STAGE_TYPES})")
+            if stage["num_steps"] < (2 if stage["type"] == "unload_reload" else 1):
+                raise ValueError(f"Stage {stage['name']!r} has too few steps: {stage['num_steps']}")
+        self.stages = [dict(stage) for stage in stages]
+        self.total_steps = sum(stage["num_steps"] for stage in self.stages)
+
+    def run(self, output="columns", jit=None):
+        """
+        Run every stage in order and return the results in the layout selected
+        by output (see NorSandTriaxialSimulation.run), plus a "stage" column.
+        jit selects the compiled kernel for shear stages.
+        """
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output!r} (expected one of {list(OUTPUT_FORMATS)})")
+        if jit and not HAVE_NUMBA:
+            raise ImportError("jit=True needs numba (pip install calipyr[jit])")
+        kernel = compiled_shear_kernel() if (HAVE_NUMBA if jit is None else jit) else shear_kernel_py
+
+        state = self._state_array()
+        material = self._material_array()
+        block = allocate_kernel_output(self.total_steps)
+        stage_index = np.empty(self.total_steps, dtype=np.int64)
+
+        start = 0
+        for index, stage in enumerate(self.stages):
+            stop = start + stage["num_steps"]
+            out = block[:, start:stop]
+            if not stage.get("undrained", False):
+                _dissipate(state)
+            if stage["type"] == "shear":
+                kernel(state, material, stage["strain"] / stage["num_steps"], stage["undrained"], out)
+            elif stage["type"] == "consolidation":
+                self._consolidate(state, stage, out)
+            else:
+                self._unload_reload(state, stage, out)
+            stage_index[start:stop] = index
+            start = stop
+
+        self._set_state(state)
+        columns = {name: block[row] for row, name in enumerate(KERNEL_FIELDS)}
+        columns["step"] = np.arange(self.total_steps)
+        columns["stage"] = stage_index
+        self.results = columns
+        return OUTPUT_FORMATS[output](columns)
+
+    def stage_results(self, stage):
+        """
+        Result columns of one stage, by index, or of every stage with that name
+        (e.g. "Shear") in program order, to compare against an imported phase.
+        """
+        if self.results is None:
+            raise RuntimeError("run() must be called before stage_results()")
+        if isinstance(stage, str):
+            indices = [i for i, s in enumerate(self.stages) if s["name"] == stage]
+            if not indices:
+                raise KeyError(stage)
+            mask = np.isin(self.results["stage"], indices)
+        else:
+            mask = self.results["stage"] == range(len(self.stages))[stage]
+        return {name: values[mask] for name, values in self.results.items()}
+
+    def _consolidate(self, state, stage, out):
+        """
+        Drained, stress-controlled consolidation in equal increments of p' and q.
+
+        An increment that stays inside the yield surface is elastic (bulk
+        modulus K = Gmax * K_over_G); one that pushes past it compresses along
+        the lambda slope, e decreasing by lambda * ln(p1 / p0), and drags the
+        yield surface (pimg) with the stress.
+        """
+        e, sigm, sigq, pimg, ep1, epv, u = map(float, state)
+        num_steps = stage["num_steps"]
+        if stage["path"] == "k0":
+            k0 = self.k0 if stage["k0"] is None else stage["k0"]
+            eta = 3 * (1 - k0) / (1 + 2 * k0)
+            axial_share = 1.0  # no lateral strain
+        else:
+            eta = 0.0
+            axial_share = 1 / 3
+
+        dp = (stage["p_target"] - (sigm - u)) / num_steps
+        dq = (eta * stage["p_target"] - sigq) / num_steps
+
+        for step in range(num_steps):
+            gmax = compute_gmax(e, sigm)
+            kmax = gmax * self.k_over_g
+            psi = e - compute_ec(self.n, self.lambda_, sigm, self.pref)
+            f = compute_yield_function(sigq, sigm, psi, pimg, self.mc, self.n)
+
+            sigm_new = sigm + dp
+            sigq_new = sigq + dq
+            if compute_yield_function(sigq_new, sigm_new, psi, pimg, self.mc, self.n) <= 0:
+                depv = dp / kmax
+            else:
+                depv = self.lambda_ * np.log(sigm_new / sigm) / (1 + e)
+                mpsi = compute_mpsi(self.mc, self.n, psi)
+                eta_new = sigq_new / sigm_new
+                pimg = sigm_new / (1 - eta_new / mpsi) if eta_new < mpsi else pimg * sigm_new / sigm
+
+            e -= (1 + e) * depv
+            sigm, sigq = sigm_new, sigq_new
+            ep1 += axial_share * depv
+            epv += depv
+            _write_row(out, step, e, sigm, sigq, pimg, ep1, epv, u, psi, f)
+
+        state[:] = e, sigm, sigq, pimg, ep1, epv, u
+
+    def _unload_reload(self, state, stage, out):
+        """
+        Elastic unload/reload loop in equal q increments, each applied through
+        the axial strain the elastic stiffness needs (the elastic branch of the
+        shear update, run in reverse).
+        """
+        e, sigm, sigq, pimg, ep1, epv, u = map(float, state)
+        undrained = stage["undrained"]
+        num_steps = stage["num_steps"]
+        unload_steps = num_steps // 2
+        dq_unload = (stage["q_min"] - sigq) / unload_steps
+        dq_reload = (sigq - stage["q_min"]) / (num_steps - unload_steps)
+        vol_share = 0.0 if undrained else 1 / 3
+
+        for step in range(num_steps):
+            dq = dq_unload if step < unload_steps else dq_reload
+            gmax = compute_gmax(e, sigm)
+            kmax = gmax * self.k_over_g
+            psi = e - compute_ec(self.n, self.lambda_, sigm, self.pref)
+            f = compute_yield_function(sigq, sigm, psi, pimg, self.mc, self.n)
+
+            dep1 = dq / (3 * gmax * (1 - vol_share / 3))
+            depv = vol_share * dep1
+            sigq += dq
+            if undrained:
+                u += kmax * dep1 / 3
+            else:
+                sigm += kmax * depv
+            ep1 += dep1
+            epv += depv
+            _write_row(out, step, e, sigm, sigq, pimg, ep1, epv, u, psi, f)
+
+        state[:] = e, sigm, sigq, pimg, ep1, epv, u
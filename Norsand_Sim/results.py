@@ -0,0 +1,43 @@
+# results.py
+# Columnar result storage for NorSand simulations
+import numpy as np
+
+# Output channels written by the simulator, in column order
+RESULT_FIELDS = (
+    "step", "eps1", "epsV", "p", "q", "e", "psi", "pimg", "yield_f", "pore_pressure",
+)
+
+
+def allocate_results(num_steps):
+    """Preallocate one array per output channel for a run of num_steps."""
+    columns = {name: np.empty(num_steps, dtype=np.float64) for name in RESULT_FIELDS}
+    columns["step"] = np.arange(num_steps)
+    return columns
+
+
+def field_names(columns):
+    """RESULT_FIELDS followed by any extra columns, such as a loading program's stage index."""
+    return [*RESULT_FIELDS, *(name for name in columns if name not in RESULT_FIELDS)]
+
+
+def to_records(columns):
+    """Pack result columns into a NumPy record array."""
+    names = field_names(columns)
+    return np.rec.fromarrays([columns[name] for name in names], names=names)
+
+
+def to_frame(columns):
+    """Wrap result columns in a DataFrame without copying the arrays."""
+    import pandas as pd
+
+    return pd.DataFrame({name: columns[name] for name in field_names(columns)}, copy=False)
+
+
+def to_dicts(columns):
+    """Convert result columns to the legacy list-of-dicts layout (one dict per step)."""
+    names = [name for name in field_names(columns) if name != "step"]
+    rows = zip(*(columns[name].tolist() for name in names))
+    return [
+        {"step": step, **dict(zip(names, row))}
+        for step, row in enumerate(rows)
+    ]
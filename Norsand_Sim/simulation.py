@@ -1,6 +1,26 @@
 # simulation.py
 import numpy as np
-from material import compute_gmax, compute_ec, compute_yield_function
+
+try:
+    from .kernel import HAVE_NUMBA, KERNEL_FIELDS, allocate_kernel_output, shear_kernel, shear_kernel_py
+    from .material import compute_gmax, compute_ec, compute_yield_function
+    from .results import allocate_results, to_dicts, to_frame, to_records
+except ImportError:  # run as a script from inside Norsand_Sim/
+    from kernel import HAVE_NUMBA, KERNEL_FIELDS, allocate_kernel_output, shear_kernel, shear_kernel_py
+    from material import compute_gmax, compute_ec, compute_yield_function
+    from results import allocate_results, to_dicts, to_frame, to_records
+
+# Bump when a change alters simulated output, so cached runs are invalidated
+SIMULATOR_VERSION = "1"
+
+# Result layouts accepted by NorSandTriaxialSimulation.run(output=...)
+OUTPUT_FORMATS = {
+    "columns": lambda columns: columns,
+    "records": to_records,
+    "frame": to_frame,
+    "dicts": to_dicts,
+}
+
 
 class NorSandTriaxialSimulation:
     def __init__(self, params):
@@ -28,59 +48,161 @@ class NorSandTriaxialSimulation:
         self.epv = 0.0
         self.u = 0.0
 
-        self.results = []
+        self.results = None
+
+    def run(self, output="columns", jit=None):
+        """
+        Run the triaxial shear and return the results.
+
+        output selects the result layout:
+            "columns" - dict of preallocated NumPy arrays, one per channel (default)
+            "records" - NumPy record array
+            "frame"   - pandas DataFrame wrapping the column arrays
+            "dicts"   - legacy list with one dict per step
+
+        jit selects the compiled Numba kernel (kernel.shear_kernel): None uses
+        it when Numba is installed, False forces the Python loop.
+        """
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output!r} (expected one of {list(OUTPUT_FORMATS)})")
+        if jit and not HAVE_NUMBA:
+            raise ImportError("jit=True needs numba (pip install calipyr[jit])")
 
-    def run(self):
         d_eps = self.max_strain / (self.num_steps - 1)
 
-        for step in range(self.num_steps):
-            gmax = compute_gmax(self.e, self.sigm)
-            kmax = gmax * self.k_over_g
-            ec = compute_ec(self.n, self.lambda_, self.sigm, self.pref)
-            psi = self.e - ec
-            f = compute_yield_function(self.sigq, self.sigm, psi, self.pimg, self.mc, self.n)
-
-            if f <= 0:
-                # Elastic predictor
-                dep1 = d_eps
-                depv = 0.0 if self.undrained else dep1 / 3
-                self.sigq += 3 * gmax * (dep1 - depv / 3)
-                self.sigm += 0 if self.undrained else kmax * depv
-                self.u += 0 if not self.undrained else kmax * dep1 / 3
-            else:
-                # Plastic corrector
-                depg = d_eps
-                d = self.chi * psi
-                depv = d * depg
-                dep1 = depg + depv / 3
-
-                dsigq = 3 * gmax * (dep1 - depv / 3)
-                dsigm = kmax * depv
-
-                self.sigq += dsigq
-                if self.undrained:
-                    self.u += dsigm
-                else:
-                    self.sigm += dsigm
-                    self.e -= (1 + self.e) * depv
-
-                h = self.h0 + self.hy * psi
-                self.pimg += h * depg * self.pimg
-
-            self.ep1 += d_eps
-            self.epv += depv
-
-            self.results.append({
-                "step": step,
-                "eps1": self.ep1,
-                "epsV": self.epv,
-                "p": self.sigm - self.u if self.undrained else self.sigm,
-                "q": self.sigq,
-                "e": self.e,
-                "psi": psi,
-                "pimg": self.pimg,
-                "yield_f": f,
-                "pore_pressure": self.u if self.undrained else 0.0,
-            })
-
-        return self.results
+        if HAVE_NUMBA if jit is None else jit:
+            columns = self._run_kernel(d_eps)
+        else:
+            columns = self._run_python(d_eps)
+
+        self.results = columns
+        return OUTPUT_FORMATS[output](columns)
+
+    def _state_array(self):
+        """Current state packed as the kernel's state vector."""
+        return np.array([self.e, self.sigm, self.sigq, self.pimg, self.ep1, self.epv, self.u], dtype=np.float64)
+
+    def _set_state(self, state):
+        """Unpack a kernel state vector back onto the simulation."""
+        self.e, self.sigm, self.sigq, self.pimg, self.ep1, self.epv, self.u = map(float, state)
+
+    def _material_array(self):
+        """Material constants packed as the kernel's material vector."""
+        return np.array(
+            [self.n, self.lambda_, self.mc, self.chi, self.pref, self.k_over_g, self.h0, self.hy], dtype=np.float64
+        )
+
+    def _run_kernel(self, d_eps, kernel=shear_kernel):
+        """Run the shear through kernel (compiled by default) and return the result columns."""
+        state = self._state_array()
+        block = allocate_kernel_output(self.num_steps)
+        kernel(state, self._material_array(), d_eps, bool(self.undrained), block)
+
+        self._set_state(state)
+        columns = {"step": np.arange(self.num_steps)}
+        columns.update((name, block[row]) for row, name in enumerate(KERNEL_FIELDS))
+        return columns
+
+    def _run_python(self, d_eps):
+        """Run the shear as a Python loop (kernel.shear_kernel_py) and return the result columns."""
+        return self._run_kernel(d_eps, shear_kernel_py)
+
+    def _rates(self, y):
+        """
+        Derivatives of the state y = (sigm, sigq, u, e, pimg, epv) per unit
+        imposed strain, using the same elastic/plastic branch as run().
+        Returns (dy, psi, f).
+        """
+        sigm, sigq, u, e, pimg, _ = y
+        gmax = compute_gmax(e, sigm)
+        kmax = gmax * self.k_over_g
+        psi = e - compute_ec(self.n, self.lambda_, sigm, self.pref)
+        f = compute_yield_function(sigq, sigm, psi, pimg, self.mc, self.n)
+
+        if f <= 0:
+            depv = 0.0 if self.undrained else 1 / 3
+            dsigq = 3 * gmax * (1 - depv / 3)
+            dsigm = 0.0 if self.undrained else kmax * depv
+            du = kmax / 3 if self.undrained else 0.0
+            de = dpimg = 0.0
+        else:
+            depv = self.chi * psi
+            dsigq = 3 * gmax * ((1 + depv / 3) - depv / 3)
+            dsigm = 0.0 if self.undrained else kmax * depv
+            du = kmax * depv if self.undrained else 0.0
+            de = 0.0 if self.undrained else -(1 + e) * depv
+            dpimg = (self.h0 + self.hy * psi) * pimg
+
+        return np.array([dsigm, dsigq, du, de, dpimg, depv]), psi, f
+
+    def run_adaptive(self, output_strains=None, rtol=1e-4, max_substeps=100000, output="columns"):
+        """
+        Integrate the shear with adaptive sub-stepping and report the state at
+        output_strains (default: num_steps points from 0 to max_strain).
+
+        Each sub-step is a modified Euler (Heun) step whose local error is
+        estimated from the difference with the plain Euler step. Steps are
+        rejected and shortened when that error exceeds rtol (relative to the
+        state plus a per-variable scale), or when the yield function changes
+        sign within the step, and grown again on smooth parts. Output strains
+        are hit exactly. Sub-step counts are kept in self.adaptive_stats.
+        """
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output!r} (expected one of {list(OUTPUT_FORMATS)})")
+        if output_strains is None:
+            output_strains = np.linspace(0.0, self.max_strain, self.num_steps)
+        output_strains = np.asarray(output_strains, dtype=np.float64)
+        if output_strains.ndim != 1 or np.any(output_strains < 0) or np.any(np.diff(output_strains) < 0):
+            raise ValueError("output_strains must be a non-negative, non-decreasing 1D sequence")
+
+        total = max(float(output_strains[-1]), 1e-12) if len(output_strains) else 1e-12
+        h_min = 1e-8 * total
+        h = 1e-3 * total
+        # Absolute scales: stresses by the initial mean stress, e by 1, strain by the total strain
+        scale = np.array([self.sigm0, self.sigm0, self.sigm0, 1.0, self.sigm0, total])
+
+        y = np.array([self.sigm, self.sigq, self.u, self.e, self.pimg, self.epv], dtype=np.float64)
+        eps = self.ep1
+        accepted = rejected = 0
+
+        columns = allocate_results(len(output_strains))
+        for index, target in enumerate(output_strains):
+            while target - eps > 1e-12 * total:
+                if accepted + rejected >= max_substeps:
+                    raise RuntimeError(f"Adaptive integration exceeded {max_substeps} sub-steps at eps1={eps:.6g}")
+
+                step = min(h, target - eps)
+                k1, _, f0 = self._rates(y)
+                k2, _, f1 = self._rates(y + step * k1)
+                y_new = y + 0.5 * step * (k1 + k2)
+                error = np.max(np.abs(0.5 * step * (k2 - k1)) / (rtol * (np.abs(y_new) + scale)))
+                crossed = (f0 <= 0) != (f1 <= 0)
+
+                if (error > 1.0 or crossed) and step > h_min:
+                    rejected += 1
+                    h = max(step * (0.5 if crossed else max(0.2, 0.9 / np.sqrt(error))), h_min)
+                    continue
+
+                y = y_new
+                eps += step
+                accepted += 1
+                h = step * (2.0 if error == 0 else min(2.0, max(0.2, 0.9 / np.sqrt(error))))
+                h = max(h, h_min)
+
+            sigm, sigq, u, e, pimg, epv = y
+            _, psi, f = self._rates(y)
+            columns["eps1"][index] = target
+            columns["epsV"][index] = epv
+            columns["p"][index] = sigm - u if self.undrained else sigm
+            columns["q"][index] = sigq
+            columns["e"][index] = e
+            columns["psi"][index] = psi
+            columns["pimg"][index] = pimg
+            columns["yield_f"][index] = f
+            columns["pore_pressure"][index] = u if self.undrained else 0.0
+
+        self.sigm, self.sigq, self.u, self.e, self.pimg, self.epv = map(float, y)
+        self.ep1 = eps
+        self.adaptive_stats = {"accepted": accepted, "rejected": rejected}
+        self.results = columns
+        return OUTPUT_FORMATS[output](columns)
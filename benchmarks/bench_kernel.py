@@ -0,0 +1,48 @@
+# bench_kernel.py
+"""
+Time one NorSandTriaxialSimulation.run with the Python loop against the
+compiled Numba kernel, across run sizes and drainage conditions.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_kernel [--repeat N]
+"""
+
+import argparse
+import timeit
+
+from Norsand_Sim.config import params
+from Norsand_Sim.kernel import HAVE_NUMBA
+from Norsand_Sim.simulation import NorSandTriaxialSimulation
+
+NUM_STEPS = (200, 4000, 40000)
+
+
+def time_run(run_params, jit, repeat):
+    """Best wall time of one run, in seconds."""
+    return min(timeit.repeat(lambda: NorSandTriaxialSimulation(run_params).run(jit=jit), number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not HAVE_NUMBA:
+        print("Numba is not installed; only the Python loop is timed (pip install calipyr[jit]).")
+    else:
+        NorSandTriaxialSimulation(params).run(jit=True)  # compile outside the timings
+
+    print(f"{'num_steps':>10} {'undrained':>10} {'python [ms]':>12} {'jit [ms]':>10} {'speedup':>8}")
+    for num_steps in NUM_STEPS:
+        for undrained in (False, True):
+            run_params = dict(params, num_steps=num_steps, undrained=undrained)
+            python = time_run(run_params, False, args.repeat)
+            line = f"{num_steps:>10} {str(undrained):>10} {python * 1e3:>12.2f}"
+            if HAVE_NUMBA:
+                jit = time_run(run_params, True, args.repeat)
+                line += f" {jit * 1e3:>10.3f} {python / jit:>7.0f}x"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# import_budget.py
+"""
+Check the import time and dependency footprint of the toolkit's entry points.
+
+Each module is imported in a fresh interpreter under `python -X importtime`.
+The best cumulative import time over --repeat runs is compared with the
+module's budget, and the modules it pulled in are checked against the heavy
+dependencies it must leave alone (simulation-only workers should import
+nothing beyond NumPy). Exits with status 1 on any violation.
+
+Usage:
+    python benchmarks/import_budget.py [--repeat N] [--scale F] [--output import_times.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("pandas", "matplotlib", "scipy", "openpyxl", "numba")
+NOT_PANDAS = tuple(name for name in HEAVY if name != "pandas")
+
+# Entry point -> (budget in ms, heavy modules it must not import)
+IMPORT_BUDGETS = {
+    "Norsand_Sim.simulation": (250, HEAVY),
+    "Norsand_Sim.batch": (250, HEAVY),
+    "Norsand_Sim.program": (250, HEAVY),
+    "calipyr.calibration.cache": (300, HEAVY),
+    "calipyr.calibration.objective": (300, HEAVY),
+    "calipyr.calibration.fit": (300, HEAVY),
+    "calipyr.calibration.sensitivity": (300, HEAVY),
+    "calipyr.calibration.shared": (300, HEAVY),
+    "calipyr.calibration.surrogate": (300, HEAVY),
+    "calipyr.cli": (250, HEAVY),
+    "calipyr.triaxial.store": (800, NOT_PANDAS),
+    "calipyr.triaxial.importer": (1000, NOT_PANDAS),
+    "calipyr.triaxial.report": (1000, NOT_PANDAS),
+    "calipyr.triaxial.table": (1000, NOT_PANDAS),
+    "calipyr.triaxial.index": (1000, NOT_PANDAS),
+}
+
+
+def import_profile(module: str) -> tuple[float, set]:
+    """
+    (import time in ms, names of every module imported) for importing module
+    in a fresh interpreter, from `python -X importtime`.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+
+    total_us = 0
+    imported = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # column header
+        imported.add(name.strip())
+        # Top-level entries for the module and its parent packages make up its import time
+        stripped = name.strip()
+        if name == " " + stripped and (module == stripped or module.startswith(stripped + ".")):
+            total_us += int(cumulative)
+    return total_us / 1000, imported
+
+
+def forbidden_imports(imported: set, forbidden) -> list[str]:
+    """The forbidden top-level packages that appear among imported modules."""
+    return sorted({name for name in forbidden if any(m == name or m.startswith(name + ".") for m in imported)})
+
+
+def measure(modules, repeat: int = 5) -> dict:
+    """{module: {"best_ms", "imports"}} with the best of repeat fresh-interpreter imports."""
+    results = {}
+    for module in modules:
+        runs = [import_profile(module) for _ in range(repeat)]
+        results[module] = {"best_ms": min(ms for ms, _ in runs), "imports": sorted(runs[0][1])}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, e.g. on slow machines")
+    parser.add_argument("--output", type=Path, default=None, help="write the measured times as JSON")
+    args = parser.parse_args()
+
+    results = measure(IMPORT_BUDGETS, args.repeat)
+    failures = 0
+    print(f"{'module':<36} {'best [ms]':>10} {'budget':>8}  heavy imports")
+    for module, (budget, forbidden) in IMPORT_BUDGETS.items():
+        best = results[module]["best_ms"]
+        heavy = forbidden_imports(results[module]["imports"], forbidden)
+        over = best > budget * args.scale
+        failures += over + bool(heavy)
+        flag = "  OVER BUDGET" if over else ""
+        print(f"{module:<36} {best:>10.1f} {budget * args.scale:>8.0f}  {', '.join(heavy) or '-'}{flag}")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps({m: r["best_ms"] for m, r in results.items()}, indent=1))
+    if failures:
+        print(f"{failures} import budget violation(s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
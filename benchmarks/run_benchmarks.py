@@ -0,0 +1,227 @@
+# run_benchmarks.py
+"""
+Benchmark suite for the simulator, importer and cache-loading hot paths.
+
+Times NorSandTriaxialSimulation.run across run sizes and drainage
+conditions, load_test_sheets/import_all_tests on synthetic workbooks of
+growing size, load_cached_triaxial_data on the resulting store, and the
+fresh-interpreter import time of each entry point in import_budget.py. Results
+are written as JSON; when a baseline JSON exists, each benchmark is compared
+against it and any that got slower by more than the tolerance is reported
+as a regression (exit status 1).
+
+benchmarks/baseline.json holds a full run on the reference machine. Timings
+only compare on the same hardware: after a deliberate performance change, or
+to benchmark a different machine, re-run with --save-baseline there and
+commit the new baseline.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks [--repeat N] [--quick]
+        [--output results.json] [--baseline benchmarks/baseline.json]
+        [--tolerance 0.25] [--save-baseline] [--only PREFIX]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import pickle
+import platform
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.import_budget import IMPORT_BUDGETS, import_profile
+from Norsand_Sim.config import params
+from Norsand_Sim.simulation import NorSandTriaxialSimulation
+from calipyr.triaxial.importer import import_all_tests, load_test_sheets
+from calipyr.triaxial.store import load_cached_triaxial_data, write_archive
+from scripts.generate_sample_tests import create_large_excel
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_TOLERANCE = 0.25
+
+NUM_STEPS = (200, 4000, 40000)
+# (tests per workbook, rows per sheet) of the synthetic importer workbooks
+WORKBOOK_SIZES = ((2, 1000), (4, 10000), (8, 20000))
+QUICK_NUM_STEPS = (200, 4000)
+QUICK_WORKBOOK_SIZES = ((2, 1000), (4, 5000))
+WORKBOOKS_PER_MATERIAL = 2
+# Name prefixes of the benchmarks that need the synthetic workbooks written first
+WORKBOOK_PREFIXES = ("load_test_sheets/", "import_all_tests/", "cache/")
+
+
+def best_time(func, repeat: int) -> dict:
+    """Best and median wall time of func() over repeat calls, in seconds, with its output silenced."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        times = timeit.repeat(func, number=1, repeat=repeat)
+    return {"best": min(times), "median": float(np.median(times)), "repeat": repeat}
+
+
+def simulator_cases(num_steps_list):
+    """(name, callable) pairs timing one simulator run per size and drainage condition."""
+    for num_steps in num_steps_list:
+        for undrained in (False, True):
+            run_params = dict(params, num_steps=num_steps, undrained=undrained)
+            label = "undrained" if undrained else "drained"
+            yield f"simulate/{label}/{num_steps}", lambda p=run_params: NorSandTriaxialSimulation(p).run(jit=False)
+
+
+def build_workbooks(root: Path, sizes) -> dict:
+    """Write the synthetic data tree, one material folder per size; returns {size: material dir}."""
+    materials = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n_tests, n_rows in sizes:
+            material_dir = root / "data" / f"Sand_{n_tests}x{n_rows}"
+            material_dir.mkdir(parents=True, exist_ok=True)
+            for i in range(WORKBOOKS_PER_MATERIAL):
+                create_large_excel(material_dir / f"workbook_{i}.xlsx", n_tests, n_rows, seed=i)
+            materials[(n_tests, n_rows)] = material_dir
+    return materials
+
+
+def importer_cases(materials: dict):
+    """(name, callable) pairs timing single-workbook and whole-tree imports per size."""
+    for (n_tests, n_rows), material_dir in materials.items():
+        size = f"{n_tests}x{n_rows}"
+        workbook = next(iter(sorted(material_dir.glob("*.xlsx"))))
+        for engine in ("pandas", "stream"):
+            yield f"load_test_sheets/{engine}/{size}", lambda w=workbook, e=engine: load_test_sheets(w, engine=e)
+        yield f"import_all_tests/{size}", lambda d=material_dir: import_all_tests(d, engine="stream")
+
+
+def cache_cases(root: Path, materials: dict):
+    """(name, callable) pairs timing cache loads of the largest synthetic material."""
+    material_dir = materials[max(materials)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        imported = import_all_tests(material_dir.parent, engine="stream")
+        imported = {material_dir.name: imported[material_dir.name]}
+        store_dir = root / "store"
+        write_archive(store_dir, imported)
+    pickle_path = root / "triaxials.pkl"
+    with open(pickle_path, "wb") as f:
+        pickle.dump(imported, f)
+
+    material = material_dir.name
+    test_id = next(iter(imported[material]))
+
+    def load_all(mmap=False):
+        data = load_cached_triaxial_data(store_dir, mmap=mmap)
+        return data.to_dict()
+
+    def load_one():
+        return load_cached_triaxial_data(store_dir, mmap=True)[material][test_id]["Shear"]
+
+    yield "cache/store/load_all", load_all
+    yield "cache/store/load_all_mmap", lambda: load_all(mmap=True)
+    yield "cache/store/load_one_phase", load_one
+    yield "cache/pickle/load_all", lambda: load_cached_triaxial_data(pickle_path)
+
+
+def import_times(module: str, repeat: int) -> dict:
+    """Best and median import time of module in a fresh interpreter, in seconds."""
+    times = [import_profile(module)[0] / 1000 for _ in range(repeat)]
+    return {"best": min(times), "median": float(np.median(times)), "repeat": repeat}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[dict]:
+    """
+    Compare the best times of results against baseline, both {name: {"best": s, ...}}.
+
+    Returns one row per benchmark present in both, with the ratio
+    current / baseline and whether it exceeds 1 + tolerance.
+    """
+    rows = []
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        ratio = current["best"] / baseline[name]["best"]
+        rows.append({"name": name, "ratio": ratio, "regression": ratio > 1 + tolerance})
+    return rows
+
+
+def environment() -> dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def needs_workbooks(only: str) -> bool:
+    """Whether any benchmark selected by the --only prefix reads the synthetic workbooks."""
+    return any(prefix.startswith(only) or only.startswith(prefix) for prefix in WORKBOOK_PREFIXES)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast smoke run")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown of the best time, as a fraction (default 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results as the baseline")
+    parser.add_argument("--only", default="", help="run only benchmarks whose name starts with this prefix")
+    args = parser.parse_args(argv)
+
+    num_steps_list = QUICK_NUM_STEPS if args.quick else NUM_STEPS
+    sizes = QUICK_WORKBOOK_SIZES if args.quick else WORKBOOK_SIZES
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        cases = simulator_cases(num_steps_list)
+        if needs_workbooks(args.only):
+            print("Writing synthetic workbooks...")
+            materials = build_workbooks(root, sizes)
+            cases = [*cases, *importer_cases(materials), *cache_cases(root, materials)]
+
+        for name, func in cases:
+            if not name.startswith(args.only):
+                continue
+            results[name] = best_time(func, args.repeat)
+            print(f"{name:<40} {results[name]['best'] * 1e3:>10.2f} ms")
+
+    for module in IMPORT_BUDGETS:
+        name = f"import/{module}"
+        if name.startswith(args.only):
+            results[name] = import_times(module, args.repeat)
+            print(f"{name:<40} {results[name]['best'] * 1e3:>10.2f} ms")
+
+    report = {"environment": environment(), "results": results}
+    args.output.write_text(json.dumps(report, indent=1))
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=1))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())["results"]
+    rows = compare(results, baseline, args.tolerance)
+    regressions = [row for row in rows if row["regression"]]
+    print(f"\nCompared with {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<40} {row['ratio']:>6.2f}x{flag}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
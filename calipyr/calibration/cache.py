@@ -0,0 +1,142 @@
+# calipyr/calibration/cache.py
+"""
+Content-addressed cache of NorSand simulation results.
+
+Runs are keyed on a canonical hash of the params dict plus the simulator
+version. A bounded in-memory LRU tier sits in front of an optional on-disk
+tier of .npz files that persists between sessions.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from Norsand_Sim.simulation import SIMULATOR_VERSION, NorSandTriaxialSimulation
+
+
+def _canonical(value, digits):
+    """JSON-safe canonical form of a parameter value; floats rounded to digits significant figures."""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(f"{float(value):.{digits}g}")
+    return value
+
+
+def params_key(params: dict, digits: int = 12) -> str:
+    """Hash identifying a simulation: sorted params (rounded floats) plus the simulator version."""
+    payload = {
+        "version": SIMULATOR_VERSION,
+        "params": {str(k): _canonical(v, digits) for k, v in sorted(params.items())},
+    }
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SimulationCache:
+    """
+    Memoize NorSandTriaxialSimulation(params).run() results.
+
+    maxsize bounds the in-memory LRU tier; cache_dir enables the on-disk tier.
+    Params that agree to `digits` significant figures share an entry. Cached
+    arrays are read-only. Hit/miss counters are per process; when the cache is
+    sent to worker processes only its settings travel, not the memory tier.
+    """
+
+    def __init__(self, maxsize: int = 256, cache_dir: Path | None = None, digits: int = 12):
+        self.maxsize = maxsize
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.digits = digits
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_memory"] = OrderedDict()
+        return state
+
+    def __len__(self):
+        return len(self._memory)
+
+    def key(self, params: dict) -> str:
+        return params_key(params, self.digits)
+
+    def _remember(self, key, columns):
+        self._memory[key] = columns
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, params: dict):
+        """Cached result columns for params, or None on a miss."""
+        key = self.key(params)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        if self.cache_dir is not None:
+            path = self.cache_dir / f"{key}.npz"
+            if path.exists():
+                with np.load(path) as stored:
+                    columns = {name: stored[name] for name in stored.files}
+                for values in columns.values():
+                    values.setflags(write=False)
+                self._remember(key, columns)
+                self.hits += 1
+                self.disk_hits += 1
+                return columns
+
+        self.misses += 1
+        return None
+
+    def put(self, params: dict, columns: dict):
+        """Store result columns for params in both tiers; returns the stored (read-only) columns."""
+        key = self.key(params)
+        columns = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+        for values in columns.values():
+            values.setflags(write=False)
+        self._remember(key, columns)
+
+        if self.cache_dir is not None:
+            path = self.cache_dir / f"{key}.npz"
+            tmp_path = path.with_name(f"{key}.{os.getpid()}.tmp.npz")
+            np.savez(tmp_path, **columns)
+            os.replace(tmp_path, path)
+        return columns
+
+    def run(self, params: dict) -> dict:
+        """Return the cached result for params, simulating and storing it on a miss."""
+        columns = self.get(params)
+        if columns is None:
+            columns = self.put(params, NorSandTriaxialSimulation(params).run())
+        return columns
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+        }
+
+    def clear(self, disk: bool = False):
+        """Empty the memory tier (and the disk tier if disk=True) and reset the counters."""
+        self._memory.clear()
+        self.hits = self.disk_hits = self.misses = 0
+        if disk and self.cache_dir is not None:
+            for path in self.cache_dir.glob("*.npz"):
+                path.unlink()
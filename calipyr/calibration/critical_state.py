@@ -0,0 +1,151 @@
+# calipyr/calibration/critical_state.py
+"""
+Critical state line (CSL) parameters estimated from the end of shear.
+
+Each test's end state is the mean p', q and e over the last part of its
+Shear phase on the canonical strain grid (see experiments.prepare_tests).
+Across a material's tests, e = N - lambda * ln(p' / pref) is fitted by least
+squares, with pref as in Norsand_Sim.material.compute_ec, and Mc by a
+least-squares line through the origin of q against p'.
+
+Confidence intervals are percentile bootstraps. Each resample is a row of
+counts of how often each test was drawn, so all resampled fits reduce to a
+few (resamples x tests) @ (tests,) products.
+"""
+
+import warnings
+
+import numpy as np
+
+from calipyr.calibration.experiments import RESAMPLE_POINTS, RESAMPLED_ROWS, prepare_tests
+
+# Reference pressure of the CSL, as used by compute_ec and the simulator
+PREF = 100.0
+# Final share of the strain grid averaged into a test's end state
+END_FRACTION = 0.05
+N_RESAMPLES = 5000
+CONFIDENCE = 0.95
+CSL_PARAMS = ("N", "lambda", "Mc")
+
+
+def end_states(tests: dict, fraction: float = END_FRACTION, points: int = RESAMPLE_POINTS) -> dict:
+    """
+    End-of-shear state of each of one material's tests, {test_id: {phase: DataFrame}}.
+
+    Returns {"test_id": [...], "p": array, "q": array, "e": array,
+    "undrained": bool array}, one entry per test with a usable Shear phase.
+    """
+    records = prepare_tests(tests, points)
+    window = max(1, int(round(fraction * points)))
+    rows = [RESAMPLED_ROWS.index(key) for key in ("p", "q", "e")]
+    if records:
+        blocks = np.stack([record["resampled"] for record in records])
+        p, q, e = blocks[:, rows, -window:].mean(axis=2).T
+    else:
+        p = q = e = np.empty(0)
+    return {
+        "test_id": [record["test_id"] for record in records],
+        "p": p,
+        "q": q,
+        "e": e,
+        "undrained": np.array([record["undrained"] for record in records], dtype=bool),
+    }
+
+
+def _weighted_fit(weights: np.ndarray, p: np.ndarray, q: np.ndarray, e: np.ndarray, pref: float) -> np.ndarray:
+    """
+    (N, lambda, Mc) for every row of weights (shape (fits, tests)), weighting
+    each test's end state by its row entry. Degenerate rows give NaN.
+    """
+    x = -np.log(p / pref)
+    total = weights.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = weights @ x / total
+        e_mean = weights @ e / total
+        sxx = weights @ (x * x) - total * x_mean ** 2
+        sxe = weights @ (x * e) - total * x_mean * e_mean
+        lambda_ = sxe / sxx
+        n = e_mean - lambda_ * x_mean
+        mc = weights @ (q * p) / (weights @ (p * p))
+    # A resample of tests that all share one p' leaves lambda undetermined
+    lambda_[sxx <= 1e-12 * np.maximum(total * x_mean ** 2, 1.0)] = np.nan
+    return np.column_stack([n, lambda_, mc])
+
+
+def _resample_counts(rng, n_tests: int, n_resamples: int) -> np.ndarray:
+    """(n_resamples, n_tests) float counts of each test in a bootstrap resample with replacement."""
+    draws = rng.integers(0, n_tests, size=(n_resamples, n_tests))
+    flat = (np.arange(n_resamples)[:, None] * n_tests + draws).ravel()
+    return np.bincount(flat, minlength=n_resamples * n_tests).reshape(n_resamples, n_tests).astype(float)
+
+
+def fit_csl(p, q, e, pref: float = PREF) -> dict:
+    """Least-squares {"N", "lambda", "Mc"} from end-state arrays p', q and e."""
+    p, q, e = (np.asarray(values, dtype=float) for values in (p, q, e))
+    fit = _weighted_fit(np.ones((1, len(p))), p, q, e, pref)[0]
+    return dict(zip(CSL_PARAMS, map(float, fit)))
+
+
+def bootstrap_csl(
+    p,
+    q,
+    e,
+    n_resamples: int = N_RESAMPLES,
+    confidence: float = CONFIDENCE,
+    pref: float = PREF,
+    seed: int = 0,
+) -> dict:
+    """
+    Percentile bootstrap intervals of N, lambda and Mc, {name: (low, high)}.
+
+    Resamples that cannot determine a parameter (every drawn test at one p')
+    are left out of that parameter's interval.
+    """
+    p, q, e = (np.asarray(values, dtype=float) for values in (p, q, e))
+    counts = _resample_counts(np.random.default_rng(seed), len(p), n_resamples)
+    fits = _weighted_fit(counts, p, q, e, pref)
+    tail = 50 * (1 - confidence)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN column: interval is NaN
+        low, high = np.nanpercentile(fits, [tail, 100 - tail], axis=0)
+    return {name: (float(lo), float(hi)) for name, lo, hi in zip(CSL_PARAMS, low, high)}
+
+
+def estimate_critical_state(
+    tests: dict,
+    fraction: float = END_FRACTION,
+    n_resamples: int = N_RESAMPLES,
+    confidence: float = CONFIDENCE,
+    pref: float = PREF,
+    seed: int = 0,
+    points: int = RESAMPLE_POINTS,
+) -> dict:
+    """
+    CSL parameters of one material with bootstrap confidence intervals.
+
+    Returns {"N", "lambda", "Mc", "intervals": {name: (low, high)},
+    "confidence", "pref", "end_states": end_states(...)}. Needs end states
+    at two or more confining pressures. points is the canonical grid size,
+    as in prepare_tests.
+    """
+    states = end_states(tests, fraction, points)
+    if len(np.unique(np.round(states["p"], 9))) < 2:
+        raise ValueError(f"CSL fit needs end states at two or more pressures, got {len(states['p'])} test(s)")
+
+    result = fit_csl(states["p"], states["q"], states["e"], pref)
+    result["intervals"] = bootstrap_csl(states["p"], states["q"], states["e"], n_resamples, confidence, pref, seed)
+    result["confidence"] = confidence
+    result["pref"] = pref
+    result["end_states"] = states
+    return result
+
+
+def estimate_all(imported_data, **kwargs) -> dict:
+    """estimate_critical_state for every material with enough tests; others are skipped with a message."""
+    results = {}
+    for material in imported_data:
+        try:
+            results[material] = estimate_critical_state(imported_data[material], **kwargs)
+        except ValueError as e:
+            print(f"  Skipping {material}: {e}")
+    return results
@@ -0,0 +1,164 @@
+# calipyr/calibration/experiments.py
+"""
+Turn imported triaxial tests into the test conditions and measured curves
+used by the calibration objective.
+
+Each test's Shear curves are resampled once onto a canonical strain grid
+that matches a simulator run of the same number of steps, so the objective
+compares simulated and measured arrays point for point. For tests read from
+a TriaxialStore the resampled block is stored next to the raw data and
+reused on later runs.
+"""
+
+import re
+
+import numpy as np
+
+# Test ids as built by the importer, e.g. "TX1-CIU-150kPa"
+TEST_ID_PATTERN = re.compile(r"^(TX\d+)-(CIU|CID|DMIN-CID)-(\d+)kPa$", re.IGNORECASE)
+UNDRAINED_TYPES = {"CIU"}
+# Keys of a test id kept for every stored test (calipyr.triaxial.index)
+TEST_KEYS = ("tx", "test_type", "confining_pressure")
+# Canonical columns compared against the simulator
+CURVE_ROLES = ("eps_a", "p", "q", "e")
+# Rows of a resampled block, and the number of canonical grid points
+RESAMPLED_ROWS = ("eps1", "p", "q", "e")
+RESAMPLE_POINTS = 200
+RESAMPLED_NAME = "shear_resampled"
+
+
+def parse_test_id(test_id: str) -> dict:
+    """Split a test id into TX number, test type, confining pressure and drainage."""
+    match = TEST_ID_PATTERN.match(test_id.strip())
+    if not match:
+        raise ValueError(f"Unrecognised test id: {test_id}")
+
+    test_type = match.group(2).upper()
+    return {
+        "tx": match.group(1).upper(),
+        "test_type": test_type,
+        "confining_pressure": float(match.group(3)),
+        "undrained": test_type in UNDRAINED_TYPES,
+    }
+
+
+def test_keys(test_id: str) -> dict:
+    """
+    The TEST_KEYS entries of parse_test_id. Unrecognised ids give empty
+    strings and a NaN pressure instead of raising, so any test can be indexed.
+    """
+    try:
+        parsed = parse_test_id(test_id)
+    except ValueError:
+        return {"tx": "", "test_type": "", "confining_pressure": np.nan}
+    return {key: parsed[key] for key in TEST_KEYS}
+
+
+def shear_curves(df) -> dict:
+    """
+    Axial strain (fraction), p', q and e arrays from a Shear DataFrame's
+    canonical columns, sorted by strain. Rows with a missing value in any of
+    the four are dropped.
+    """
+    if not all(role in df.columns for role in CURVE_ROLES):
+        from calipyr.triaxial.schema import canonicalize  # pandas, only needed for raw frames
+
+        df = canonicalize(df.copy(deep=False))  # cached before canonical columns existed
+
+    missing = [role for role in CURVE_ROLES if role not in df.columns]
+    if missing:
+        raise KeyError(f"Shear phase is missing columns: {missing}")
+
+    data = df[list(CURVE_ROLES)].dropna()
+    order = np.argsort(data["eps_a"].to_numpy(), kind="stable")
+    return {
+        "eps1": data["eps_a"].to_numpy()[order],
+        "p": data["p"].to_numpy()[order],
+        "q": data["q"].to_numpy()[order],
+        "e": data["e"].to_numpy()[order],
+    }
+
+
+def strain_grid(eps_max: float, points: int = RESAMPLE_POINTS) -> np.ndarray:
+    """
+    Canonical strain grid: points equal increments ending at eps_max. A
+    simulator run with num_steps=points and max_strain=simulated_max_strain(
+    eps_max, points) reports its state at exactly these strains.
+    """
+    return eps_max * np.arange(1, points + 1) / points
+
+
+def simulated_max_strain(eps_max: float, points: int = RESAMPLE_POINTS) -> float:
+    """max_strain parameter whose simulator output grid is strain_grid(eps_max, points)."""
+    return eps_max * (points - 1) / points
+
+
+def resample_curves(curves: dict, points: int = RESAMPLE_POINTS) -> np.ndarray:
+    """Resample shear_curves output onto the canonical grid as a C-contiguous (4, points) block, rows RESAMPLED_ROWS."""
+    block = np.empty((len(RESAMPLED_ROWS), points))
+    block[0] = strain_grid(curves["eps1"][-1], points)
+    for row, key in enumerate(RESAMPLED_ROWS[1:], start=1):
+        block[row] = np.interp(block[0], curves["eps1"], curves[key])
+    return block
+
+
+def _resampled_shear(phases, points: int):
+    """
+    (block, start state, store written to or None) of one test's Shear phase
+    on the canonical grid. Store-backed tests reuse and fill the stored block.
+    """
+    store = getattr(phases, "store", None)
+    if store is not None:
+        stored = store.load_derived(phases.material, phases.test_id, RESAMPLED_NAME)
+        if stored is not None and stored[1]["points"] == points:
+            block, meta = stored
+            return np.ascontiguousarray(block), {"p": meta["p_start"], "e": meta["e_start"]}, None
+
+    curves = shear_curves(phases["Shear"])
+    if len(curves["eps1"]) < 2 or curves["eps1"][-1] <= 0:
+        raise ValueError("not enough shear data")
+
+    block = resample_curves(curves, points)
+    start = {"p": float(curves["p"][0]), "e": float(curves["e"][0])}
+    if store is not None:
+        store.write_derived(phases.material, phases.test_id, RESAMPLED_NAME, block, save=False,
+                            points=points, p_start=start["p"], e_start=start["e"])
+    return block, start, store
+
+
+def prepare_tests(tests: dict, points: int = RESAMPLE_POINTS) -> list[dict]:
+    """
+    Build calibration records from one material's tests, {test_id: {phase: DataFrame}}.
+    Each record carries the test conditions and its Shear curves resampled onto
+    the canonical grid ("resampled", rows RESAMPLED_ROWS). Tests without a
+    usable Shear phase are skipped with a message.
+    """
+    prepared = []
+    written = {}
+    for test_id, phases in tests.items():
+        if "Shear" not in phases:
+            print(f"  Skipping {test_id}: missing shear phase")
+            continue
+        try:
+            conditions = parse_test_id(test_id)
+            resampled, start, store = _resampled_shear(phases, points)
+        except (KeyError, ValueError) as e:
+            print(f"  Skipping {test_id}: {e}")
+            continue
+        if store is not None:
+            written[id(store)] = store
+
+        # Start the simulation from the measured state at the beginning of shear
+        conditions["sigM0"] = start["p"] if start["p"] > 0 else conditions["confining_pressure"]
+        conditions["e0"] = start["e"]
+
+        prepared.append({"test_id": test_id, **conditions, "resampled": resampled})
+
+    for store in written.values():
+        store.save_manifest()
+    return prepared
+
+
+def resample_archive(store, points: int = RESAMPLE_POINTS) -> int:
+    """Resample every test of a TriaxialStore not yet resampled at this grid size; returns the test count."""
+    return sum(len(prepare_tests(store[material], points)) for material in store)
@@ -0,0 +1,130 @@
+# calipyr/calibration/fit.py
+"""
+Fit NorSand parameters to one material's triaxial tests with scipy optimisers,
+spreading objective evaluations over a process pool.
+"""
+
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+from calipyr.calibration.experiments import RESAMPLE_POINTS, prepare_tests
+from calipyr.calibration.objective import CalibrationObjective
+
+# Search ranges used when no bounds are given
+DEFAULT_BOUNDS = {
+    "N": (0.7, 1.3),
+    "lambda": (0.01, 0.15),
+    "Mc": (0.9, 1.6),
+    "chi": (0.1, 0.6),
+    "H0": (1.0, 20.0),
+    "HY": (0.0, 40.0),
+}
+# scipy.optimize.minimize methods that use the parallel finite-difference gradient
+GRADIENT_METHODS = {"L-BFGS-B", "TNC", "SLSQP", "BFGS", "CG", "trust-constr"}
+
+
+class ParallelGradient:
+    """
+    Forward-difference value and gradient of an objective, with the n + 1
+    evaluations fanned out through map_fn. Returns (f, grad) for jac=True.
+    With limits ([(low, high)] per parameter), coordinates whose forward step
+    would leave the box take a backward step instead.
+    """
+
+    def __init__(self, objective, map_fn, rel_step=1e-6, limits=None):
+        self.objective = objective
+        self.map_fn = map_fn
+        self.rel_step = rel_step
+        self.high = None if limits is None else np.transpose(np.asarray(limits, dtype=float))[1]
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        steps = self.rel_step * np.maximum(np.abs(x), 1.0)
+        if self.high is not None:
+            steps = np.where(x + steps > self.high, -steps, steps)
+        points = [x] + [x + step * unit for step, unit in zip(steps, np.eye(len(x)))]
+        values = np.fromiter(self.map_fn(self.objective, points), dtype=float, count=len(points))
+        return values[0], (values[1:] - values[0]) / steps
+
+
+def executor(workers):
+    """
+    Process pool for workers != 1 (None uses every core), or a null context
+    yielding None to run in-process. Shared by calibrate and the sensitivity sweep.
+    """
+    return nullcontext() if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+
+
+def calibrate(
+    tests: dict,
+    bounds: dict | None = None,
+    base_params: dict | None = None,
+    method: str = "differential_evolution",
+    workers: int | None = None,
+    weights: dict | None = None,
+    cache=None,
+    x0=None,
+    points: int = RESAMPLE_POINTS,
+    shared_dir=None,
+    **options,
+):
+    """
+    Calibrate NorSand parameters jointly against one material's tests.
+
+    tests is {test_id: {phase: DataFrame}} as produced by import_all_tests for a
+    single material. bounds maps each calibrated parameter to (low, high);
+    parameters not listed keep their base_params value. method is
+    "differential_evolution", "surrogate" (calibration.surrogate: search an
+    emulator of the simulated curves, confirming candidates with real runs) or
+    any scipy.optimize.minimize method; workers sets
+    the process pool size (None for all cores, 1 to run in-process). cache is an
+    optional SimulationCache; give it a cache_dir to share runs between workers.
+    points is the size of the canonical strain grid the tests are resampled onto.
+    With a process pool the measured arrays are published once in shared
+    memory (or, with shared_dir, as memory-mapped files there) instead of
+    being pickled with every batch of evaluations.
+
+    Returns the scipy OptimizeResult with the fitted parameter dict in .params.
+    """
+    from scipy import optimize  # imported here so worker processes unpickling the objective skip scipy
+
+    bounds = dict(DEFAULT_BOUNDS if bounds is None else bounds)
+    names = list(bounds)
+    objective = CalibrationObjective(prepare_tests(tests, points), names, base_params, weights, cache)
+    limits = [bounds[name] for name in names]
+    if x0 is None:
+        x0 = [objective.base_params.get(name, np.mean(bounds[name])) for name in names]
+
+    with executor(workers) as pool, (nullcontext() if pool is None else objective.sharing(shared_dir)):
+        map_fn = map if pool is None else functools.partial(pool.map, chunksize=4)
+
+        if method == "differential_evolution":
+            options.setdefault("updating", "deferred")
+            result = optimize.differential_evolution(
+                objective, limits, x0=np.clip(x0, *np.transpose(limits)), workers=map_fn, **options
+            )
+        elif method == "surrogate":
+            from calipyr.calibration.surrogate import surrogate_minimize
+
+            result = surrogate_minimize(objective, limits, map_fn, x0=x0, **options)
+        elif method in GRADIENT_METHODS:
+            gradient = ParallelGradient(objective, map_fn, limits=limits)
+            result = optimize.minimize(gradient, x0, jac=True, method=method, bounds=limits, **options)
+        else:
+            result = optimize.minimize(objective, x0, method=method, bounds=limits, **options)
+
+    result.params = objective.params_for(result.x)
+    result.test_ids = [test["test_id"] for test in objective.tests]
+    return result
+
+
+def calibrate_all(imported_data: dict, **kwargs) -> dict:
+    """Calibrate every material in {material: {test_id: {phase: DataFrame}}} in turn."""
+    results = {}
+    for material, tests in imported_data.items():
+        print(f"Calibrating material: {material}")
+        results[material] = calibrate(tests, **kwargs)
+    return results
@@ -0,0 +1,165 @@
+# calipyr/calibration/objective.py
+"""
+Objective comparing simulated NorSand curves against measured triaxial tests.
+"""
+
+from contextlib import contextmanager
+
+import numpy as np
+
+from Norsand_Sim.batch import BatchNorSandSimulation
+from Norsand_Sim.config import params as default_params
+from calipyr.calibration.experiments import RESAMPLED_ROWS, simulated_max_strain
+
+# Parameters set per test from the measured state; they cannot be calibrated
+TEST_STATE_PARAMS = ("sigM0", "e0", "undrained", "max_strain", "num_steps")
+DEFAULT_WEIGHTS = {"q": 1.0, "p": 1.0, "e": 1.0}
+# Simulated channels compared against the resampled measured curves
+RESIDUAL_KEYS = ("p", "q", "e")
+
+# Residual used in place of NaN/inf from a run that left the valid stress range
+FAILED_RESIDUAL = 1e3
+# Measured arrays that share() publishes for worker processes instead of pickling
+SHARED_ARRAYS = ("resampled", "measured", "factors", "max_strain")
+
+
+def _curve_scales(measured, e_start):
+    """Normalising scale per test and curve, shape (tests, len(RESIDUAL_KEYS), 1)."""
+    scales = np.empty(measured.shape[:2] + (1,))
+    for row, key in enumerate(RESIDUAL_KEYS):
+        values = measured[:, row] - e_start[:, None] if key == "e" else measured[:, row]
+        scales[:, row, 0] = np.maximum(np.max(np.abs(values), axis=1), 0.01 if key == "e" else 1.0)
+    return scales
+
+
+class CalibrationObjective:
+    """
+    Sum of squared, normalised residuals between simulated and measured curves.
+
+    Compares q-eps1, p'-eps1 (together the p'-q stress path) and e-eps1 (hence
+    e-p') for every prepared test of one material. Measured curves come
+    resampled onto the canonical strain grid (see prepare_tests) and every test
+    is simulated on that same grid, so the residuals of all tests are one
+    array subtraction. All tests are simulated in a single
+    BatchNorSandSimulation pass; with a SimulationCache, only runs not already
+    cached are simulated. Instances are picklable so they can be evaluated in
+    worker processes; inside sharing() they pickle without their measured arrays,
+    which workers read from shared memory instead.
+    """
+
+    def __init__(self, tests, names, base_params=None, weights=None, cache=None):
+        fixed = [name for name in names if name in TEST_STATE_PARAMS]
+        if fixed:
+            raise ValueError(f"Parameters set per test cannot be calibrated: {fixed}")
+        if not tests:
+            raise ValueError("No tests to calibrate against")
+        points = {test["resampled"].shape[1] for test in tests}
+        if len(points) != 1:
+            raise ValueError(f"All tests must be resampled onto the same number of points, got {sorted(points)}")
+
+        self.tests = tests
+        self.names = list(names)
+        self.base_params = dict(default_params if base_params is None else base_params)
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.cache = cache
+
+        self.points = points.pop()
+        blocks = np.stack([test["resampled"] for test in tests])
+        self.max_strain = blocks[:, RESAMPLED_ROWS.index("eps1"), -1]
+        self.measured = np.ascontiguousarray(blocks[:, [RESAMPLED_ROWS.index(key) for key in RESIDUAL_KEYS]])
+        weights = np.array([self.weights[key] for key in RESIDUAL_KEYS])[None, :, None]
+        self.factors = weights / _curve_scales(self.measured, np.array([test["e0"] for test in tests]))
+        self.shared = None
+
+    @contextmanager
+    def sharing(self, directory=None):
+        """
+        Within the block, pickled copies of this objective leave out the
+        measured arrays and attach to one published copy of them instead:
+        SharedArrays in shared memory, or memory-mapped files under directory.
+        The published data is released on exit.
+        """
+        from calipyr.calibration.shared import SharedArrays
+
+        self.shared = SharedArrays({
+            "resampled": np.stack([test["resampled"] for test in self.tests]),
+            "measured": self.measured,
+            "factors": self.factors,
+            "max_strain": self.max_strain,
+        }, directory)
+        try:
+            yield self.shared
+        finally:
+            shared, self.shared = self.shared, None
+            shared.release()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.shared is not None:
+            for name in SHARED_ARRAYS:
+                state.pop(name, None)
+            state["tests"] = [{key: value for key, value in test.items() if key != "resampled"} for test in self.tests]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.shared is not None:
+            self.measured = self.shared["measured"]
+            self.factors = self.shared["factors"]
+            self.max_strain = self.shared["max_strain"]
+            for test, block in zip(self.tests, self.shared["resampled"]):
+                test["resampled"] = block
+
+    def params_for(self, x) -> dict:
+        """Material parameters for the optimiser vector x."""
+        return {**self.base_params, **dict(zip(self.names, map(float, x)))}
+
+    def simulate(self, x) -> list[dict]:
+        """Simulate every test with parameters x; returns one column dict per test."""
+        material = self.params_for(x)
+        run_params = [
+            {
+                **material,
+                "sigM0": test["sigM0"],
+                "e0": test["e0"],
+                "undrained": test["undrained"],
+                "max_strain": simulated_max_strain(float(max_strain), self.points),
+                "num_steps": self.points,
+            }
+            for test, max_strain in zip(self.tests, self.max_strain)
+        ]
+        if self.cache is None:
+            results = [None] * len(run_params)
+        else:
+            results = [self.cache.get(run) for run in run_params]
+
+        pending = [index for index, columns in enumerate(results) if columns is None]
+        if pending:
+            batch = BatchNorSandSimulation([run_params[index] for index in pending])
+            with np.errstate(all="ignore"):
+                batch.run()
+            for position, index in enumerate(pending):
+                results[index] = batch.run_results(position)
+                if self.cache is not None:
+                    results[index] = self.cache.put(run_params[index], results[index])
+        return results
+
+    def simulated_curves(self, x) -> np.ndarray:
+        """Simulated RESIDUAL_KEYS curves of every test on the canonical grid, shaped like measured."""
+        return np.array([[sim[key] for key in RESIDUAL_KEYS] for sim in self.simulate(x)])
+
+    def curve_residuals(self, curves) -> np.ndarray:
+        """
+        Weighted residuals of curves shaped (..., tests, len(RESIDUAL_KEYS),
+        points), with FAILED_RESIDUAL where a value is not finite.
+        """
+        residuals = (curves - self.measured) * self.factors
+        residuals[~np.isfinite(residuals)] = FAILED_RESIDUAL
+        return residuals
+
+    def residuals(self, x) -> np.ndarray:
+        """Concatenated weighted residuals of all tests and curves."""
+        return self.curve_residuals(self.simulated_curves(x)).ravel()
+
+    def __call__(self, x) -> float:
+        return float(np.mean(self.residuals(x) ** 2))
@@ -0,0 +1,214 @@
+# calipyr/calibration/sensitivity.py
+"""
+Global sensitivity of simulated triaxial responses to NorSand parameters.
+
+Parameter sets follow the Saltelli layout: base matrices A and B drawn from
+a scrambled Sobol sequence or a Latin hypercube, plus one matrix AB_i per
+parameter (A with column i taken from B). They are simulated in
+BatchNorSandSimulation chunks spread over a process pool and reduced to
+scalar response features. First-order indices use the Saltelli (2010)
+estimator and total-order indices Jansen's. With a checkpoint path, finished
+chunks are saved as they complete and a rerun resumes where it stopped.
+"""
+
+import json
+import os
+from concurrent.futures import as_completed
+from pathlib import Path
+
+import numpy as np
+
+from Norsand_Sim.batch import BatchNorSandSimulation
+from Norsand_Sim.config import params as default_params
+from calipyr.calibration.fit import executor
+
+SENSITIVITY_PARAMS = ("N", "lambda", "Mc", "chi", "H0", "HY", "K_over_G")
+# Default bounds are the config.params value ± this fraction
+DEFAULT_SPAN = 0.25
+FEATURES = ("peak_q", "q_large_strain", "p_phase_transformation", "final_pore_pressure")
+SAMPLERS = ("sobol", "lhs")
+CHUNK_SIZE = 512
+
+
+def default_bounds(names=SENSITIVITY_PARAMS, span: float = DEFAULT_SPAN, base_params: dict | None = None) -> dict:
+    """Bounds of ± span (as a fraction) around each parameter's base value."""
+    base = default_params if base_params is None else base_params
+    return {name: (base[name] * (1 - span), base[name] * (1 + span)) for name in names}
+
+
+def saltelli_samples(bounds: dict, n: int, sampler: str = "sobol", seed: int = 0) -> np.ndarray:
+    """
+    Parameter sets for n base samples, shape (n * (d + 2), d) with columns in
+    bounds order, stacked as blocks A, B, AB_1, ..., AB_d of n rows each.
+    """
+    from scipy.stats import qmc  # parent process only; chunk workers need just NumPy
+
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler: {sampler!r} (expected one of {SAMPLERS})")
+    d = len(bounds)
+    if sampler == "sobol":
+        unit = qmc.Sobol(2 * d, scramble=True, seed=seed).random(n)
+    else:
+        unit = qmc.LatinHypercube(2 * d, seed=seed).random(n)
+
+    a, b = unit[:, :d], unit[:, d:]
+    blocks = [a, b]
+    for i in range(d):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        blocks.append(ab)
+    low, high = np.transpose([bounds[name] for name in bounds])
+    return qmc.scale(np.vstack(blocks), low, high)
+
+
+def response_features(results: dict, undrained) -> np.ndarray:
+    """
+    FEATURES of every run in a batch result, shape (runs, len(FEATURES)).
+
+    The phase-transformation point is the minimum p' of an undrained run and
+    the point of maximum contraction (peak epsV) of a drained one.
+    """
+    q, p = results["q"], results["p"]
+    rows = np.arange(len(q))
+    transformation = np.where(undrained, np.argmin(p, axis=1), np.argmax(results["epsV"], axis=1))
+    return np.column_stack([
+        np.max(q, axis=1),
+        q[:, -1],
+        p[rows, transformation],
+        results["pore_pressure"][:, -1],
+    ])
+
+
+def _simulate_features(task) -> np.ndarray:
+    """Features of one chunk of parameter sets; task is (names, values, base params)."""
+    names, values, base = task
+    size = len(values)
+    columns = {key: np.full(size, value) for key, value in base.items()}
+    columns.update(zip(names, values.T))
+    batch = BatchNorSandSimulation(columns)
+    with np.errstate(all="ignore"):
+        results = batch.run()
+        return response_features(results, batch.undrained)
+
+
+def sobol_indices(outputs: np.ndarray, n: int, d: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    First- and total-order indices, each shape (features, d), from outputs in
+    the saltelli_samples layout. Runs with a non-finite output are left out
+    per parameter; a feature that does not vary gets NaN indices.
+    """
+    f_a, f_b = outputs[:n], outputs[n:2 * n]
+    first = np.full((outputs.shape[1], d), np.nan)
+    total = np.full((outputs.shape[1], d), np.nan)
+
+    with np.errstate(all="ignore"):
+        for i in range(d):
+            f_ab = outputs[(2 + i) * n:(3 + i) * n]
+            valid = np.isfinite(f_a) & np.isfinite(f_b) & np.isfinite(f_ab)
+            a = np.where(valid, f_a, np.nan)
+            b = np.where(valid, f_b, np.nan)
+            ab = np.where(valid, f_ab, np.nan)
+            variance = np.nanvar(np.concatenate([a, b]), axis=0)
+            variance[variance == 0] = np.nan
+            first[:, i] = np.nanmean(b * (ab - a), axis=0) / variance
+            total[:, i] = 0.5 * np.nanmean((a - ab) ** 2, axis=0) / variance
+    return first, total
+
+
+def _load_checkpoint(path: Path, meta: dict, samples: np.ndarray):
+    """(outputs, done) from a checkpoint of this same sweep, or None if there is none."""
+    if not path.exists():
+        return None
+    with np.load(path) as stored:
+        if json.loads(str(stored["meta"])) != meta or not np.array_equal(stored["samples"], samples):
+            raise ValueError(f"Checkpoint {path} belongs to a different sweep; remove it or pick another path")
+        return stored["outputs"].copy(), stored["done"].copy()
+
+
+def _save_checkpoint(path: Path, meta: dict, samples, outputs, done):
+    """Atomically write the sweep state."""
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(tmp_path, meta=np.array(json.dumps(meta)), samples=samples, outputs=outputs, done=done)
+    os.replace(tmp_path, path)
+
+
+def run_sensitivity(
+    bounds: dict | None = None,
+    n: int = 1024,
+    sampler: str = "sobol",
+    conditions: dict | None = None,
+    base_params: dict | None = None,
+    workers: int | None = 1,
+    chunk_size: int = CHUNK_SIZE,
+    checkpoint: Path | None = None,
+    seed: int = 0,
+) -> dict:
+    """
+    Sobol sensitivity indices of FEATURES to the parameters in bounds.
+
+    bounds defaults to default_bounds(). conditions sets the test state shared
+    by every run (default: config.params sheared undrained). Sampling takes
+    n * (len(bounds) + 2) runs, simulated chunk_size at a time over workers
+    processes (None for all cores, 1 in-process). With checkpoint, each
+    finished chunk is saved to that .npz and a rerun with the same settings
+    only simulates the chunks still missing.
+
+    Returns a dict with names, features, samples, outputs and the index
+    arrays first_order and total_order, each shape (features, parameters).
+    """
+    bounds = dict(default_bounds() if bounds is None else bounds)
+    names = list(bounds)
+    base = {**(default_params if base_params is None else base_params), "undrained": True, **(conditions or {})}
+    base = {key: value for key, value in base.items() if key not in bounds}
+
+    samples = saltelli_samples(bounds, n, sampler, seed)
+    chunks = [slice(start, min(start + chunk_size, len(samples))) for start in range(0, len(samples), chunk_size)]
+    meta = {"names": names, "bounds": [list(map(float, bounds[name])) for name in names], "n": n,
+            "sampler": sampler, "seed": seed, "chunk_size": chunk_size, "base": base}
+
+    outputs = np.full((len(samples), len(FEATURES)), np.nan)
+    done = np.zeros(len(chunks), dtype=bool)
+    checkpoint = Path(checkpoint) if checkpoint is not None else None
+    if checkpoint is not None:
+        stored = _load_checkpoint(checkpoint, meta, samples)
+        if stored is not None:
+            outputs, done = stored
+            print(f"Resuming sensitivity sweep: {done.sum()} of {len(chunks)} chunks done")
+
+    def finish(index, features):
+        outputs[chunks[index]] = features
+        done[index] = True
+        if checkpoint is not None:
+            _save_checkpoint(checkpoint, meta, samples, outputs, done)
+
+    pending = [index for index in range(len(chunks)) if not done[index]]
+    with executor(workers) as pool:
+        if pool is None:
+            for index in pending:
+                finish(index, _simulate_features((names, samples[chunks[index]], base)))
+        else:
+            futures = {pool.submit(_simulate_features, (names, samples[chunks[index]], base)): index
+                       for index in pending}
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
+
+    first, total = sobol_indices(outputs, n, len(names))
+    return {
+        "names": names,
+        "features": list(FEATURES),
+        "samples": samples,
+        "outputs": outputs,
+        "first_order": first,
+        "total_order": total,
+    }
+
+
+def indices_table(result: dict):
+    """First- and total-order indices as a DataFrame indexed by (feature, parameter)."""
+    import pandas as pd
+
+    index = pd.MultiIndex.from_product([result["features"], result["names"]], names=["feature", "parameter"])
+    return pd.DataFrame({
+        "first_order": result["first_order"].ravel(),
+        "total_order": result["total_order"].ravel(),
+    }, index=index)
@@ -0,0 +1,181 @@
+# calipyr/calibration/shared.py
+"""
+Arrays published once for process-pool workers to read without copies.
+
+SharedArrays copies a dict of NumPy arrays into one multiprocessing
+shared-memory block, or into .npy files in a directory for memory mapping.
+It pickles as a small handle (block name or directory plus the array
+layout), so objects holding one travel to workers without their data. A
+worker attaches once per process and hands out read-only views of the
+shared buffer, so its memory stays flat however many tests are shared.
+"""
+
+import shutil
+import sys
+import tempfile
+import threading
+import warnings
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+# Blocks published by this process, and attachments made in it (kept open for its
+# lifetime), by block name or directory
+_PUBLISHED = {}
+_ATTACHED = {}
+# Unlinked blocks that were still viewed when released, kept referenced (so they are never
+# closed under a view) and closed by a later release() once their views are gone
+_LINGERING = []
+# Blocks this process is attaching to right now, whose tracker registration is skipped
+_ATTACHING = set()
+_ATTACH_LOCK = threading.Lock()
+
+
+def _close_lingering():
+    """Close the released blocks in _LINGERING that no array views any more."""
+    for block in list(_LINGERING):
+        try:
+            block.close()
+        except BufferError:
+            continue
+        _LINGERING.remove(block)
+
+
+def _skip_attached_registrations(register):
+    """resource_tracker.register, except for the shared-memory blocks in _ATTACHING."""
+    def register_unless_attaching(resource, rtype):
+        if rtype != "shared_memory" or resource.lstrip("/") not in _ATTACHING:
+            register(resource, rtype)
+
+    register_unless_attaching.skips_attached = True
+    return register_unless_attaching
+
+
+def _attach_block(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block without registering it with the resource tracker."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    from multiprocessing import resource_tracker
+
+    # Before 3.13 attaching registers the block as if this process owned it, and
+    # unregistering afterwards would drop the publisher's own entry when the workers
+    # share its tracker (as spawned ones do). Registrations of the blocks being
+    # attached are skipped instead; only those names are filtered, so blocks other
+    # threads create meanwhile are still tracked. Only non-publishing processes attach.
+    with _ATTACH_LOCK:
+        if not getattr(resource_tracker.register, "skips_attached", False):
+            resource_tracker.register = _skip_attached_registrations(resource_tracker.register)
+        _ATTACHING.add(name.lstrip("/"))
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        with _ATTACH_LOCK:
+            _ATTACHING.discard(name.lstrip("/"))
+
+
+class SharedArrays:
+    """
+    Named float/int arrays in shared memory (directory=None) or in
+    memory-mapped .npy files under directory (a fresh temporary one with
+    directory=True). The publishing process must call release() once the
+    workers are done, after dropping its own views of the arrays: release()
+    unlinks the data at once, but a shared-memory block still viewed by live
+    arrays stays mapped (with a RuntimeWarning), so those views remain valid,
+    and is closed by a later release() once they are gone.
+    """
+
+    def __init__(self, arrays: dict, directory=None):
+        self.layout = {}
+        self.owner = True
+        arrays = {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+
+        if directory is None:
+            offset = 0
+            for name, values in arrays.items():
+                offset = -(-offset // 64) * 64  # keep each array 64-byte aligned
+                self.layout[name] = (offset, values.shape, values.dtype.str)
+                offset += values.nbytes
+            self._block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+            self.name = self._block.name
+            self.directory = None
+            self._temporary = False
+            _PUBLISHED[self.name] = self._block
+            for name, values in arrays.items():
+                self._view(name, writeable=True)[...] = values
+        else:
+            self._block = None
+            self.name = None
+            self._temporary = directory is True
+            self.directory = Path(tempfile.mkdtemp(prefix="calipyr-shared-") if directory is True else directory)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for name, values in arrays.items():
+                np.save(self.directory / f"{name}.npy", values)
+                self.layout[name] = (0, values.shape, values.dtype.str)
+
+    def __getstate__(self):
+        return {"layout": self.layout, "name": self.name, "directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.owner = False
+        key = self.name or str(self.directory)
+        if self.name in _PUBLISHED:
+            _ATTACHED.setdefault(key, _PUBLISHED[self.name])
+        elif key not in _ATTACHED:
+            if self.name is not None:
+                _ATTACHED[key] = _attach_block(self.name)
+            else:
+                _ATTACHED[key] = {name: np.load(self.directory / f"{name}.npy", mmap_mode="r")
+                                  for name in self.layout}
+        self._block = _ATTACHED[key] if self.name is not None else None
+
+    def _view(self, name: str, writeable: bool = False) -> np.ndarray:
+        offset, shape, dtype = self.layout[name]
+        # frombuffer holds a buffer export on the block, so it cannot be unmapped under a live view
+        count = int(np.prod(shape))
+        view = np.frombuffer(self._block.buf, dtype=np.dtype(dtype), count=count, offset=offset).reshape(shape)
+        view.flags.writeable = writeable
+        return view
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Read-only, zero-copy view of one array."""
+        if name not in self.layout:
+            raise KeyError(name)
+        if self.name is not None:
+            return self._view(name)
+        key = str(self.directory)
+        if key in _ATTACHED:
+            return _ATTACHED[key][name]
+        return np.load(self.directory / f"{name}.npy", mmap_mode="r")
+
+    def __contains__(self, name):
+        return name in self.layout
+
+    def release(self):
+        """Free the published data; only the publishing process may call this."""
+        if not self.owner:
+            raise RuntimeError("Only the process that published the arrays can release them")
+        if self._block is not None:
+            _PUBLISHED.pop(self.name, None)
+            _ATTACHED.pop(self.name, None)
+            block, self._block = self._block, None
+            block.unlink()
+            _LINGERING.append(block)
+            _close_lingering()
+            if block in _LINGERING:
+                warnings.warn(f"Shared arrays {self.name} released while views of them are alive; the block "
+                              "stays mapped until they are gone", RuntimeWarning, stacklevel=2)
+        elif self.directory is not None:
+            _ATTACHED.pop(str(self.directory), None)
+            if self._temporary:
+                shutil.rmtree(self.directory, ignore_errors=True)
+            else:
+                for name in self.layout:
+                    (self.directory / f"{name}.npy").unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,196 @@
+# calipyr/calibration/surrogate.py
+"""
+Surrogate-assisted calibration: search an emulator, confirm with real runs.
+
+CurveEmulator interpolates the simulated p', q and e curves of every test
+(CalibrationObjective.simulated_curves) over the parameter box with a
+radial basis function fit to their principal components. The search starts
+from a Latin hypercube of real runs; each round then
+
+1. fits the emulator to every real run so far,
+2. minimises the emulated objective with a vectorized differential evolution,
+3. simulates the emulator's optimum plus a few points around it for real
+   (skipping any already simulated, e.g. when clipped onto a bound),
+4. compares the emulated and real objective there,
+
+and stops once the emulator's error and the improvement of the best real
+objective both drop below tol. The result always comes from a real run.
+"""
+
+import numpy as np
+
+from calipyr.calibration.objective import FAILED_RESIDUAL
+
+N_INITIAL_PER_PARAM = 8
+N_REFINE = 4
+MAX_ROUNDS = 15
+TOL = 0.02
+# Half-width of the refinement box around the emulator's optimum, in unit parameter space
+START_RADIUS = 0.2
+MIN_RADIUS = 0.01
+# Share of output variance the emulator's principal components keep
+EXPLAINED_VARIANCE = 1 - 1e-10
+# Candidates closer than this (max norm, unit parameter space) to a run are not re-simulated
+DUPLICATE_TOL = 1e-9
+
+
+class CurveEmulator:
+    """
+    RBF emulator mapping parameter vectors within limits to flattened curve
+    arrays, fitted to the leading principal components of the training
+    outputs. Parameters are scaled to the unit box before interpolation.
+    """
+
+    def __init__(self, limits, kernel: str = "thin_plate_spline", smoothing: float = 0.0):
+        self.low, self.high = np.transpose(np.asarray(limits, dtype=float))
+        self.kernel = kernel
+        self.smoothing = smoothing
+        self.interpolator = None
+
+    def unit(self, x) -> np.ndarray:
+        return (np.atleast_2d(x) - self.low) / (self.high - self.low)
+
+    def fit(self, x, outputs) -> "CurveEmulator":
+        """Fit to parameter vectors x, shape (runs, d), and outputs, shape (runs, m)."""
+        from scipy.interpolate import RBFInterpolator
+
+        outputs = np.asarray(outputs, dtype=float)
+        self.mean = outputs.mean(axis=0)
+        _, singular, components = np.linalg.svd(outputs - self.mean, full_matrices=False)
+        explained = np.cumsum(singular ** 2) / max(np.sum(singular ** 2), np.finfo(float).tiny)
+        rank = int(np.searchsorted(explained, EXPLAINED_VARIANCE) + 1)
+        self.components = components[:rank]
+        scores = (outputs - self.mean) @ self.components.T
+        self.interpolator = RBFInterpolator(self.unit(x), scores, kernel=self.kernel, smoothing=self.smoothing)
+        return self
+
+    def predict(self, x) -> np.ndarray:
+        """Emulated outputs for parameter vectors x, shape (points, m)."""
+        return self.interpolator(self.unit(x)) @ self.components + self.mean
+
+
+def _training_curves(objective, curves: np.ndarray) -> np.ndarray:
+    """
+    Curves with non-finite values replaced by the value that gives
+    FAILED_RESIDUAL, so the emulator learns failed runs as poor fits.
+    """
+    failed = objective.measured + FAILED_RESIDUAL / objective.factors
+    return np.where(np.isfinite(curves), curves, failed)
+
+
+def _latin_hypercube(d: int, n: int, rng) -> np.ndarray:
+    """n points of a Latin hypercube in the unit box of dimension d."""
+    from scipy.stats import qmc
+
+    return qmc.LatinHypercube(d, seed=rng).random(n)
+
+
+def _distinct(candidates: np.ndarray, existing: np.ndarray, tol: float = DUPLICATE_TOL) -> np.ndarray:
+    """
+    Mask of the candidates (unit box, shape (n, d)) farther than tol from every
+    existing point and every earlier candidate. Clipping to the box can land
+    several on the same corner, and a repeated point makes the RBF system singular.
+    """
+    keep = np.zeros(len(candidates), dtype=bool)
+    for i, point in enumerate(candidates):
+        previous = np.vstack([existing, candidates[:i][keep[:i]]])
+        keep[i] = not np.any(np.max(np.abs(previous - point), axis=1) <= tol)
+    return keep
+
+
+def surrogate_minimize(
+    objective,
+    limits,
+    map_fn=map,
+    x0=None,
+    n_initial: int | None = None,
+    n_refine: int = N_REFINE,
+    maxiter: int = MAX_ROUNDS,
+    tol: float = TOL,
+    seed: int | None = 0,
+    **de_options,
+):
+    """
+    Minimise a CalibrationObjective within limits ([(low, high)] per
+    parameter) with emulator rounds as described in the module docstring.
+
+    map_fn evaluates objective.simulated_curves over parameter vectors (map
+    or a process pool's map). n_initial real runs seed the emulator (default
+    N_INITIAL_PER_PARAM per parameter, plus x0 if given); each of up to
+    maxiter rounds adds n_refine. de_options go to the differential evolution
+    on the emulator.
+
+    Returns a scipy OptimizeResult whose x and fun are the best real run;
+    nfev counts real parameter sets simulated and history holds, per round,
+    the emulated and real objective of the emulator's optimum.
+    """
+    from scipy import optimize
+
+    low, high = np.transpose(np.asarray(limits, dtype=float))
+    d = len(low)
+    rng = np.random.default_rng(seed)
+    n_initial = N_INITIAL_PER_PARAM * d if n_initial is None else n_initial
+
+    x_runs = low + _latin_hypercube(d, n_initial, rng) * (high - low)
+    if x0 is not None:
+        x_runs = np.vstack([np.clip(x0, low, high), x_runs])
+    curves = np.array(list(map_fn(objective.simulated_curves, list(x_runs))))
+    values = np.mean(objective.curve_residuals(curves).reshape(len(curves), -1) ** 2, axis=1)
+    outputs = _training_curves(objective, curves).reshape(len(curves), -1)
+
+    emulator = CurveEmulator(limits)
+    shape = objective.measured.shape
+
+    def emulated(unit_x):
+        """Emulated objective of a (d, S) population in the unit box, as differential_evolution passes it."""
+        predicted = emulator.predict(low + unit_x.T * (high - low)).reshape((-1,) + shape)
+        return np.mean(objective.curve_residuals(predicted).reshape(len(predicted), -1) ** 2, axis=1)
+
+    de_options = {"popsize": 20, "tol": 1e-8, "maxiter": 300, "polish": False, **de_options}
+    history = []
+    radius = START_RADIUS
+    converged = False
+    for round_index in range(maxiter):
+        emulator.fit(x_runs, outputs)
+        search = optimize.differential_evolution(
+            emulated, [(0.0, 1.0)] * d, vectorized=True, updating="deferred", seed=rng, **de_options
+        )
+        best_unit = np.asarray(search.x)
+
+        around = best_unit + (2 * _latin_hypercube(d, n_refine - 1, rng) - 1) * radius if n_refine > 1 else []
+        new_unit = np.clip(np.vstack([best_unit, *around]), 0.0, 1.0)
+        run_units = (x_runs - low) / (high - low)
+        keep = _distinct(new_unit, run_units)
+        # Real objective at the emulator's optimum, from the earlier run there if it was already simulated
+        best_real = None if keep[0] else values[np.argmin(np.max(np.abs(run_units - best_unit), axis=1))]
+
+        previous_best = values.min()
+        if keep.any():
+            new_x = low + new_unit[keep] * (high - low)
+            new_curves = np.array(list(map_fn(objective.simulated_curves, list(new_x))))
+            new_values = np.mean(objective.curve_residuals(new_curves).reshape(len(new_curves), -1) ** 2, axis=1)
+            x_runs = np.vstack([x_runs, new_x])
+            values = np.concatenate([values, new_values])
+            outputs = np.vstack([outputs, _training_curves(objective, new_curves).reshape(len(new_curves), -1)])
+            best_real = new_values[0] if keep[0] else best_real
+
+        error = abs(search.fun - best_real) / max(best_real, np.finfo(float).tiny)
+        improvement = (previous_best - values.min()) / max(previous_best, np.finfo(float).tiny)
+        history.append({"round": round_index, "emulated": float(search.fun), "real": float(best_real),
+                        "error": float(error), "best": float(values.min()), "runs": len(values)})
+        if error < tol and improvement < tol:
+            converged = True
+            break
+        radius = max(radius / 2, MIN_RADIUS) if best_real <= previous_best else min(radius * 2, 0.5)
+
+    best = int(np.argmin(values))
+    return optimize.OptimizeResult(
+        x=x_runs[best],
+        fun=float(values[best]),
+        success=converged,
+        message="Emulator agrees with real runs" if converged else "Maximum number of rounds reached",
+        nfev=len(values),
+        nit=len(history),
+        history=history,
+        emulator=emulator,
+    )
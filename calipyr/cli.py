@@ -0,0 +1,250 @@
+# calipyr/cli.py
+"""
+Command-line entry point: `calipyr <command> [options]`.
+
+Commands:
+    import     bring the triaxial store up to date with the Excel files under a data root
+    process    resample stored shear curves and fit each material's critical state line
+    simulate   run one NorSand triaxial simulation and write its results as CSV
+    calibrate  fit NorSand parameters to each material's tests
+    report     render the per-material report figures
+
+Every command takes --cache-dir (default $CALIPYR_CACHE_DIR or ./_cache) and
+--jobs (worker processes; 0 uses every core). The triaxial store lives in
+<cache-dir>/triaxials and calibration runs are cached in <cache-dir>/simulations.
+Heavy dependencies are imported inside the command that needs them.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+CACHE_ENV = "CALIPYR_CACHE_DIR"
+DEFAULT_CACHE_DIR = Path("_cache")
+STORE_SUBDIR = "triaxials"
+SIMULATION_SUBDIR = "simulations"
+
+
+def _jobs(value: int) -> int | None:
+    """--jobs value as a worker count: 0 means every core (None)."""
+    return None if value == 0 else value
+
+
+def _store_dir(args) -> Path:
+    return args.cache_dir / STORE_SUBDIR
+
+
+def _open_store(args):
+    from calipyr.triaxial.store import MANIFEST_NAME, TriaxialStore
+
+    store_dir = _store_dir(args)
+    if not (store_dir / MANIFEST_NAME).exists():
+        raise SystemExit(f"No triaxial store at {store_dir}; run `calipyr import` first")
+    return TriaxialStore(store_dir)
+
+
+def _select(data, materials):
+    """The materials of data named in materials (all of them when empty)."""
+    if not materials:
+        return {material: data[material] for material in data}
+    missing = [material for material in materials if material not in data]
+    if missing:
+        raise SystemExit(f"Unknown material(s): {', '.join(missing)}")
+    return {material: data[material] for material in materials}
+
+
+def _parse_value(text: str):
+    """A --set value as JSON where possible (numbers, true/false), else the raw string."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def _params(args) -> dict:
+    """config.params updated from --params (a JSON file) and then --set KEY=VALUE pairs."""
+    from Norsand_Sim.config import params as default_params
+
+    params = dict(default_params)
+    if args.params is not None:
+        params.update(json.loads(args.params.read_text()))
+    for item in args.set:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--set expects KEY=VALUE, got {item!r}")
+        params[key] = _parse_value(value)
+    return params
+
+
+def cmd_import(args) -> int:
+    from calipyr.triaxial.importer import import_incremental
+    from calipyr.triaxial.store import TriaxialStore
+
+    if not args.data_root.is_dir():
+        raise SystemExit(f"Data root not found: {args.data_root}")
+    store = TriaxialStore(_store_dir(args))
+    summary = import_incremental(args.data_root, store, args.hash, _jobs(args.jobs), args.engine)
+    print(
+        f"Files added: {len(summary['added'])}, updated: {len(summary['updated'])}, "
+        f"removed: {len(summary['removed'])}, unchanged: {summary['unchanged']}, failed: {len(summary['failed'])}"
+    )
+
+    if args.preview is not None:
+        args.preview.mkdir(parents=True, exist_ok=True)
+        for material, test_id in summary["tests"]:
+            for phase, df in store[material][test_id].items():
+                df.to_csv(args.preview / f"{test_id}_{phase}.csv", index=False)
+    print(f"{sum(len(tests) for tests in store.manifest['tests'].values())} tests in {store.root}")
+    return 0
+
+
+def cmd_process(args) -> int:
+    from calipyr.calibration.critical_state import estimate_all
+    from calipyr.calibration.experiments import RESAMPLE_POINTS, resample_archive
+
+    store = _open_store(args)
+    points = args.points or RESAMPLE_POINTS
+    resampled = resample_archive(store, points)
+    print(f"{resampled} tests ready on the {points}-point calibration strain grid")
+
+    csl = {}
+    for material, result in estimate_all(store, n_resamples=args.resamples, points=points).items():
+        states = result.pop("end_states")
+        result["end_states"] = {key: list(map(str, values)) if key == "test_id" else values.tolist()
+                                for key, values in states.items()}
+        csl[material] = result
+        low_high = result["intervals"]
+        print(f"{material}: " + ", ".join(
+            f"{name}={result[name]:.4g} [{low_high[name][0]:.4g}, {low_high[name][1]:.4g}]" for name in low_high))
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(csl, indent=1))
+    print(f"Critical state lines written to {args.output}")
+    return 0
+
+
+def cmd_simulate(args) -> int:
+    from Norsand_Sim import kernel
+    from Norsand_Sim.simulation import NorSandTriaxialSimulation
+
+    if args.jit and not kernel.HAVE_NUMBA:
+        raise SystemExit("--jit requires numba (pip install numba)")
+    params = _params(args)
+    if args.undrained is not None:
+        params["undrained"] = args.undrained
+    df = NorSandTriaxialSimulation(params).run(output="frame", jit=args.jit)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(args.output, index=False)
+    print(f"{len(df)} steps written to {args.output}")
+    return 0
+
+
+def cmd_calibrate(args) -> int:
+    from calipyr.calibration.cache import SimulationCache
+    from calipyr.calibration.experiments import RESAMPLE_POINTS
+    from calipyr.calibration.fit import DEFAULT_BOUNDS, calibrate
+    from calipyr.triaxial.index import ArchiveIndex
+
+    store = _open_store(args)
+    selection = ArchiveIndex.from_store(store).select(
+        material=args.material or None, test_type=args.test_type or None,
+        confining_pressure=args.pressure or None, phase="Shear",
+    )
+    if not len(selection):
+        raise SystemExit("No Shear phases match the selection")
+    base_params = _params(args)
+    cache = SimulationCache(cache_dir=args.cache_dir / SIMULATION_SUBDIR)
+    options = {}
+    if args.maxiter is not None:
+        # differential_evolution and the surrogate search take maxiter directly,
+        # scipy.optimize.minimize methods through their options dict
+        direct = args.method in ("differential_evolution", "surrogate")
+        options = {"maxiter": args.maxiter} if direct else {"options": {"maxiter": args.maxiter}}
+
+    fitted = {}
+    for material, tests in selection.tests().items():
+        print(f"Calibrating material: {material} ({len(tests)} tests)")
+        result = calibrate(tests, base_params=base_params, method=args.method, workers=_jobs(args.jobs),
+                           cache=cache, points=args.points or RESAMPLE_POINTS, **options)
+        fitted[material] = {"params": result.params, "objective": float(result.fun), "tests": result.test_ids}
+        print(f"  objective {result.fun:.6g}: " + ", ".join(f"{k}={result.params[k]:.4g}" for k in DEFAULT_BOUNDS))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(fitted, indent=1))
+    print(f"Fitted parameters written to {args.output}")
+    return 0
+
+
+def cmd_report(args) -> int:
+    from calipyr.triaxial.report import render_report
+
+    store = _open_store(args)
+    written = render_report(_select(store, args.material), args.out, args.formats, workers=_jobs(args.jobs))
+    for material, paths in written.items():
+        print(f"{material}: {len(paths)} files written to {Path(paths[0]).parent}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--cache-dir", type=Path, default=Path(os.environ.get(CACHE_ENV, DEFAULT_CACHE_DIR)),
+                        help=f"store and simulation cache root (default ${CACHE_ENV} or ./{DEFAULT_CACHE_DIR})")
+    common.add_argument("--jobs", type=int, default=1, help="worker processes; 0 uses every core (default 1)")
+
+    parser = argparse.ArgumentParser(prog="calipyr", description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    sub = commands.add_parser("import", parents=[common], help="import new or changed Excel workbooks")
+    sub.add_argument("data_root", type=Path, nargs="?", default=Path("data"),
+                     help="folder of per-material subfolders of .xlsx files (default ./data)")
+    sub.add_argument("--engine", choices=("stream", "pandas"), default="stream")
+    sub.add_argument("--hash", action="store_true", help="compare file contents, not just mtime and size")
+    sub.add_argument("--preview", type=Path, default=None, help="also write each re-parsed phase as CSV here")
+    sub.set_defaults(func=cmd_import)
+
+    points = argparse.ArgumentParser(add_help=False)
+    points.add_argument("--points", type=int, default=None, help="points on the calibration strain grid (default 200)")
+
+    sub = commands.add_parser("process", parents=[common, points], help="resample shear curves and fit the CSL")
+    sub.add_argument("--resamples", type=int, default=5000, help="bootstrap resamples for the CSL intervals")
+    sub.add_argument("-o", "--output", type=Path, default=Path("critical_state.json"))
+    sub.set_defaults(func=cmd_process)
+
+    params = argparse.ArgumentParser(add_help=False)
+    params.add_argument("--params", type=Path, default=None, help="JSON file of NorSand parameters")
+    params.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="override one parameter")
+
+    sub = commands.add_parser("simulate", parents=[common, params], help="run one NorSand triaxial simulation")
+    drainage = sub.add_mutually_exclusive_group()
+    drainage.add_argument("--undrained", action="store_true", default=None)
+    drainage.add_argument("--drained", dest="undrained", action="store_false")
+    sub.add_argument("--jit", action="store_true", default=None, help="require the compiled kernel")
+    sub.add_argument("-o", "--output", type=Path, default=Path("norsand_results.csv"))
+    sub.set_defaults(func=cmd_simulate)
+
+    sub = commands.add_parser("calibrate", parents=[common, points, params], help="fit NorSand parameters")
+    sub.add_argument("--material", action="append", default=[], help="calibrate only this material (repeatable)")
+    sub.add_argument("--test-type", action="append", default=[], help="use only tests of this type, e.g. CIU")
+    sub.add_argument("--pressure", action="append", type=float, default=[],
+                     help="use only tests at this confining pressure in kPa (repeatable)")
+    sub.add_argument("--method", default="differential_evolution")
+    sub.add_argument("--maxiter", type=int, default=None, help="iteration (or surrogate round) limit")
+    sub.add_argument("-o", "--output", type=Path, default=Path("calibration.json"))
+    sub.set_defaults(func=cmd_calibrate)
+
+    sub = commands.add_parser("report", parents=[common], help="render the report figures")
+    sub.add_argument("--material", action="append", default=[], help="render only this material (repeatable)")
+    sub.add_argument("--out", type=Path, default=Path("_figures"))
+    sub.add_argument("--formats", nargs="+", default=["png", "svg"])
+    sub.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
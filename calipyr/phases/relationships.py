@@ -1,31 +1,104 @@
 # calipyr/phases/relationships.py
 
+"""
+Phase relationships for soils.
+
+Every function works elementwise on scalars, NumPy arrays and pandas Series
+(and broadcasts between them). Where a denominator is zero, such as n = 1 or
+e = 0, the result is NaN for that element instead of an error or inf. Series
+inputs give Series outputs with the same index.
+
+Symbols: e void ratio, n porosity, w water content, Sr degree of saturation,
+Gs specific gravity, rho_w water density, gamma_w unit weight of water.
+"""
+
+import numpy as np
+
+RHO_W = 1000.0  # kg/m³
+GAMMA_W = 9.81  # kN/m³
+
+
+def _nonzero(x):
+    """x with zeros replaced by NaN, keeping pandas objects as pandas objects."""
+    if hasattr(x, "where"):
+        return x.where(x != 0)
+    x = np.asarray(x, dtype=float)
+    return np.where(x == 0, np.nan, x)
+
+
 def void_ratio_from_porosity(n):
     """Convert porosity (n) to void ratio (e)"""
-    return n / (1 - n)
+    return n / _nonzero(1 - n)
 
 
 def porosity_from_void_ratio(e):
     """Convert void ratio (e) to porosity (n)"""
-    return e / (1 + e)
+    return e / _nonzero(1 + e)
 
 
 def degree_of_saturation(w, Gs, e):
     """Compute degree of saturation Sr from water content (w), specific gravity (Gs), and void ratio (e)"""
-    return (w * Gs) / e
+    return (w * Gs) / _nonzero(e)
+
+
+def water_content(Sr, Gs, e):
+    """Water content (w) from degree of saturation (Sr), specific gravity (Gs) and void ratio (e)"""
+    return Sr * e / _nonzero(Gs)
+
 
+def void_ratio_from_saturation(w, Gs, Sr):
+    """Void ratio (e) from water content (w), specific gravity (Gs) and degree of saturation (Sr)"""
+    return w * Gs / _nonzero(Sr)
 
-def dry_density(Gs, e, rho_w=1000):
+
+def dry_density(Gs, e, rho_w=RHO_W):
     """Calculate dry density (ρ_dry) from specific gravity (Gs), void ratio (e), and unit water density (rho_w)"""
-    return (Gs * rho_w) / (1 + e)
+    return (Gs * rho_w) / _nonzero(1 + e)
+
+
+def bulk_density(Gs, e, Sr, rho_w=RHO_W):
+    """Bulk density (ρ) from specific gravity (Gs), void ratio (e) and degree of saturation (Sr)"""
+    return (Gs + Sr * e) * rho_w / _nonzero(1 + e)
 
 
-# Add more as needed...
+def dry_unit_weight(Gs, e, gamma_w=GAMMA_W):
+    """Dry unit weight (γ_d) from specific gravity (Gs) and void ratio (e)"""
+    return Gs * gamma_w / _nonzero(1 + e)
+
+
+def bulk_unit_weight(Gs, e, Sr, gamma_w=GAMMA_W):
+    """Bulk unit weight (γ) from specific gravity (Gs), void ratio (e) and degree of saturation (Sr)"""
+    return (Gs + Sr * e) * gamma_w / _nonzero(1 + e)
+
+
+def saturated_unit_weight(Gs, e, gamma_w=GAMMA_W):
+    """Saturated unit weight (γ_sat), i.e. bulk unit weight at Sr = 1"""
+    return (Gs + e) * gamma_w / _nonzero(1 + e)
+
+
+def submerged_unit_weight(Gs, e, gamma_w=GAMMA_W):
+    """Submerged (buoyant) unit weight γ' = γ_sat - γ_w"""
+    return saturated_unit_weight(Gs, e, gamma_w) - gamma_w
+
+
+def relative_density(e, e_min, e_max):
+    """Relative density Dr = (e_max - e) / (e_max - e_min), as a fraction"""
+    return (e_max - e) / _nonzero(e_max - e_min)
+
+
+def void_ratio_from_relative_density(Dr, e_min, e_max):
+    """Void ratio (e) at relative density Dr (fraction) between e_min and e_max"""
+    return e_max - Dr * (e_max - e_min)
+
+
+def void_ratio_from_volumetric_strain(e0, eps_v):
+    """
+    Void ratio after volumetric strain eps_v (fraction, compression positive)
+    from initial void ratio e0: e = e0 - (1 + e0) * eps_v
+    """
+    return e0 - (1 + e0) * eps_v
 
 
 # Example usage:
 # from calipyr.phases.relationships import void_ratio_from_porosity
-# e = void_ratio_from_porosity(0.4)
-# print(f"Void ratio is {e:.3f}")
-
-calipyr / tests / test_phases.py
+# e = void_ratio_from_porosity(np.array([0.3, 0.4, 1.0]))  # -> [0.4286, 0.6667, nan]
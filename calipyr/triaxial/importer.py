@@ -0,0 +1,468 @@
+# calipyr/triaxial/importer.py
+
+"""
+Import CIU, CID and DMIN CID triaxial data from Excel files with multiple sheets.
+
+Searches recursively in a data directory for Excel files (.xlsx), ignores
+metadata sheets, and loads valid triaxial test phases (Consolidation and Shear)
+into structured dictionaries for further processing.
+
+Author: Paul le Roux
+Date: 2025-06-04
+"""
+
+import datetime
+import functools
+import hashlib
+import itertools
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+from pathlib import Path
+
+from calipyr.calibration.experiments import test_keys
+from calipyr.triaxial.schema import canonicalize
+from calipyr.triaxial.store import TriaxialStore
+
+# Constants
+VALID_PHASES = ["Consolidation", "Shear"]
+IGNORE_SHEETS = {"Directory", "Sample Data"}
+VALID_EXT = ".xlsx"
+
+# Regex pattern for identifying test sheets, e.g. "TX1-CIU-150kPa-Consolidation"
+# Updated regex pattern: allows "Consol" or "Consolidation" or spacing issues
+SHEET_PATTERN = re.compile(
+    r"^(TX\d+)-(CIU|CID|DMIN-CID)-(\d+)kPa[-\s]+(Consol(idation)?|Shear)\s*$",
+    re.IGNORECASE
+)
+
+# A header row is the first of the first HEADER_SEARCH_ROWS rows mentioning one of these
+HEADER_KEYWORDS = ["axial", "stress", "strain", "time", "mean effective", "deviator"]
+HEADER_SEARCH_ROWS = 10
+
+# Streaming reader: rows converted to columns per chunk, and the cell types kept numeric
+STREAM_CHUNK_ROWS = 4096
+_NUMERIC_CELL_TYPES = {int, float, type(None)}
+
+
+def find_excel_files(root: Path) -> list[Path]:
+    """Recursively find all .xlsx files under the given root directory."""
+    return [p for p in root.rglob(f"*{VALID_EXT}") if p.is_file()]
+
+def is_header_row(values) -> bool:
+    """True if a row's non-empty cells mention one of the HEADER_KEYWORDS."""
+    joined = ",".join(str(x) for x in values if pd.notna(x)).lower()
+    return any(kw in joined for kw in HEADER_KEYWORDS)
+
+def find_header_row(rows) -> int | None:
+    """Index of the first header row among rows, or None."""
+    for idx, row in enumerate(rows):
+        if is_header_row(row):
+            return idx
+    return None
+
+def frame_from_rows(raw: pd.DataFrame, header_row_idx: int) -> pd.DataFrame:
+    """
+    Build the sheet DataFrame from a header=None read, using row header_row_idx
+    as the header. Gives the same columns and dtypes as xls.parse(sheet,
+    header=header_row_idx) without reading the sheet a second time.
+    """
+    rows = raw.astype(object).where(raw.notna(), "").values.tolist()
+    return TextParser(rows, header=header_row_idx).read()
+
+def read_sheet_pandas(xls: pd.ExcelFile, sheet: str) -> pd.DataFrame | None:
+    """Read a sheet through pandas, detecting the header row. None if there is no header."""
+    # Read the sheet once; the header row is found in the rows already read
+    raw = xls.parse(sheet, header=None)
+
+    header_row_idx = find_header_row(raw.head(HEADER_SEARCH_ROWS).itertuples(index=False))
+    if header_row_idx is None:
+        return None
+
+    return frame_from_rows(raw, header_row_idx)
+
+class _ColumnBuilder:
+    """
+    Accumulates one column as chunks of streamed cells. Chunks are stored as
+    float64 arrays while every cell is numeric or empty; at the first other
+    value the column falls back to an object array.
+    """
+
+    def __init__(self, missing: int = 0):
+        self.chunks = [np.full(missing, np.nan)] if missing else []
+        self.numeric = True
+        self.all_int = not missing
+
+    def extend(self, cells: np.ndarray):
+        if self.numeric:
+            kinds = set(map(type, cells))
+            if kinds <= _NUMERIC_CELL_TYPES:
+                self.chunks.append(cells.astype(np.float64))
+                self.all_int = self.all_int and kinds <= {int}
+                return
+            # First non-numeric cell: keep the column as Python objects from here on
+            self.numeric = False
+            self.chunks = [np.where(np.isnan(chunk), None, chunk.astype(object)) for chunk in self.chunks]
+        self.chunks.append(cells)
+
+    def finish(self, rows: int, allow_int: bool = True):
+        if not self.chunks:
+            return np.full(rows, np.nan)
+
+        values = np.concatenate(self.chunks)
+        if self.numeric:
+            return values.astype(np.int64) if self.all_int and allow_int else values
+
+        series = pd.Series(values, dtype=object)
+        non_null = series.dropna()
+        if len(non_null) and all(isinstance(x, (datetime.datetime, datetime.date)) for x in non_null):
+            return pd.to_datetime(series)
+        return series.where(series.notna(), np.nan)
+
+def _header_names(header) -> list:
+    """Column names from a header row: "Unnamed: i" for blanks, ".n" suffixes for duplicates."""
+    names = []
+    seen = {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None or value == "" else str(value)
+        base = name
+        while name in seen:
+            seen[base] += 1
+            name = f"{base}.{seen[base]}"
+        seen[name] = 0
+        names.append(name)
+    return names
+
+def _rows_to_block(rows: list) -> np.ndarray:
+    """Stack streamed rows into a 2D object array, padding short rows and blanking "" cells."""
+    width = max(len(row) for row in rows)
+    if any(len(row) != width for row in rows):
+        rows = [tuple(row) + (None,) * (width - len(row)) for row in rows]
+    block = np.empty((len(rows), width), dtype=object)
+    block[:] = rows
+    block[block == ""] = None
+    return block
+
+def read_sheet_streaming(worksheet, chunk_rows: int = STREAM_CHUNK_ROWS) -> pd.DataFrame | None:
+    """
+    Stream a read-only openpyxl worksheet into a DataFrame.
+
+    The header row is detected on the fly from the first HEADER_SEARCH_ROWS
+    rows with the same keyword rules as the pandas path. Rows are converted to
+    typed NumPy columns chunk_rows at a time as they arrive, so the sheet is
+    never held as an object model. Completely empty rows are skipped. Numeric
+    columns come back as float64 (int64 when every cell is an integer).
+    Returns None if no header row is found.
+    """
+    rows = worksheet.iter_rows(values_only=True)
+
+    header = None
+    for idx, row in enumerate(rows):
+        if idx >= HEADER_SEARCH_ROWS:
+            break
+        if is_header_row(row):
+            header = [None if value == "" else value for value in row]
+            break
+    if header is None:
+        return None
+
+    builders = [_ColumnBuilder() for _ in header]
+    width = max((i + 1 for i, value in enumerate(header) if value is not None), default=0)
+    index = []
+    position = kept = 0
+
+    for chunk in iter(lambda: list(itertools.islice(rows, chunk_rows)), []):
+        block = _rows_to_block(chunk)
+        nonempty = np.not_equal(block, None)
+        keep = nonempty.any(axis=1)
+        index.append(position + np.flatnonzero(keep))
+        position += len(chunk)
+        if not keep.any():
+            continue
+
+        block = block[keep]
+        width = max(width, int(np.flatnonzero(nonempty.any(axis=0))[-1]) + 1)
+        while len(builders) < block.shape[1]:
+            builders.append(_ColumnBuilder(missing=kept))
+            header.append(None)
+        for col, builder in enumerate(builders):
+            builder.extend(block[:, col] if col < block.shape[1] else np.full(len(block), None, dtype=object))
+        kept += len(block)
+
+    index = np.concatenate(index) if index else np.empty(0, dtype=np.int64)
+    # As with pandas, an empty row between data rows leaves integer columns as float64
+    allow_int = not len(index) or index[-1] == len(index) - 1
+    columns = [builder.finish(len(index), allow_int) for builder in builders[:width]]
+
+    df = pd.DataFrame(dict(enumerate(columns)), copy=False)
+    df.columns = _header_names(header[:width])
+    df.index = pd.Index(index, dtype=np.int64)
+    return df
+
+def load_test_sheets(filepath: Path, engine: str = "pandas") -> dict:
+    """
+    Load valid test sheets from an Excel file.
+
+    engine is "pandas" (pd.ExcelFile) or "stream" (openpyxl read-only
+    streaming via read_sheet_streaming, lower memory on large sheets).
+    Each phase carries the sheet's own columns plus the canonical role
+    columns added by calipyr.triaxial.schema.canonicalize.
+    Returns a nested dictionary:
+    {
+        'TX1-CIU-150kPa': {
+            'Consolidation': pd.DataFrame,
+            'Shear': pd.DataFrame
+        },
+        ...
+    }
+    """
+    if engine == "pandas":
+        workbook = pd.ExcelFile(filepath)
+        sheet_names = workbook.sheet_names
+        read_sheet = functools.partial(read_sheet_pandas, workbook)
+    elif engine == "stream":
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        sheet_names = workbook.sheetnames
+        read_sheet = lambda sheet: read_sheet_streaming(workbook[sheet])  # noqa: E731
+    else:
+        raise ValueError(f"Unknown engine: {engine!r} (expected 'pandas' or 'stream')")
+
+    test_data = {}
+    try:
+        for sheet in sheet_names:
+            if sheet in IGNORE_SHEETS:
+                continue
+
+            match = SHEET_PATTERN.match(sheet)
+            if not match:
+                print(f"Skipping unrecognised sheet: {sheet} in file: {filepath.name}")
+                continue
+
+            test_id = f"{match.group(1)}-{match.group(2)}-{match.group(3)}kPa"
+            raw_phase = match.group(4).strip().lower()
+
+            if raw_phase.startswith("consol"):
+                phase = "Consolidation"
+            elif raw_phase == "shear":
+                phase = "Shear"
+            else:
+                print(f"Unrecognised phase label: {raw_phase} in sheet: {sheet}")
+                continue
+
+            try:
+                df = read_sheet(sheet)
+
+                if df is None:
+                    print(f"  Could not detect header row in sheet {sheet} (file: {filepath.name})")
+                    continue
+
+                df.dropna(how='all', inplace=True)  # drop completely empty rows
+                canonicalize(df)  # add canonical p, q, e, eps_a, ... float64 columns
+                if test_id not in test_data:
+                    test_data[test_id] = {}
+                test_data[test_id][phase] = df
+            except Exception as e:
+                print(f"Error reading sheet {sheet} in {filepath.name}: {e}")
+    finally:
+        workbook.close()
+
+    return test_data
+
+def _load_or_error(file: Path, engine: str):
+    """load_test_sheets(file, engine), or the exception it raised."""
+    try:
+        return load_test_sheets(file, engine)
+    except Exception as exc:  # corrupt, truncated or locked workbooks
+        return exc
+
+def parse_workbooks(files: list[Path], jobs: int | None = 1, engine: str = "pandas", skip_errors: bool = False):
+    """
+    Yield (file, load_test_sheets(file, engine)) in the order of files. With
+    jobs != 1 the workbooks are parsed in a process pool (None uses every core).
+    With skip_errors, a workbook that fails to parse yields its exception
+    instead of raising, so the other files are still read.
+    """
+    load = functools.partial(_load_or_error if skip_errors else load_test_sheets, engine=engine)
+    if jobs == 1 or len(files) < 2:
+        for file in files:
+            yield file, load(file)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from zip(files, pool.map(load, files))
+
+def import_all_tests(data_root: Path, jobs: int | None = 1, engine: str = "pandas") -> dict:
+    """
+    Scan all Excel files and load valid triaxial test data.
+    jobs > 1 (or None for every core) parses workbooks in parallel processes;
+    engine selects the sheet reader (see load_test_sheets).
+    Returns a nested dictionary:
+    {
+        'Material Name': {
+            'TX1-CIU-150kPa': {
+                'Consolidation': pd.DataFrame,
+                'Shear': pd.DataFrame
+            },
+            ...
+        },
+        ...
+    }
+    """
+    results = {}
+
+    files = find_excel_files(data_root)
+    for file in files:
+        print(f"Processing file: {file.name} (Material: {file.parent.name})")
+
+    for file, test_sheets in parse_workbooks(files, jobs, engine):
+        material_name = file.parent.name
+        if material_name not in results:
+            results[material_name] = {}
+
+        results[material_name].update(test_sheets)
+
+    return results
+
+def file_fingerprint(path: Path, hash_contents: bool = False) -> dict:
+    """Modification time, size and (optionally) SHA-256 of a file."""
+    stat = path.stat()
+    fingerprint = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    if hash_contents:
+        fingerprint["sha256"] = _file_hash(path)
+    return fingerprint
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _is_unchanged(path: Path, previous: dict | None, current: dict, hash_contents: bool) -> bool:
+    """Same mtime and size, or (with hashing) same content despite a new mtime."""
+    if previous is None:
+        return False
+    if previous["mtime_ns"] == current["mtime_ns"] and previous["size"] == current["size"]:
+        return True
+    if hash_contents and previous.get("sha256") and previous["size"] == current["size"]:
+        current["sha256"] = _file_hash(path)
+        return current["sha256"] == previous["sha256"]
+    return False
+
+def _drop_source(store: TriaxialStore, source: str):
+    """Remove the tests a source file contributed, unless another file now owns them."""
+    record = store.sources.pop(source)
+    material = record["material"]
+    owned = [
+        test_id for test_id in record["tests"]
+        if store.manifest["tests"].get(material, {}).get(test_id, {}).get("source") == source
+    ]
+    store.remove_tests(material, owned, save=False)
+
+
+def _orphaned_tests(store: TriaxialStore) -> dict:
+    """
+    {source: [test_id]} for tests a tracked source lists but the store no
+    longer holds, because another file that also provided them was dropped.
+    """
+    orphaned = {}
+    for source, record in store.sources.items():
+        stored = store.manifest["tests"].get(record["material"], {})
+        missing = [test_id for test_id in record["tests"] if test_id not in stored]
+        if missing:
+            orphaned[source] = missing
+    return orphaned
+
+
+def import_incremental(
+    data_root: Path,
+    store: TriaxialStore,
+    hash_contents: bool = False,
+    jobs: int | None = 1,
+    engine: str = "pandas",
+) -> dict:
+    """
+    Bring a TriaxialStore up to date with the Excel files under data_root.
+
+    Each file's fingerprint (mtime, size and, with hash_contents, a SHA-256) is
+    kept in the store manifest. Only new or changed workbooks are parsed and
+    their tests rewritten; tests from deleted workbooks are dropped, unless
+    another tracked workbook also provides them, in which case they are
+    re-read from it. With
+    hash_contents, a file whose mtime changed but whose content did not is
+    not re-parsed. A workbook that fails to parse (corrupt or locked) is
+    reported under 'failed' and its previously stored tests and fingerprint
+    are kept, so it is retried on the next import. jobs and engine are passed
+    on to parse_workbooks, as in import_all_tests.
+
+    Returns a summary:
+    {
+        'added': [relative paths], 'updated': [...], 'removed': [...],
+        'failed': [...], 'unchanged': int, 'tests': [(material, test_id) written]
+    }
+    """
+    data_root = Path(data_root)
+    summary = {"added": [], "updated": [], "removed": [], "failed": [], "unchanged": 0, "tests": []}
+    seen = set()
+    changed = []
+
+    for file in find_excel_files(data_root):
+        source = file.relative_to(data_root).as_posix()
+        seen.add(source)
+        previous = store.sources.get(source)
+        fingerprint = file_fingerprint(file)
+
+        if _is_unchanged(file, previous, fingerprint, hash_contents):
+            previous["mtime_ns"] = fingerprint["mtime_ns"]
+            summary["unchanged"] += 1
+            continue
+
+        print(f"Processing file: {file.name} (Material: {file.parent.name})")
+        changed.append((file, source, fingerprint))
+
+    parsed = parse_workbooks([file for file, _, _ in changed], jobs, engine, skip_errors=True)
+    for (file, source, fingerprint), (_, test_sheets) in zip(changed, parsed):
+        material_name = file.parent.name
+        if isinstance(test_sheets, Exception):
+            # Keep the previous tests and fingerprint, so the file is retried next time
+            print(f"Skipping unreadable file: {source} ({type(test_sheets).__name__}: {test_sheets})")
+            summary["failed"].append(source)
+            continue
+        if source in store.sources:
+            _drop_source(store, source)
+            summary["updated"].append(source)
+        else:
+            summary["added"].append(source)
+
+        keys = {test_id: test_keys(test_id) for test_id in test_sheets}
+        store.write_tests(material_name, test_sheets, source=source, save=False, keys=keys)
+        if hash_contents and "sha256" not in fingerprint:
+            fingerprint["sha256"] = _file_hash(file)
+        store.sources[source] = {**fingerprint, "material": material_name, "tests": list(test_sheets)}
+        summary["tests"].extend((material_name, test_id) for test_id in test_sheets)
+
+    for source in sorted(set(store.sources) - seen):
+        print(f"Removing tests from deleted file: {source}")
+        _drop_source(store, source)
+        summary["removed"].append(source)
+
+    # Tests dropped with one workbook but still provided by another, unchanged one
+    orphaned = _orphaned_tests(store)
+    files = [data_root / source for source in orphaned]
+    for (source, missing), (_, test_sheets) in zip(orphaned.items(), parse_workbooks(files, jobs, engine, True)):
+        if isinstance(test_sheets, Exception):
+            print(f"Could not re-read tests from {source} ({type(test_sheets).__name__}: {test_sheets})")
+            summary["failed"].append(source)
+            continue
+        material_name = store.sources[source]["material"]
+        restored = {test_id: test_sheets[test_id] for test_id in missing if test_id in test_sheets}
+        keys = {test_id: test_keys(test_id) for test_id in restored}
+        store.write_tests(material_name, restored, source=source, save=False, keys=keys)
+        summary["tests"].extend((material_name, test_id) for test_id in restored)
+
+    store.save_manifest()
+    return summary
@@ -0,0 +1,124 @@
+# calipyr/triaxial/index.py
+
+"""
+Queryable index over a test archive, one record per phase of every test.
+
+Each record holds the material, test id, the keys parsed from it at import
+(TX number, test type, confining pressure; see experiments.test_keys), the
+phase, its source file and row count. For a TriaxialStore the index is read
+from the manifest alone, so building and filtering it touches no test data;
+tests() then opens only the phases that matched, as lazy store views.
+
+    index = ArchiveIndex.from_store(store)
+    ciu_300 = index.select(test_type="CIU", confining_pressure=300)
+    dmin_shear = index.select(test_type="DMIN-CID", phase="Shear")
+    calibrate(ciu_300.select(material="Sand A", phase="Shear").tests()["Sand A"])
+"""
+
+import numpy as np
+import pandas as pd
+
+from calipyr.calibration.experiments import TEST_KEYS, test_keys
+from calipyr.triaxial.store import TriaxialStore
+
+INDEX_FIELDS = ("material", "test_id", *TEST_KEYS, "phase", "source", "rows")
+
+
+class ArchiveIndex:
+    """
+    Columnar index records (one NumPy array per INDEX_FIELDS entry) over an
+    archive: a TriaxialStore or a nested {material: {test_id: {phase:
+    DataFrame}}} dict.
+    """
+
+    def __init__(self, columns: dict, data):
+        self.columns = columns
+        self.data = data
+
+    @classmethod
+    def from_records(cls, records: list, data) -> "ArchiveIndex":
+        columns = {field: [record[i] for record in records] for i, field in enumerate(INDEX_FIELDS)}
+        arrays = {field: np.array(values, dtype=object) for field, values in columns.items()}
+        arrays["confining_pressure"] = np.array(columns["confining_pressure"], dtype=np.float64)
+        arrays["rows"] = np.array(columns["rows"], dtype=np.int64)
+        return cls(arrays, data)
+
+    @classmethod
+    def from_store(cls, store: TriaxialStore) -> "ArchiveIndex":
+        """Index of a store from its manifest; stores written before keys were kept parse the test ids."""
+        records = []
+        for material, tests in store.manifest["tests"].items():
+            for test_id, entry in tests.items():
+                keys = entry.get("keys") or test_keys(test_id)
+                for phase, meta in entry["phases"].items():
+                    records.append((material, test_id, *(keys[key] for key in TEST_KEYS), phase,
+                                    entry.get("source"), meta["rows"]))
+        return cls.from_records(records, store)
+
+    @classmethod
+    def from_data(cls, data: dict) -> "ArchiveIndex":
+        """Index of an in-memory archive, as returned by import_all_tests."""
+        records = []
+        for material, tests in data.items():
+            for test_id, phases in tests.items():
+                keys = test_keys(test_id)
+                for phase, df in phases.items():
+                    records.append((material, test_id, *(keys[key] for key in TEST_KEYS), phase, None, len(df)))
+        return cls.from_records(records, data)
+
+    def __len__(self):
+        return len(self.columns["test_id"])
+
+    def select(self, pressure_range=None, min_rows=None, **filters) -> "ArchiveIndex":
+        """
+        Records matching every filter. Each keyword of INDEX_FIELDS takes a
+        value or a list/tuple/set of accepted values (test_type is matched
+        case-insensitively); pressure_range is an inclusive (low, high)
+        confining pressure range and min_rows a minimum phase length.
+        """
+        unknown = set(filters) - set(INDEX_FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown index field(s): {sorted(unknown)} (expected some of {INDEX_FIELDS})")
+
+        mask = np.ones(len(self), dtype=bool)
+        for field, wanted in filters.items():
+            if wanted is None:
+                continue
+            values = wanted if isinstance(wanted, (list, tuple, set, frozenset)) else [wanted]
+            if field == "test_type":
+                values = [value.upper() for value in values]
+            mask &= np.isin(self.columns[field], list(values))
+        if pressure_range is not None:
+            low, high = pressure_range
+            mask &= (self.columns["confining_pressure"] >= low) & (self.columns["confining_pressure"] <= high)
+        if min_rows is not None:
+            mask &= self.columns["rows"] >= min_rows
+        return ArchiveIndex({field: values[mask] for field, values in self.columns.items()}, self.data)
+
+    def records(self) -> list[dict]:
+        """The index records as dicts."""
+        columns = [self.columns[field].tolist() for field in INDEX_FIELDS]
+        return [dict(zip(INDEX_FIELDS, values)) for values in zip(*columns)]
+
+    def frame(self):
+        """The index as a pandas DataFrame, for display."""
+        return pd.DataFrame(self.columns, columns=list(INDEX_FIELDS))
+
+    def tests(self) -> dict:
+        """
+        Matching phases as {material: {test_id: {phase: DataFrame}}}. For a
+        store each test is a lazy view of just its matching phases, read from
+        disk on access; in-memory archives return the frames themselves.
+        """
+        selected = {}
+        for material, test_id, phase in zip(self.columns["material"], self.columns["test_id"],
+                                            self.columns["phase"]):
+            selected.setdefault(material, {}).setdefault(test_id, []).append(phase)
+
+        if isinstance(self.data, TriaxialStore):
+            return {material: {test_id: self.data.view(material, test_id, phases)
+                               for test_id, phases in tests.items()}
+                    for material, tests in selected.items()}
+        return {material: {test_id: {phase: self.data[material][test_id][phase] for phase in phases}
+                           for test_id, phases in tests.items()}
+                for material, tests in selected.items()}
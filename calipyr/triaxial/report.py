@@ -0,0 +1,166 @@
+# calipyr/triaxial/report.py
+
+"""
+Headless figure rendering for imported triaxial tests.
+
+One pass over each material's Shear phases collects the arrays for every
+plot in PLOTS; figures are then drawn with matplotlib's Agg canvas (no
+pyplot, no display) and saved as PNG/SVG next to an .npz of the plotted
+arrays. Materials are rendered in parallel processes.
+
+Layout:
+    <out_dir>/<material>/<plot>.png / .svg
+    <out_dir>/<material>/plot_data.npz   (keys "<plot>/<test_id>/x" and ".../y")
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from calipyr.triaxial.schema import canonicalize
+from calipyr.triaxial.store import safe_name
+
+# Plot name -> axis setup; x and y name the derived arrays built in plot_arrays
+PLOTS = {
+    "stress_path": {
+        "x": "p", "y": "q",
+        "xlabel": "Mean effective stress, p' [kPa]", "ylabel": "Deviator stress, q [kPa]",
+        "title": "Stress paths", "xlim": (0, None), "ylim": (0, None),
+    },
+    "e_log_p": {
+        "x": "p", "y": "e",
+        "xlabel": "Mean effective stress, p' [kPa]", "ylabel": "Void ratio, e [–]",
+        "title": "State paths", "xscale": "log",
+    },
+    "stress_ratio": {
+        "x": "eps_a_percent", "y": "q_over_p",
+        "xlabel": "Axial strain [%]", "ylabel": "Stress ratio q / p'",
+        "title": "Stress ratio vs axial strain", "xlim": (0, None), "ylim": (0, 1.5),
+    },
+}
+FIGURE_FORMATS = ("png", "svg")
+DATA_FILE = "plot_data.npz"
+
+
+def _shear_series(df) -> dict:
+    """Derived arrays of one Shear phase, keyed by the names PLOTS refer to."""
+    if not all(role in df.columns for role in ("eps_a", "p", "q", "e")):
+        df = canonicalize(df.copy(deep=False))
+
+    series = {}
+    for role in ("p", "q", "e"):
+        if role in df.columns:
+            series[role] = df[role].to_numpy(dtype=np.float64)
+    if "eps_a" in df.columns:
+        series["eps_a_percent"] = df["eps_a"].to_numpy(dtype=np.float64) * 100
+    if "p" in series and "q" in series:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = series["q"] / series["p"]
+        series["q_over_p"] = np.where(np.isfinite(ratio), ratio, np.nan)
+    return series
+
+
+def plot_arrays(tests) -> dict:
+    """
+    {plot: {test_id: (x, y)}} for every plot in PLOTS, reading each test's
+    Shear phase once. Tests lacking a plot's columns are left out of it.
+    """
+    arrays = {plot: {} for plot in PLOTS}
+    for test_id, phases in tests.items():
+        if "Shear" not in phases:
+            print(f"  Skipping {test_id}: missing shear phase")
+            continue
+        series = _shear_series(phases["Shear"])
+        for plot, spec in PLOTS.items():
+            if spec["x"] in series and spec["y"] in series:
+                arrays[plot][test_id] = (series[spec["x"]], series[spec["y"]])
+            else:
+                print(f"  Skipping {test_id} in {plot}: missing {spec['x']} or {spec['y']}")
+    return arrays
+
+
+def draw_figure(plot: str, curves: dict, material: str):
+    """Agg-backed matplotlib Figure of one plot for one material."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    spec = PLOTS[plot]
+    fig = Figure(figsize=(6.4, 4.8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    for test_id, (x, y) in curves.items():
+        ax.plot(x, y, label=test_id)
+
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    ax.set_title(f"{spec['title']} – {material}")
+    if "xscale" in spec:
+        ax.set_xscale(spec["xscale"])
+    if "xlim" in spec:
+        ax.set_xlim(*spec["xlim"])
+    if "ylim" in spec:
+        ax.set_ylim(*spec["ylim"])
+    ax.grid(True, which="both" if spec.get("xscale") == "log" else "major")
+    if curves:
+        ax.legend()
+    fig.tight_layout()
+    return fig
+
+
+def render_material(task) -> list[str]:
+    """
+    Render every plot of one material and save its arrays. task is
+    (material, tests, out_dir, formats) so it can be mapped over a process
+    pool; returns the written paths.
+    """
+    material, tests, out_dir, formats = task
+    material_dir = Path(out_dir) / safe_name(material)
+    material_dir.mkdir(parents=True, exist_ok=True)
+
+    arrays = plot_arrays(tests)
+    written = []
+    for plot, curves in arrays.items():
+        fig = draw_figure(plot, curves, material)
+        for fmt in formats:
+            path = material_dir / f"{plot}.{fmt}"
+            fig.savefig(path, format=fmt)
+            written.append(str(path))
+
+    data_path = material_dir / DATA_FILE
+    np.savez_compressed(data_path, **{
+        f"{plot}/{test_id}/{axis}": values
+        for plot, curves in arrays.items()
+        for test_id, xy in curves.items()
+        for axis, values in zip("xy", xy)
+    })
+    written.append(str(data_path))
+    return written
+
+
+def render_report(data, out_dir: Path, formats=FIGURE_FORMATS, workers: int | None = 1) -> dict:
+    """
+    Render the figures of every material in data ({material: {test_id:
+    {phase: DataFrame}}} or a TriaxialStore) to out_dir. With workers != 1
+    materials are rendered in a process pool (None uses every core); store
+    views are sent to the workers, which read their own tests from disk.
+    Returns {material: [written paths]}.
+    """
+    tasks = [(material, data[material], str(out_dir), tuple(formats)) for material in data]
+    if workers == 1 or len(tasks) < 2:
+        results = map(render_material, tasks)
+        return {task[0]: paths for task, paths in zip(tasks, results)}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return {task[0]: paths for task, paths in zip(tasks, pool.map(render_material, tasks))}
+
+
+def load_plot_data(material_dir: Path) -> dict:
+    """Read a material's saved plot arrays back as {plot: {test_id: (x, y)}}."""
+    arrays = {}
+    with np.load(Path(material_dir) / DATA_FILE) as stored:
+        for key in stored.files:
+            plot, test_id, axis = key.rsplit("/", 2)
+            pair = arrays.setdefault(plot, {}).setdefault(test_id, [None, None])
+            pair["xy".index(axis)] = stored[key]
+    return {plot: {test_id: tuple(xy) for test_id, xy in curves.items()} for plot, curves in arrays.items()}
@@ -0,0 +1,123 @@
+# calipyr/triaxial/schema.py
+
+"""
+Resolve lab sheet headers to canonical column roles.
+
+Every phase DataFrame gets float64 columns with canonical names (see
+CANONICAL_COLUMNS) so downstream code never has to search headers again.
+Header-to-role resolution is cached per distinct header signature, so tests
+built from the same lab template resolve once.
+
+Canonical units: stresses and pore pressure in kPa, strains as fractions
+(m/m), time in the sheet's own unit.
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+CANONICAL_COLUMNS = ("time", "eps_a", "eps_v", "sigma1", "sigma3", "u", "p", "q", "e")
+
+# Rules per role, in priority order; each is a regex searched in the lower-cased header.
+# Roles are resolved in the order below and a header is only ever given one role.
+ROLE_RULES = {
+    "eps_a": [r"axial\s+strain(?!\s+rate)", r"[ɛε]\s*a\b"],
+    "eps_v": [r"vol(umetric|\.)?\s+strain(?!\s+rate)", r"[ɛε]\s*v\b"],
+    "sigma1": [r"σ\s*1", r"\bs1\b", r"sigma\s*1", r"major\s+principal"],
+    "sigma3": [r"σ\s*3", r"\bs3\b", r"sigma\s*3", r"minor\s+principal"],
+    "u": [r"\bpwp\b", r"pore\s*(water\s*)?pressure"],
+    "p": [r"mean\s+effective", r"^p'?\s*([(\[]|$)", r"mean\s+(normal\s+)?stress"],
+    "q": [r"deviator", r"^q\s*([(\[]|$)", r"(?<![/\w])q\b(?!\s*/)"],
+    "e": [r"void\s+ratio", r"^e\s*([(\[]|$)"],
+    "time": [r"\btime\b", r"elapsed"],
+}
+_COMPILED_RULES = {role: [re.compile(rule) for rule in rules] for role, rules in ROLE_RULES.items()}
+
+# Header hints mapping a role's values to canonical units
+_PERCENT = re.compile(r"%|percent")
+_MPA = re.compile(r"\bmpa\b")
+_STRAIN_ROLES = {"eps_a", "eps_v"}
+_STRESS_ROLES = {"sigma1", "sigma3", "u", "p", "q"}
+
+
+def _unit_scale(role: str, header: str) -> float:
+    if role in _STRAIN_ROLES and _PERCENT.search(header):
+        return 0.01
+    if role in _STRESS_ROLES and _MPA.search(header):
+        return 1000.0
+    return 1.0
+
+
+@lru_cache(maxsize=1024)
+def resolve_columns(headers: tuple) -> dict:
+    """
+    Map a header signature to {role: (header, scale)}.
+
+    A header already named after a role resolves to it unchanged; otherwise
+    ROLE_RULES are tried in order. Multiplying the column by scale gives the
+    canonical unit. Roles without a matching header are left out.
+    """
+    lowered = {header: str(header).strip().lower() for header in headers}
+    mapping = {}
+    taken = set()
+
+    for role in CANONICAL_COLUMNS:
+        if role in headers:
+            mapping[role] = (role, 1.0)
+            taken.add(role)
+
+    for role, patterns in _COMPILED_RULES.items():
+        if role in mapping:
+            continue
+        for pattern in patterns:
+            header = next(
+                (h for h in headers if h not in taken and h not in CANONICAL_COLUMNS and pattern.search(lowered[h])),
+                None,
+            )
+            if header is not None:
+                mapping[role] = (header, _unit_scale(role, lowered[header]))
+                taken.add(header)
+                break
+
+    return mapping
+
+
+def canonicalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add canonical float64 role columns to a phase DataFrame, in place, and return it.
+
+    Where a sheet has principal stresses but no p' or q, they are derived as
+    p' = (σ1' + 2σ3') / 3 and q = σ1' - σ3'. A frame that already carries its
+    canonical columns is returned untouched. A raw header that is itself a
+    role name (e.g. "q" or "time") is never overwritten: numeric columns are
+    only cast to float64, anything else (text, datetimes) is kept as read.
+    """
+    mapping = resolve_columns(tuple(df.columns))
+    if all(header == role and df[role].dtype == np.float64 for role, (header, _) in mapping.items()):
+        return df
+
+    for role in CANONICAL_COLUMNS:
+        if role not in mapping:
+            continue
+        header, scale = mapping[role]
+        if header == role:
+            if pd.api.types.is_numeric_dtype(df[role]) and not pd.api.types.is_bool_dtype(df[role]):
+                df[role] = df[role].to_numpy(dtype=np.float64, na_value=np.nan)
+            continue
+        values = pd.to_numeric(df[header], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        df[role] = values * scale if scale != 1.0 else values
+
+    if "sigma1" in mapping and "sigma3" in mapping:
+        if "p" not in mapping:
+            df["p"] = (df["sigma1"] + 2 * df["sigma3"]) / 3
+        if "q" not in mapping:
+            df["q"] = df["sigma1"] - df["sigma3"]
+
+    return df
+
+
+def roles(df: pd.DataFrame) -> list[str]:
+    """Canonical role columns present in a phase DataFrame."""
+    return [role for role in CANONICAL_COLUMNS if role in df.columns]
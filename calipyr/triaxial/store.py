@@ -0,0 +1,335 @@
+# calipyr/triaxial/store.py
+
+"""
+Per-test columnar store for imported triaxial data.
+
+Replaces the single pickle of {material: {test_id: {phase: DataFrame}}} with
+one file set per test phase plus a small JSON manifest. Numeric columns are
+kept as a column-major float64 .npy block that can be memory-mapped; any
+other columns go to a companion unicode .npy. Tests are read on demand, and
+writing one workbook's tests rewrites only their files and the manifest.
+
+Layout:
+    <root>/manifest.json
+    <root>/data/<material>/<test_id>/<phase>.npy
+    <root>/data/<material>/<test_id>/<phase>.text.npy   (only if needed)
+    <root>/data/<material>/<test_id>/<name>.derived.npy  (e.g. resampled curves)
+"""
+
+import json
+import os
+import pickle
+import re
+import shutil
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from calipyr.calibration.experiments import test_keys
+
+MANIFEST_NAME = "manifest.json"
+STORE_FORMAT = 1
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._ -]+")
+
+
+def safe_name(name: str) -> str:
+    """File-system safe version of a material, test or phase name, as used for store and report folders."""
+    return _UNSAFE_CHARS.sub("_", str(name)).strip() or "_"
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _restore_text(values: pd.Series, dtype: str) -> pd.Series:
+    """Cast a stored text column back to its original dtype where possible."""
+    if dtype.startswith("datetime64"):
+        return pd.to_datetime(values).astype(dtype)
+    try:
+        return values.astype(dtype)
+    except (TypeError, ValueError):
+        return values
+
+
+class TriaxialStore(Mapping):
+    """
+    Lazy, read-on-demand view of a stored test archive.
+
+    Behaves like the nested dict returned by import_all_tests: store[material]
+    [test_id][phase] loads that phase's DataFrame from disk. With mmap=True the
+    numeric columns are memory-mapped read-only instead of read into memory.
+    Loaded frames have string column names and a fresh RangeIndex.
+    """
+
+    def __init__(self, root: Path, mmap: bool = False):
+        self.root = Path(root)
+        self.mmap = mmap
+        manifest_path = self.root / MANIFEST_NAME
+        if manifest_path.exists():
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"format": STORE_FORMAT, "tests": {}}
+
+        if self.manifest.get("format") != STORE_FORMAT:
+            raise ValueError(f"Unsupported store format in {manifest_path}: {self.manifest.get('format')}")
+
+    # --- Mapping interface: materials ---
+
+    def __getitem__(self, material):
+        if material not in self.manifest["tests"]:
+            raise KeyError(material)
+        return _MaterialView(self, material)
+
+    def __iter__(self):
+        return iter(self.manifest["tests"])
+
+    def __len__(self):
+        return len(self.manifest["tests"])
+
+    # --- Reading ---
+
+    @property
+    def sources(self) -> dict:
+        """Fingerprints of imported source files, keyed by path relative to the data root."""
+        return self.manifest.setdefault("sources", {})
+
+    def entry(self, material: str, test_id: str) -> dict:
+        """Manifest entry of one test: source file and per-phase metadata."""
+        return self.manifest["tests"][material][test_id]
+
+    def view(self, material: str, test_id: str, phases=None) -> Mapping:
+        """
+        Lazy {phase: DataFrame} view of one test, as store[material][test_id];
+        with phases given, only those of the test's phases are exposed.
+        """
+        self.entry(material, test_id)  # KeyError for unknown tests
+        return _TestView(self, material, test_id, phases)
+
+    def load_phase(self, material: str, test_id: str, phase: str) -> pd.DataFrame:
+        """Read one phase of one test from disk."""
+        meta = self.entry(material, test_id)["phases"][phase]
+        numeric = np.load(self.root / meta["numeric_path"], mmap_mode="r" if self.mmap else None)
+        text = np.load(self.root / meta["text_path"]) if meta.get("text_path") else None
+
+        arrays = []
+        numeric_pos = text_pos = 0
+        for is_numeric, dtype in zip(meta["numeric"], meta["dtypes"]):
+            if is_numeric:
+                values = numeric[:, numeric_pos]
+                numeric_pos += 1
+                arrays.append(values if dtype == "float64" else values.astype(dtype))
+            else:
+                values = pd.Series(text[:, text_pos], dtype=object).replace("", np.nan)
+                text_pos += 1
+                arrays.append(_restore_text(values, dtype))
+
+        df = pd.DataFrame(dict(enumerate(arrays)), index=pd.RangeIndex(meta["rows"]), copy=False)
+        df.columns = meta["columns"]
+        return df
+
+    def to_dict(self) -> dict:
+        """Eagerly load the whole archive into the nested-dict layout."""
+        return {
+            material: {
+                test_id: dict(phases.items())
+                for test_id, phases in tests.items()
+            }
+            for material, tests in self.items()
+        }
+
+    def load_derived(self, material: str, test_id: str, name: str):
+        """
+        (array, meta) of a derived array stored with a test, such as its
+        resampled curves, or None if there is none.
+        """
+        meta = self.entry(material, test_id).get("derived", {}).get(name)
+        if meta is None:
+            return None
+        return np.load(self.root / meta["path"], mmap_mode="r" if self.mmap else None), meta
+
+    # --- Writing ---
+
+    def _test_dir(self, material: str, test_id: str) -> Path:
+        return Path("data") / safe_name(material) / safe_name(test_id)
+
+    def _write_phase(self, test_dir: Path, phase: str, df: pd.DataFrame) -> dict:
+        columns = [str(col) for col in df.columns]
+        numeric_mask = [_is_numeric(df.iloc[:, i]) for i in range(df.shape[1])]
+
+        numeric_block = np.asfortranarray(
+            np.column_stack([df.iloc[:, i].to_numpy(dtype=np.float64, na_value=np.nan)
+                             for i, is_num in enumerate(numeric_mask) if is_num])
+            if any(numeric_mask) else np.empty((len(df), 0))
+        )
+        numeric_path = test_dir / f"{safe_name(phase)}.npy"
+        np.save(self.root / numeric_path, numeric_block)
+
+        meta = {
+            "columns": columns,
+            "dtypes": [str(dtype) for dtype in df.dtypes],
+            "numeric": numeric_mask,
+            "rows": len(df),
+            "numeric_path": numeric_path.as_posix(),
+        }
+
+        text_cols = [i for i, is_num in enumerate(numeric_mask) if not is_num]
+        if text_cols:
+            text_block = np.column_stack([
+                df.iloc[:, i].astype(object).where(df.iloc[:, i].notna(), "").astype(str).to_numpy(dtype=str)
+                for i in text_cols
+            ])
+            text_path = test_dir / f"{safe_name(phase)}.text.npy"
+            np.save(self.root / text_path, text_block)
+            meta["text_path"] = text_path.as_posix()
+
+        return meta
+
+    def write_tests(
+        self, material: str, tests: dict, source: str | None = None, save: bool = True, keys: dict | None = None
+    ):
+        """
+        Store {test_id: {phase: DataFrame}} for one material, replacing any
+        existing entries for those tests. source records the originating file;
+        keys optionally maps test ids to their parsed TX number, test type and
+        confining pressure, kept for calipyr.triaxial.index.
+        """
+        material_entries = self.manifest["tests"].setdefault(material, {})
+        for test_id, phases in tests.items():
+            self._remove_files(material, test_id)
+            test_dir = self._test_dir(material, test_id)
+            (self.root / test_dir).mkdir(parents=True, exist_ok=True)
+            material_entries[test_id] = {
+                "source": source,
+                "phases": {phase: self._write_phase(test_dir, phase, df) for phase, df in phases.items()},
+            }
+            if keys is not None and test_id in keys:
+                material_entries[test_id]["keys"] = keys[test_id]
+        if save:
+            self.save_manifest()
+
+    def write_derived(self, material: str, test_id: str, name: str, array, save: bool = True, **meta):
+        """
+        Store a float64 array derived from one test next to its phases, with
+        JSON-serialisable meta. Rewriting or removing the test drops it.
+        """
+        path = self._test_dir(material, test_id) / f"{safe_name(name)}.derived.npy"
+        np.save(self.root / path, np.ascontiguousarray(array, dtype=np.float64))
+        self.entry(material, test_id).setdefault("derived", {})[name] = {"path": path.as_posix(), **meta}
+        if save:
+            self.save_manifest()
+
+    def remove_tests(self, material: str, test_ids, save: bool = True):
+        """Delete the stored files and manifest entries of the given tests."""
+        material_entries = self.manifest["tests"].get(material, {})
+        for test_id in list(test_ids):
+            self._remove_files(material, test_id)
+            material_entries.pop(test_id, None)
+        if not material_entries:
+            self.manifest["tests"].pop(material, None)
+        if save:
+            self.save_manifest()
+
+    def _remove_files(self, material: str, test_id: str):
+        test_dir = self.root / self._test_dir(material, test_id)
+        if test_dir.exists():
+            shutil.rmtree(test_dir)
+
+    def save_manifest(self):
+        """Atomically rewrite the manifest."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / f"{MANIFEST_NAME}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp_path, self.root / MANIFEST_NAME)
+
+
+class _MaterialView(Mapping):
+    """Tests of one material; values are lazy per-test phase views."""
+
+    def __init__(self, store: TriaxialStore, material: str):
+        self.store = store
+        self.material = material
+
+    def __getitem__(self, test_id):
+        if test_id not in self.store.manifest["tests"][self.material]:
+            raise KeyError(test_id)
+        return self.store.view(self.material, test_id)
+
+    def __contains__(self, test_id):
+        return test_id in self.store.manifest["tests"][self.material]
+
+    def __iter__(self):
+        return iter(self.store.manifest["tests"][self.material])
+
+    def __len__(self):
+        return len(self.store.manifest["tests"][self.material])
+
+
+class _TestView(Mapping):
+    """
+    Phases of one test; each DataFrame is read from disk when accessed.
+    With phases set, the view only exposes those of the test's phases.
+    """
+
+    def __init__(self, store: TriaxialStore, material: str, test_id: str, phases=None):
+        self.store = store
+        self.material = material
+        self.test_id = test_id
+        self.phases = None if phases is None else tuple(phases)
+
+    def _phases(self) -> dict:
+        stored = self.store.entry(self.material, self.test_id)["phases"]
+        if self.phases is None:
+            return stored
+        return {phase: stored[phase] for phase in self.phases if phase in stored}
+
+    def __getitem__(self, phase):
+        if phase not in self._phases():
+            raise KeyError(phase)
+        return self.store.load_phase(self.material, self.test_id, phase)
+
+    def __contains__(self, phase):
+        return phase in self._phases()  # without reading the phase from disk
+
+    def __iter__(self):
+        return iter(self._phases())
+
+    def __len__(self):
+        return len(self._phases())
+
+
+def write_archive(root: Path, imported_data: dict, sources: dict | None = None) -> TriaxialStore:
+    """Write a full {material: {test_id: {phase: DataFrame}}} archive to a store at root."""
+    store = TriaxialStore(root)
+    for material, tests in imported_data.items():
+        for test_id, phases in tests.items():
+            source = (sources or {}).get((material, test_id))
+            store.write_tests(material, {test_id: phases}, source=source, save=False,
+                              keys={test_id: test_keys(test_id)})
+    store.save_manifest()
+    return store
+
+
+def load_cached_triaxial_data(cache_path: Path, mmap: bool = False):
+    """
+    Load cached triaxial test data.
+
+    A store directory is opened lazily as a TriaxialStore; a legacy .pkl file
+    is unpickled in full.
+    """
+    cache_path = Path(cache_path)
+    if not cache_path.exists():
+        raise FileNotFoundError(f"Cached file not found: {cache_path}")
+
+    if cache_path.is_dir():
+        data = TriaxialStore(cache_path, mmap=mmap)
+    else:
+        with open(cache_path, "rb") as f:
+            data = pickle.load(f)
+
+    print(f"Loaded triaxial data from cache: {cache_path}")
+    return data
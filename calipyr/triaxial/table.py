@@ -0,0 +1,116 @@
+# calipyr/triaxial/table.py
+
+"""
+The imported archive as one long-format table.
+
+long_table stacks the canonical columns of every phase of every test into a
+single DataFrame, one row per reading, keyed by categorical material,
+test_id, tx, test_type and phase columns plus the confining pressure
+(calipyr.calibration.experiments.test_keys).
+add_derived then computes q/p', shear strain, dilatancy and state parameter
+for all tests at once with vectorized column and groupby operations.
+"""
+
+import numpy as np
+import pandas as pd
+
+from calipyr.calibration.experiments import TEST_KEYS, UNDRAINED_TYPES, test_keys
+from calipyr.triaxial.schema import CANONICAL_COLUMNS
+
+KEY_COLUMNS = ("material", "test_id", "tx", "test_type", "phase")
+# Rows with the same values of these belong to one phase of one test
+GROUP_COLUMNS = ["material", "test_id", "phase"]
+DERIVED_COLUMNS = ("q_over_p", "eps_q", "dilatancy", "psi")
+
+
+def _categorical(labels: list, lengths: np.ndarray) -> pd.Categorical:
+    """Categorical of each label repeated lengths times, categories in first-seen order."""
+    categories = list(dict.fromkeys(labels))
+    index = {label: code for code, label in enumerate(categories)}
+    codes = np.fromiter((index[label] for label in labels), dtype=np.int64, count=len(labels))
+    return pd.Categorical.from_codes(np.repeat(codes, lengths), categories=categories)
+
+
+def long_table(data, phases=None, columns=CANONICAL_COLUMNS) -> pd.DataFrame:
+    """
+    One DataFrame of every phase in data ({material: {test_id: {phase:
+    DataFrame}}} or a TriaxialStore), restricted to the given phases if set.
+
+    Columns are KEY_COLUMNS (categorical), confining_pressure, row (position
+    within the phase) and the canonical columns; a column a phase lacks is
+    NaN for its rows. Only the selected phases are read from a store.
+    """
+    keys = []
+    lengths = []
+    values = {column: [] for column in columns}
+    for material in data:
+        tests = data[material]
+        for test_id in tests:
+            test = tests[test_id]
+            for phase in test:
+                if phases is not None and phase not in phases:
+                    continue
+                df = test[phase]
+                for column in columns:
+                    if column in df.columns:
+                        values[column].append(df[column].to_numpy(dtype=np.float64, na_value=np.nan))
+                    else:
+                        values[column].append(np.full(len(df), np.nan))
+                parsed = test_keys(test_id)
+                keys.append((material, test_id, *(parsed[key] for key in TEST_KEYS), phase))
+                lengths.append(len(df))
+
+    lengths = np.asarray(lengths, dtype=np.int64)
+    materials, test_ids, txs, test_types, pressures, phase_names = map(list, zip(*keys)) if keys else ([],) * 6
+    table = {
+        "material": _categorical(materials, lengths),
+        "test_id": _categorical(test_ids, lengths),
+        "tx": _categorical(txs, lengths),
+        "test_type": _categorical(test_types, lengths),
+        "phase": _categorical(phase_names, lengths),
+        "confining_pressure": np.repeat(np.asarray(pressures, dtype=np.float64), lengths),
+        "row": np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths),
+    }
+    for column in columns:
+        table[column] = np.concatenate(values[column]) if values[column] else np.empty(0)
+    return pd.DataFrame(table)
+
+
+def add_derived(table: pd.DataFrame, csl: dict | None = None, pref: float = 100.0) -> pd.DataFrame:
+    """
+    Add DERIVED_COLUMNS to a long_table, in place, and return it.
+
+    q_over_p is q / p'; eps_q = eps_a - eps_v / 3 is the triaxial shear
+    strain, with eps_v taken as 0 where an undrained test has none;
+    dilatancy is D = d(eps_v) / d(eps_q) between consecutive readings of a
+    phase (NaN on its first reading). psi = e - (N - lambda * ln(p' / pref))
+    needs csl, either {"N", "lambda"} for every material or {material:
+    {"N", "lambda"}}; materials without a CSL get NaN.
+    """
+    p = table["p"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table["q_over_p"] = np.where(p != 0, table["q"].to_numpy() / p, np.nan)
+
+    undrained = table["test_type"].isin(UNDRAINED_TYPES).to_numpy()
+    eps_v = table["eps_v"].to_numpy()
+    eps_v = np.where(undrained & np.isnan(eps_v), 0.0, eps_v)
+    table["eps_q"] = table["eps_a"].to_numpy() - eps_v / 3
+
+    strains = pd.DataFrame({"eps_v": eps_v, "eps_q": table["eps_q"].to_numpy()}, index=table.index)
+    steps = strains.groupby([table[column] for column in GROUP_COLUMNS], observed=True, sort=False).diff()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dilatancy = steps["eps_v"].to_numpy() / steps["eps_q"].to_numpy()
+    table["dilatancy"] = np.where(np.isfinite(dilatancy), dilatancy, np.nan)
+
+    materials = table["material"].cat.categories
+    if csl is None:
+        line = np.full((len(materials), 2), np.nan)
+    elif {"N", "lambda"} <= set(csl):
+        line = np.tile([csl["N"], csl["lambda"]], (len(materials), 1))
+    else:
+        line = np.array([[csl[m]["N"], csl[m]["lambda"]] if m in csl else [np.nan, np.nan] for m in materials])
+    codes = table["material"].cat.codes.to_numpy()
+    n, lambda_ = line.reshape(-1, 2)[codes].T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table["psi"] = table["e"].to_numpy() - (n - lambda_ * np.log(p / pref))
+    return table
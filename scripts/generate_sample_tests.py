@@ -1,3 +1,8 @@
+import argparse
+import json
+
+import numpy as np
+import openpyxl
 import pandas as pd
 from pathlib import Path
 
@@ -52,7 +57,232 @@ def create_sample_excel(test_id: str, test_type: str, out_dir: Path):
     print(f"Created: {outfile.name}")
 
 
+# --- Large synthetic datasets for load testing and calibration checks ---
+
+MAX_SHEET_NAME = 31  # Excel's limit on sheet name length
+# Metadata lines written above a header row; none may contain a HEADER_KEYWORD
+METADATA_LINES = [
+    "Test data", "Project: CaliPyr synthetic", "Sample details", "Specimen: reconstituted",
+    "Operator: generator", "Membrane correction applied",
+]
+MAX_METADATA_DEPTH = len(METADATA_LINES)  # stays below the importer's HEADER_SEARCH_ROWS
+# Sheet-naming variants that SHEET_PATTERN accepts
+PHASE_LABELS = {
+    "Consolidation": ("Consolidation", "Consol", "consolidation", "CONSOL"),
+    "Shear": ("Shear", "shear", "SHEAR"),
+}
+PHASE_SEPARATORS = ("-", " ", " - ", "--")
+TEST_TYPES = ("CIU", "CID", "DMIN-CID")
+CONFINING_PRESSURES = (50, 100, 150, 200, 300, 400, 600, 800)
+E0_RANGE = (0.55, 0.85)
+# Ranges the per-material NorSand parameters are drawn from
+MATERIAL_RANGES = {
+    "N": (0.85, 1.05),
+    "lambda": (0.03, 0.08),
+    "Mc": (1.15, 1.45),
+    "chi": (0.2, 0.45),
+    "H0": (3.0, 8.0),
+    "HY": (5.0, 15.0),
+}
+SHEAR_STRAIN = 0.2
+
+
+def random_material(rng) -> dict:
+    """NorSand parameters of one synthetic material, drawn from MATERIAL_RANGES."""
+    return {name: float(rng.uniform(low, high)) for name, (low, high) in MATERIAL_RANGES.items()}
+
+
+def random_test_specs(rng, n_tests: int, first_tx: int = 1) -> list[dict]:
+    """Test type, confining pressure and initial void ratio of n_tests tests, numbered from first_tx."""
+    specs = []
+    for tx in range(first_tx, first_tx + n_tests):
+        test_type = str(rng.choice(TEST_TYPES))
+        pressure = int(rng.choice(CONFINING_PRESSURES))
+        specs.append({
+            "test_id": f"TX{tx}-{test_type}-{pressure}kPa",
+            "test_type": test_type,
+            "confining_pressure": pressure,
+            "undrained": test_type == "CIU",
+            "e0": round(float(rng.uniform(*E0_RANGE)), 4),
+        })
+    return specs
+
+
+def sheet_name(test_id: str, phase: str, rng=None) -> str:
+    """
+    Sheet name of one test phase. With rng, a human naming variant is picked
+    (abbreviated or re-cased phase label, odd separator, trailing space) that
+    the importer still recognises; names stay within Excel's length limit.
+    """
+    if rng is None:
+        name = f"{test_id}-{phase}"
+    else:
+        label = str(rng.choice(PHASE_LABELS[phase]))
+        separator = str(rng.choice(PHASE_SEPARATORS))
+        name = f"{test_id}{separator}{label}{' ' if rng.random() < 0.2 else ''}"
+    if len(name) > MAX_SHEET_NAME:
+        name = f"{test_id}-{'Consol' if phase == 'Consolidation' else phase}"
+    return name
+
+
+def simulated_shear(material: dict, spec: dict, n_rows: int, noise: float = 0.0, rng=None) -> dict:
+    """Shear phase columns, with lab-style headers, from a NorSandTriaxialSimulation run."""
+    from Norsand_Sim.config import params
+    from Norsand_Sim.simulation import NorSandTriaxialSimulation
+
+    run = NorSandTriaxialSimulation(dict(
+        params, **material,
+        undrained=spec["undrained"], sigM0=float(spec["confining_pressure"]), e0=spec["e0"],
+        num_steps=n_rows, max_strain=SHEAR_STRAIN,
+    )).run()
+
+    p, q = run["p"], run["q"]
+    if noise:
+        p = p + rng.normal(0.0, noise * spec["confining_pressure"], n_rows)
+        q = q + rng.normal(0.0, noise * spec["confining_pressure"], n_rows)
+    sigma3 = p - q / 3
+
+    columns = {
+        "Time (min)": np.arange(n_rows) * 0.5,
+        "Axial strain ɛa %": run["eps1"] * 100,
+        "σ3' (kPa)": sigma3,
+        "σ1' (kPa)": sigma3 + q,
+        "Deviator Stress q (kPa)": q,
+        "Mean Effective stress p (kPa)": p,
+    }
+    if spec["undrained"]:
+        columns["Induced PWP"] = run["pore_pressure"]
+    else:
+        columns["Vol Strain %"] = run["epsV"] * 100
+    columns["e"] = run["e"]
+    return columns
+
+
+def synthetic_consolidation(spec: dict, n_rows: int) -> dict:
+    """Consolidation phase columns: a smooth settlement curve over time."""
+    time = np.geomspace(1.0, 86400.0, n_rows)
+    settlement = 1 - np.exp(-time / 3600.0)
+    scale = spec["confining_pressure"] / 100.0
+    return {
+        "Time (s)": time,
+        "Axial Displacement (mm)": 0.8 * scale * settlement,
+        "Vol Offset (cm³)": 2.5 * scale * settlement,
+    }
+
+
+def _append_block(sheet, columns: dict, metadata_depth: int):
+    """Write metadata lines, the header row and all data rows of one sheet."""
+    for line in METADATA_LINES[:metadata_depth]:
+        sheet.append([line])
+    sheet.append(list(columns))
+    for row in np.column_stack(list(columns.values())).tolist():
+        sheet.append(row)
+
+
+def write_generated_workbook(task: tuple) -> str:
+    """
+    Write one synthetic workbook. task is (outfile, material, specs, n_rows,
+    noise, mistakes, seed); kept as a single tuple so it can be mapped over a
+    process pool. Returns the workbook path.
+    """
+    outfile, material, specs, n_rows, noise, mistakes, seed = task
+    rng = np.random.default_rng(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    workbook.create_sheet("Directory").append(["Generated for load testing"])
+
+    for spec in specs:
+        consolidation = synthetic_consolidation(spec, max(n_rows // 10, 10))
+        shear = simulated_shear(material, spec, n_rows, noise, rng)
+        for phase, columns in (("Consolidation", consolidation), ("Shear", shear)):
+            sheet = workbook.create_sheet(sheet_name(spec["test_id"], phase, rng if mistakes else None))
+            depth = int(rng.integers(0, MAX_METADATA_DEPTH + 1)) if mistakes else 4
+            _append_block(sheet, columns, depth)
+
+    workbook.save(outfile)
+    return str(outfile)
+
+
+def create_large_excel(outfile: Path, n_tests: int = 10, n_rows: int = 10000, seed: int = 0):
+    """Write one workbook of n_tests simulated tests, n_rows shear rows each, using config.params."""
+    from Norsand_Sim.config import params
+
+    rng = np.random.default_rng(seed)
+    material = {name: params[name] for name in MATERIAL_RANGES}
+    write_generated_workbook((outfile, material, random_test_specs(rng, n_tests), n_rows, 0.0, True, seed))
+    print(f"Created: {Path(outfile).name} ({n_tests} tests, {n_rows} rows per sheet)")
+
+
+def generate_dataset(
+    out_root: Path,
+    n_materials: int = 3,
+    workbooks_per_material: int = 5,
+    tests_per_workbook: int = 3,
+    n_rows: int = 10000,
+    noise: float = 0.0,
+    mistakes: bool = True,
+    seed: int = 0,
+    jobs: int | None = 1,
+) -> dict:
+    """
+    Write a data tree of simulated tests, <out_root>/<material>/<workbook>.xlsx,
+    plus <out_root>/ground_truth.json with every material's NorSand
+    parameters and each test's conditions, so import and calibration can be
+    checked against known answers. With jobs != 1 workbooks are written in a
+    process pool (None uses every core). Returns the ground truth.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    out_root = Path(out_root)
+    rng = np.random.default_rng(seed)
+    truth = {"seed": seed, "n_rows": n_rows, "noise": noise, "materials": {}}
+    tasks = []
+
+    for m in range(1, n_materials + 1):
+        name = f"Material_{m:02d}"
+        material_dir = out_root / name
+        material_dir.mkdir(parents=True, exist_ok=True)
+        material = random_material(rng)
+        tests = {}
+        for w in range(workbooks_per_material):
+            specs = random_test_specs(rng, tests_per_workbook, first_tx=w * tests_per_workbook + 1)
+            outfile = material_dir / f"{name}_batch{w + 1:03d}.xlsx"
+            tasks.append((outfile, material, specs, n_rows, noise, mistakes, int(rng.integers(2**32))))
+            for spec in specs:
+                conditions = {key: value for key, value in spec.items() if key != "test_id"}
+                tests[spec["test_id"]] = dict(conditions, file=outfile.relative_to(out_root).as_posix())
+        truth["materials"][name] = {"params": material, "tests": tests}
+
+    if jobs == 1:
+        written = [write_generated_workbook(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            written = list(pool.map(write_generated_workbook, tasks))
+
+    with open(out_root / "ground_truth.json", "w", encoding="utf-8") as f:
+        json.dump(truth, f, indent=1)
+    print(f"Created {len(written)} workbooks in {out_root}")
+    return truth
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate sample triaxial workbooks.")
+    parser.add_argument("--dataset", type=Path, help="write a large simulated dataset to this directory")
+    parser.add_argument("--materials", type=int, default=3)
+    parser.add_argument("--workbooks", type=int, default=5, help="workbooks per material")
+    parser.add_argument("--tests", type=int, default=3, help="tests per workbook")
+    parser.add_argument("--rows", type=int, default=10000, help="shear rows per test")
+    parser.add_argument("--noise", type=float, default=0.0, help="stress noise, as a fraction of confining pressure")
+    parser.add_argument("--clean-names", action="store_true", help="no sheet-naming or header-depth variation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=1, help="parallel writer processes (0 for every core)")
+    args = parser.parse_args()
+
+    if args.dataset is not None:
+        generate_dataset(
+            args.dataset, args.materials, args.workbooks, args.tests, args.rows,
+            noise=args.noise, mistakes=not args.clean_names, seed=args.seed, jobs=args.jobs or None,
+        )
+        return
+
     #out_dir = Path("data")
     out_dir = Path(__file__).resolve().parent.parent / "data"
     out_dir.mkdir(exist_ok=True)
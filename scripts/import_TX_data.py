@@ -37,183 +37,73 @@ Import CIU, CID and DMIN CID triaxial data from Excel files with multiple sheets
 
 This script searches recursively in the data directory for Excel files (.xlsx),
 ignores metadata sheets, and loads valid triaxial test phases (Consolidation and Shear)
-into structured dictionaries for further processing.
+into structured dictionaries for further processing. The import functions live
+in calipyr.triaxial.importer; results are cached to a per-test columnar store
+(calipyr.triaxial.store).
 
 Author: Paul le Roux
 Date: 2025-06-04
 """
 
-import os
-import re
-import pandas as pd
 from pathlib import Path
 
-# Constants
-DATA_ROOT = Path(r"C:\Users\Python\Projects\calipyr\data")
-VALID_PHASES = ["Consolidation", "Shear"]
-IGNORE_SHEETS = {"Directory", "Sample Data"}
-VALID_EXT = ".xlsx"
-
-# Regex pattern for identifying test sheets, e.g. "TX1-CIU-150kPa-Consolidation"
-# Updated regex pattern: allows "Consol" or "Consolidation" or spacing issues
-SHEET_PATTERN = re.compile(
-    r"^(TX\d+)-(CIU|CID|DMIN-CID)-(\d+)kPa[-\s]+(Consol(idation)?|Shear)\s*$",
-    re.IGNORECASE
+from calipyr.calibration.experiments import resample_archive
+from calipyr.triaxial.importer import (  # noqa: F401 - re-exported for existing callers
+    IGNORE_SHEETS,
+    SHEET_PATTERN,
+    VALID_EXT,
+    VALID_PHASES,
+    find_excel_files,
+    import_all_tests,
+    import_incremental,
+    load_test_sheets,
 )
+from calipyr.triaxial.store import TriaxialStore
 
-def find_excel_files(root: Path) -> list[Path]:
-    """Recursively find all .xlsx files under the given root directory."""
-    return [p for p in root.rglob(f"*{VALID_EXT}") if p.is_file()]
-
-def load_test_sheets(filepath: Path) -> dict:
-    """
-    Load valid test sheets from an Excel file.
-    Returns a nested dictionary:
-    {
-        'TX1-CIU-150kPa': {
-            'Consolidation': pd.DataFrame,
-            'Shear': pd.DataFrame
-        },
-        ...
-    }
-    """
-    xls = pd.ExcelFile(filepath)
-    test_data = {}
-
-    for sheet in xls.sheet_names:
-        if sheet in IGNORE_SHEETS:
-            continue
-
-        match = SHEET_PATTERN.match(sheet)
-        if not match:
-            print(f"Skipping unrecognised sheet: {sheet} in file: {filepath.name}")
-            continue
-
-        test_id = f"{match.group(1)}-{match.group(2)}-{match.group(3)}kPa"
-        raw_phase = match.group(4).strip().lower()
-
-        if raw_phase.startswith("consol"):
-            phase = "Consolidation"
-        elif raw_phase == "shear":
-            phase = "Shear"
-        else:
-            print(f"Unrecognised phase label: {raw_phase} in sheet: {sheet}")
-            continue
-
-        try:
-            raw_preview = xls.parse(sheet, nrows=10, header=None)
-
-            header_row_idx = None
-            for idx, row in raw_preview.iterrows():
-                joined = ",".join(str(x) for x in row if pd.notna(x)).lower()
-                if any(kw in joined for kw in ["axial", "stress", "strain", "time", "mean effective", "deviator"]):
-                    header_row_idx = idx
-                    break
-
-            if header_row_idx is None:
-                print(f"  Could not detect header row in sheet {sheet} (file: {filepath.name})")
-                continue
-
-            # Load using detected header
-            df = xls.parse(sheet, header=header_row_idx)
-
-            df.dropna(how='all', inplace=True)  # drop completely empty rows
-            if test_id not in test_data:
-                test_data[test_id] = {}
-            test_data[test_id][phase] = df
-        except Exception as e:
-            print(f"Error reading sheet {sheet} in {filepath.name}: {e}")
-
-    return test_data
-
-def import_all_tests(data_root: Path) -> dict:
-    """
-    Scan all Excel files and load valid triaxial test data.
-    Returns a nested dictionary:
-    {
-        'Material Name': {
-            'TX1-CIU-150kPa': {
-                'Consolidation': pd.DataFrame,
-                'Shear': pd.DataFrame
-            },
-            ...
-        },
-        ...
-    }
-    """
-    results = {}
+# Constants; the same pipeline runs as `calipyr import` / `calipyr process` with configurable paths
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DATA_ROOT = REPO_ROOT / "data"
+EXPORT_DIR = REPO_ROOT / "_import_preview"
+STORE_DIR = REPO_ROOT / "_cache" / "triaxials"
+JOBS = None  # worker processes for parsing workbooks; None uses every core
+ENGINE = "stream"  # openpyxl read-only streaming; "pandas" for pd.ExcelFile
 
-    for file in find_excel_files(data_root):
-        material_name = file.parent.name
-        print(f"Processing file: {file.name} (Material: {material_name})")
-
-        test_sheets = load_test_sheets(file)
-
-        if material_name not in results:
-            results[material_name] = {}
-
-        results[material_name].update(test_sheets)
-
-    return results
 
 if __name__ == "__main__":
-    imported_data = import_all_tests(DATA_ROOT)
-
-    # Example: print out loaded test IDs per material
-    for material, tests in imported_data.items():
-        print(f"\nMaterial: {material}")
-        for test_id in tests:
-            print(f"  Loaded test: {test_id} with phases: {list(tests[test_id].keys())}")
+    # Only new or changed workbooks are parsed; deleted ones are dropped from the store
+    store = TriaxialStore(STORE_DIR)
+    summary = import_incremental(DATA_ROOT, store, jobs=JOBS, engine=ENGINE)
 
-print("\n=== Test Import Summary ===")
-for material, tests in imported_data.items():
-    print(f"\nMaterial: {material}")
-    for test_id, phases in tests.items():
-        phase_summary = []
-        for phase in ["Consolidation", "Shear"]:
-            if phase in phases:
-                df = phases[phase]
-                nrows, ncols = df.shape
-                phase_summary.append(f"{phase} ({nrows} rows, {ncols} cols)")
-            else:
-                phase_summary.append(f"{phase} [MISSING]")
-        print(f"  {test_id:<30} -->  {', '.join(phase_summary)}")
+    print(
+        f"\nFiles added: {len(summary['added'])}, updated: {len(summary['updated'])}, "
+        f"removed: {len(summary['removed'])}, unchanged: {summary['unchanged']}"
+    )
 
-# # Optional: limit to 1 test per material to avoid too many plots
-# for material, tests in imported_data.items():
-#     for test_id, phases in tests.items():
-#         print(f"\nPlotting test: {test_id} ({material})")
-#         for phase, df in phases.items():
-#             plt.figure()
-#             df_numeric = df.select_dtypes(include="number")  # Only plot numeric columns
-#             if not df_numeric.empty:
-#                 df_numeric.plot(title=f"{test_id} - {phase}")
-#                 plt.xlabel("Row index")
-#                 plt.ylabel("Values")
-#                 plt.grid(True)
-#                 plt.tight_layout()
-#             else:
-#                 print(f"  Skipping {phase}: no numeric data")
-#         break  # comment this line if you want to plot all tests per material
-#
-# plt.show()
-
-EXPORT_DIR = Path("C:/Users/Python/Projects/calipyr/_import_preview")
-EXPORT_DIR.mkdir(exist_ok=True)
-
-for material, tests in imported_data.items():
-    for test_id, phases in tests.items():
-        for phase, df in phases.items():
+    print("\n=== Test Import Summary ===")
+    for material, tests in store.items():
+        print(f"\nMaterial: {material}")
+        for test_id, phases in tests.items():
+            phase_summary = []
+            for phase in ["Consolidation", "Shear"]:
+                if phase in phases:
+                    meta = store.entry(material, test_id)["phases"][phase]
+                    nrows, ncols = meta["rows"], len(meta["columns"])
+                    phase_summary.append(f"{phase} ({nrows} rows, {ncols} cols)")
+                else:
+                    phase_summary.append(f"{phase} [MISSING]")
+            print(f"  {test_id:<30} -->  {', '.join(phase_summary)}")
+
+    # Preview CSVs for the tests re-parsed in this run
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+
+    for material, test_id in summary["tests"]:
+        for phase, df in store[material][test_id].items():
             outname = f"{test_id}_{phase}.csv"
             outfile = EXPORT_DIR / outname
             df.to_csv(outfile, index=False)
 
-import pickle
-
-EXPORT_PATH = Path("C:/Users/Python/Projects/calipyr/_cache/imported_triaxials.pkl")
-EXPORT_PATH.parent.mkdir(exist_ok=True)  # create _cache dir if needed
-
-with open(EXPORT_PATH, "wb") as f:
-    pickle.dump(imported_data, f)
+    # Resample shear curves onto the calibration strain grid once, stored next to the raw data
+    resampled = resample_archive(store)
+    print(f"\n{resampled} tests ready on the calibration strain grid")
 
-print(f"\nData cached to: {EXPORT_PATH}")
\ No newline at end of file
+    print(f"\nData cached to: {STORE_DIR}")
@@ -1,6 +1,16 @@
+# process_one_test.py
+"""
+Load the first triaxial test of the first workbook in data/ and save its
+canonical columns, one row per reading, as outputs/<workbook>_standardised.csv.
+"""
+
 from pathlib import Path
+
 import pandas as pd
-from calipyr.processing import load_triaxial_test
+
+from calipyr.calibration.experiments import parse_test_id
+from calipyr.triaxial.importer import find_excel_files, load_test_sheets
+from calipyr.triaxial.schema import roles
 
 
 def main():
@@ -8,7 +18,7 @@ def main():
     root_dir = Path(__file__).resolve().parent.parent
     data_dir = root_dir / "data"
 
-    xlsx_files = list(data_dir.glob("*.xlsx"))
+    xlsx_files = find_excel_files(data_dir) if data_dir.is_dir() else []
     print("Files found in data/:", [f.name for f in xlsx_files])
 
     if not xlsx_files:
@@ -17,18 +27,32 @@ def main():
 
     test_file = xlsx_files[0]
     print(f"Loading test: {test_file.name}")
-    df = load_triaxial_test(test_file)
+    tests = load_test_sheets(test_file, engine="stream")
+    if not tests:
+        print(f"No triaxial test sheets found in {test_file.name}")
+        return
+
+    test_id, phases = next(iter(tests.items()))
+    frames = []
+    for phase, phase_df in phases.items():
+        frame = phase_df[roles(phase_df)].copy()
+        frame.insert(0, "phase", phase)
+        frames.append(frame)
+    df = pd.concat(frames, ignore_index=True)
+    df.insert(0, "test_type", parse_test_id(test_id)["test_type"])
+    df.insert(0, "test_id", test_id)
 
     print("\nTest Info:")
-    print("Test ID:", df['test_id'].iloc[0])
-    print("Test Type:", df['test_type'].iloc[0])
-    print("Phases:", df['phase'].unique())
+    print("Test ID:", test_id)
+    print("Test Type:", df["test_type"].iloc[0])
+    print("Phases:", df["phase"].unique())
 
     print("\nPreview of standardised data:")
     print(df.head())
 
     # Save to outputs/
     output_path = root_dir / "outputs" / f"{test_file.stem}_standardised.csv"
+    output_path.parent.mkdir(exist_ok=True)
     df.to_csv(output_path, index=False)
     print(f"\nSaved to: {output_path}")
 
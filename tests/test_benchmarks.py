@@ -0,0 +1,36 @@
+# tests/test_benchmarks.py
+import json
+
+from benchmarks import run_benchmarks
+from benchmarks.run_benchmarks import compare, needs_workbooks
+
+
+def test_compare_flags_only_slowdowns_beyond_tolerance():
+    baseline = {"a": {"best": 1.0}, "b": {"best": 1.0}, "c": {"best": 1.0}}
+    results = {"a": {"best": 1.2}, "b": {"best": 1.5}, "c": {"best": 0.5}, "new": {"best": 9.0}}
+
+    rows = {row["name"]: row for row in compare(results, baseline, tolerance=0.25)}
+
+    assert set(rows) == {"a", "b", "c"}
+    assert [name for name, row in rows.items() if row["regression"]] == ["b"]
+
+
+def test_simulation_entry_points_import_only_numpy():
+    from benchmarks.import_budget import HEAVY, forbidden_imports, import_profile
+
+    for module in ("Norsand_Sim.simulation", "Norsand_Sim.batch", "calipyr.calibration.objective"):
+        _, imported = import_profile(module)
+        assert "numpy" in imported
+        assert forbidden_imports(imported, HEAVY) == []
+
+
+def test_only_selects_benchmarks_by_name_prefix(tmp_path, monkeypatch):
+    assert needs_workbooks("") and needs_workbooks("imp") and needs_workbooks("import_all_tests")
+    assert needs_workbooks("cache/store") and not needs_workbooks("import/") and not needs_workbooks("simulate")
+
+    monkeypatch.setattr(run_benchmarks, "QUICK_WORKBOOK_SIZES", ((1, 50),))
+    output = tmp_path / "results.json"
+    argv = ["--only", "import_all_tests", "--quick", "--repeat", "1", "--output", str(output),
+            "--baseline", str(tmp_path / "baseline.json")]
+    assert run_benchmarks.main(argv) == 0
+    assert list(json.loads(output.read_text())["results"]) == ["import_all_tests/1x50"]
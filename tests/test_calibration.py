@@ -0,0 +1,257 @@
+import numpy as np
+import pandas as pd
+
+from Norsand_Sim.config import params
+from Norsand_Sim.simulation import NorSandTriaxialSimulation
+from calipyr.calibration import experiments
+from calipyr.calibration.experiments import parse_test_id
+from calipyr.calibration.fit import calibrate
+
+TRUE_PARAMS = dict(params, chi=0.4, num_steps=100)
+
+
+def synthetic_tests():
+    """Shear phases generated by the simulator itself, with lab-style headers."""
+    tests = {}
+    for test_id, undrained, p0, e0 in [
+        ("TX1-CIU-150kPa", True, 150.0, 0.70),
+        ("TX2-CID-300kPa", False, 300.0, 0.68),
+        ("TX3-DMIN-CID-50kPa", False, 50.0, 0.60),
+    ]:
+        run = NorSandTriaxialSimulation(dict(TRUE_PARAMS, undrained=undrained, sigM0=p0, e0=e0, max_strain=0.15)).run()
+        tests[test_id] = {"Shear": pd.DataFrame({
+            "Axial strain ɛa %": run["eps1"] * 100,
+            "Mean Effective stress p (kPa)": run["p"],
+            "Deviator Stress q (kPa)": run["q"],
+            "e": run["e"],
+        })}
+    return tests
+
+
+def test_parse_test_id():
+    assert parse_test_id("TX6-DMIN-CID-50kPa") == {
+        "tx": "TX6", "test_type": "DMIN-CID", "confining_pressure": 50.0, "undrained": False,
+    }
+    assert parse_test_id("tx1-ciu-150kPa")["undrained"]
+    assert experiments.test_keys("TX6-DMIN-CID-50kPa") == {"tx": "TX6", "test_type": "DMIN-CID", "confining_pressure": 50.0}
+    assert np.isnan(experiments.test_keys("Sample 4")["confining_pressure"])
+
+
+def test_calibrate_recovers_chi_in_parallel():
+    result = calibrate(
+        synthetic_tests(),
+        bounds={"chi": (0.1, 0.6)},
+        base_params=dict(TRUE_PARAMS, chi=0.25),
+        method="L-BFGS-B",
+        workers=2,
+    )
+
+    assert result.test_ids == ["TX1-CIU-150kPa", "TX2-CID-300kPa", "TX3-DMIN-CID-50kPa"]
+    assert abs(result.params["chi"] - 0.4) < 0.03
+
+
+def test_parallel_gradient_steps_back_at_upper_bound():
+    from calipyr.calibration.fit import ParallelGradient
+
+    evaluated = []
+
+    def objective(x):
+        evaluated.append(x)
+        return float(np.sum(x ** 2))
+
+    value, grad = ParallelGradient(objective, map, limits=[(0.0, 1.0), (0.0, 2.0)])(np.array([1.0, 0.5]))
+    assert all(np.all(x <= [1.0, 2.0]) for x in evaluated)
+    assert value == 1.25
+    np.testing.assert_allclose(grad, [2.0, 1.0], atol=1e-5)
+
+
+def test_surrogate_calibration_needs_few_real_runs():
+    result = calibrate(synthetic_tests(), bounds={"chi": (0.1, 0.6)}, base_params=TRUE_PARAMS,
+                       method="surrogate", workers=1)
+    assert result.success and result.nfev < 30
+    assert abs(result.params["chi"] - 0.4) < 0.02
+    assert result.history[-1]["error"] < 0.02
+
+
+def test_surrogate_calibration_with_optimum_on_a_bound():
+    # Refinement points clipped onto the lower bound must not be simulated twice;
+    # a tight tol forces refits after they have been clipped there
+    result = calibrate(synthetic_tests(), bounds={"chi": (0.45, 0.7)}, base_params=TRUE_PARAMS,
+                       method="surrogate", workers=1, tol=1e-12, maxiter=3)
+    assert result.params["chi"] == 0.45 and result.nit >= 2
+    training = result.emulator.interpolator.y
+    assert len(np.unique(training, axis=0)) == len(training)
+
+
+def test_simulation_cache_tiers(tmp_path):
+    from calipyr.calibration.cache import SimulationCache, params_key
+
+    run_params = dict(TRUE_PARAMS, undrained=True)
+    assert params_key(run_params) == params_key(dict(run_params, chi=0.1 + 0.3))
+    assert params_key(run_params) != params_key(dict(run_params, chi=0.41))
+
+    cache = SimulationCache(maxsize=1, cache_dir=tmp_path)
+    first = cache.run(run_params)
+    assert cache.run(run_params) is first
+    cache.run(dict(run_params, chi=0.3))  # evicts the first run from memory
+
+    reloaded = SimulationCache(cache_dir=tmp_path).run(run_params)
+    assert (reloaded["q"] == first["q"]).all()
+    assert cache.stats()["misses"] == 2 and cache.stats()["hits"] == 1
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+
+def test_resampled_curves_are_stored_and_reused(tmp_path):
+    from calipyr.calibration.experiments import RESAMPLED_NAME, prepare_tests, strain_grid
+    from calipyr.calibration.objective import CalibrationObjective
+    from calipyr.triaxial.store import TriaxialStore, write_archive
+
+    tests = synthetic_tests()
+    write_archive(tmp_path / "store", {"Sand": tests})
+    store = TriaxialStore(tmp_path / "store")
+
+    from_frames = prepare_tests(tests, points=50)
+    from_store = prepare_tests(store["Sand"], points=50)
+    assert store.load_derived("Sand", "TX1-CIU-150kPa", RESAMPLED_NAME)[1]["points"] == 50
+
+    for fresh, stored in zip(from_frames, from_store):
+        block = stored["resampled"]
+        assert block.flags.c_contiguous and block.shape == (4, 50)
+        np.testing.assert_array_equal(block, fresh["resampled"])
+        np.testing.assert_allclose(block[0], strain_grid(fresh["resampled"][0, -1], 50))
+        assert (stored["sigM0"], stored["e0"]) == (fresh["sigM0"], fresh["e0"])
+
+    # A reopened store serves the stored block without reading the shear phase
+    reopened = TriaxialStore(tmp_path / "store")
+    reopened.load_phase = None
+    reused = prepare_tests(reopened["Sand"], points=50)
+    objective = CalibrationObjective(reused, ["chi"], base_params=TRUE_PARAMS)
+    assert objective([0.4]) < objective([0.25])
+
+
+def test_sobol_indices_of_linear_model():
+    from calipyr.calibration.sensitivity import saltelli_samples, sobol_indices
+
+    n = 4096
+    samples = saltelli_samples({"a": (0, 1), "b": (0, 1), "c": (0, 1)}, n, seed=1)
+    outputs = (2 * samples[:, 0] + samples[:, 1])[:, None]  # variance shares 4/5, 1/5, 0
+    first, total = sobol_indices(outputs, n, 3)
+
+    np.testing.assert_allclose(first[0], [0.8, 0.2, 0.0], atol=0.03)
+    np.testing.assert_allclose(total[0], [0.8, 0.2, 0.0], atol=0.03)
+
+
+def test_sensitivity_sweep_resumes_from_checkpoint(tmp_path, monkeypatch):
+    from calipyr.calibration import sensitivity
+
+    checkpoint = tmp_path / "sweep.npz"
+    settings = dict(bounds=sensitivity.default_bounds(("chi", "N")), n=16, chunk_size=16, checkpoint=checkpoint)
+    full = sensitivity.run_sensitivity(**settings)
+
+    # Mark the last two chunks unfinished, as if the sweep had been interrupted
+    with np.load(checkpoint) as stored:
+        state = dict(stored)
+    state["done"][-2:] = False
+    state["outputs"][-32:] = np.nan
+    np.savez(checkpoint, **state)
+
+    simulated = []
+    original = sensitivity._simulate_features
+    monkeypatch.setattr(sensitivity, "_simulate_features", lambda task: simulated.append(1) or original(task))
+    resumed = sensitivity.run_sensitivity(**settings)
+
+    assert len(simulated) == 2
+    np.testing.assert_array_equal(resumed["outputs"], full["outputs"])
+    np.testing.assert_array_equal(resumed["total_order"], full["total_order"])
+
+
+def test_critical_state_fit_recovers_line_with_bootstrap_intervals():
+    from calipyr.calibration.critical_state import bootstrap_csl, fit_csl
+    from Norsand_Sim.material import compute_ec
+
+    rng = np.random.default_rng(4)
+    p = rng.uniform(30, 900, 300)
+    e = compute_ec(0.92, 0.06, p) + rng.normal(0, 0.003, p.size)
+    q = 1.3 * p * (1 + rng.normal(0, 0.01, p.size))
+
+    exact = fit_csl(p, 1.3 * p, compute_ec(0.92, 0.06, p))
+    assert np.allclose([exact["N"], exact["lambda"], exact["Mc"]], [0.92, 0.06, 1.3])
+
+    fit = fit_csl(p, q, e)
+    intervals = bootstrap_csl(p, q, e, n_resamples=2000, seed=1)
+    for name, true_value in (("N", 0.92), ("lambda", 0.06), ("Mc", 1.3)):
+        low, high = intervals[name]
+        assert low < fit[name] < high
+        assert low < true_value < high and high - low < 0.05
+
+    # Every resample of a single-pressure data set leaves lambda undetermined
+    assert np.isnan(bootstrap_csl(np.full(5, 100.0), q[:5], e[:5], n_resamples=20)["lambda"]).all()
+
+
+def test_objective_pickles_without_shared_measured_arrays(tmp_path):
+    import pickle
+    import warnings
+
+    from calipyr.calibration.experiments import prepare_tests
+    from calipyr.calibration.objective import CalibrationObjective
+
+    objective = CalibrationObjective(prepare_tests(synthetic_tests()), ["chi"], TRUE_PARAMS)
+    expected = objective([0.3])
+    full_size = len(pickle.dumps(objective))
+
+    for directory in (None, tmp_path / "shared"):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            with objective.sharing(directory):
+                blob = pickle.dumps(objective)
+                assert len(blob) < full_size / 10
+                copy = pickle.loads(blob)
+                assert copy([0.3]) == expected
+                assert not copy.measured.flags.writeable
+                assert np.array_equal(copy.tests[0]["resampled"], objective.tests[0]["resampled"])
+        # A copy outliving the release keeps working; releasing a viewed block warns
+        assert copy([0.3]) == expected
+        assert [w.category for w in caught] == ([RuntimeWarning] if directory is None else [])
+        del copy
+        assert objective.shared is None
+    assert not list((tmp_path / "shared").glob("*.npy"))
+    assert len(pickle.dumps(objective)) == full_size
+
+
+SPAWN_SHARING_SCRIPT = """
+import multiprocessing, operator
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from calipyr.calibration.shared import SharedArrays
+
+if __name__ == "__main__":
+    shared = SharedArrays({"a": np.arange(10.0)})
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        print(sum(float(view.sum()) for view in pool.map(operator.getitem, [shared] * 4, ["a"] * 4)))
+    shared.release()
+"""
+
+
+def test_shared_arrays_release_cleanly_after_spawned_workers():
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    # Spawned workers share the publisher's resource tracker, which reports
+    # errors on its own stderr, so run the pool in a fresh interpreter
+    completed = subprocess.run([sys.executable, "-c", SPAWN_SHARING_SCRIPT], capture_output=True, text=True,
+                               cwd=Path(__file__).resolve().parent.parent, check=True)
+    assert completed.stdout.strip() == "180.0"
+    assert "Traceback" not in completed.stderr and "leaked" not in completed.stderr
+
+
+def test_attaching_skips_only_the_attached_blocks_registration(monkeypatch):
+    from calipyr.calibration import shared
+
+    registered = []
+    register = shared._skip_attached_registrations(lambda name, rtype: registered.append((name, rtype)))
+    monkeypatch.setattr(shared, "_ATTACHING", {"psm_attached"})
+    register("/psm_attached", "shared_memory")
+    register("/psm_created", "shared_memory")  # e.g. created on another thread meanwhile
+    register("/sem", "semaphore")
+    assert registered == [("/psm_created", "shared_memory"), ("/sem", "semaphore")]
@@ -0,0 +1,52 @@
+import json
+
+import pandas as pd
+import pytest
+
+from calipyr.cli import main
+from calipyr.triaxial.store import TriaxialStore
+from scripts.generate_sample_tests import generate_dataset
+
+
+def test_import_process_simulate_pipeline(tmp_path):
+    truth = generate_dataset(tmp_path / "data", n_materials=1, workbooks_per_material=1,
+                             tests_per_workbook=3, n_rows=50, seed=5)
+    cache_dir = tmp_path / "cache"
+    common = ["--cache-dir", str(cache_dir)]
+
+    assert main(["import", str(tmp_path / "data"), *common]) == 0
+    store = TriaxialStore(cache_dir / "triaxials")
+    material, expected = next(iter(truth["materials"].items()))
+    assert sorted(store[material]) == sorted(expected["tests"])
+
+    csl_file = tmp_path / "csl.json"
+    assert main(["process", *common, "--points", "20", "--resamples", "50", "-o", str(csl_file)]) == 0
+    csl = json.loads(csl_file.read_text())[material]
+    assert sorted(csl["end_states"]["test_id"]) == sorted(expected["tests"])
+    test_id = next(iter(expected["tests"]))
+    block, meta = TriaxialStore(cache_dir / "triaxials").load_derived(material, test_id, "shear_resampled")
+    assert block.shape == (4, 20) and meta["points"] == 20
+
+    params_file = tmp_path / "params.json"
+    params_file.write_text(json.dumps({"N": 0.9}))
+    output = tmp_path / "sim.csv"
+    argv = ["simulate", *common, "--params", str(params_file), "--set", "num_steps=30", "--undrained", "-o", str(output)]
+    assert main(argv) == 0
+    assert len(pd.read_csv(output)) == 30
+
+    fitted_file = tmp_path / "fitted.json"
+    argv = ["calibrate", *common, "--method", "L-BFGS-B", "--maxiter", "1", "--points", "20", "-o", str(fitted_file)]
+    assert main(argv) == 0
+    assert sorted(json.loads(fitted_file.read_text())[material]["tests"]) == sorted(expected["tests"])
+
+
+def test_commands_need_an_imported_store(tmp_path):
+    with pytest.raises(SystemExit, match="calipyr import"):
+        main(["report", "--cache-dir", str(tmp_path)])
+
+
+def test_simulate_jit_without_numba_is_a_usage_error(tmp_path, monkeypatch):
+    monkeypatch.setattr("Norsand_Sim.kernel.HAVE_NUMBA", False)
+    with pytest.raises(SystemExit, match="--jit requires numba"):
+        main(["simulate", "--cache-dir", str(tmp_path), "--jit", "-o", str(tmp_path / "sim.csv")])
+    assert not (tmp_path / "sim.csv").exists()
@@ -1,4 +1,34 @@
-from calipyr.phases.relationships import void_ratio_from_porosity
+from calipyr.phases.relationships import degree_of_saturation, dry_density, void_ratio_from_porosity
 
 def test_void_ratio():
-    assert abs(void_ratio_from_porosity(0.4) - 0.6667) < 1e-3
\ No newline at end of file
+    assert abs(void_ratio_from_porosity(0.4) - 0.6667) < 1e-3
+
+def test_relationships_on_arrays_and_series():
+    import numpy as np
+    import pandas as pd
+    from calipyr.phases.relationships import (
+        porosity_from_void_ratio,
+        relative_density,
+        saturated_unit_weight,
+        submerged_unit_weight,
+        void_ratio_from_saturation,
+        void_ratio_from_volumetric_strain,
+        water_content,
+    )
+
+    n = np.array([0.3, 0.4, 1.0])
+    e = void_ratio_from_porosity(n)
+    assert np.allclose(e[:2], [0.3 / 0.7, 0.4 / 0.6]) and np.isnan(e[2])
+    assert np.allclose(porosity_from_void_ratio(e[:2]), n[:2])
+
+    e = pd.Series([0.6, 0.8, 0.0], index=["a", "b", "c"])
+    Sr = degree_of_saturation(water_content(1.0, 2.7, e), 2.7, e)
+    assert list(Sr.index) == ["a", "b", "c"]
+    assert np.allclose(Sr[:2], 1.0) and np.isnan(Sr["c"])
+    assert np.allclose(void_ratio_from_saturation(water_content(0.5, 2.7, e), 2.7, 0.5), e)
+
+    assert np.allclose(submerged_unit_weight(2.7, e) + 9.81, saturated_unit_weight(2.7, e))
+    assert np.allclose(relative_density(np.array([0.5, 0.9]), 0.5, 0.9), [1.0, 0.0])
+    assert np.isnan(relative_density(0.6, 0.7, 0.7))
+    assert np.allclose(void_ratio_from_volumetric_strain(0.7, np.array([0.0, 0.01])), [0.7, 0.683])
+    assert np.allclose(dry_density(2.7, np.array([[0.5], [1.0]])), [[1800.0], [1350.0]])
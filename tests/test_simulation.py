@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from Norsand_Sim.config import params
+from Norsand_Sim.results import RESULT_FIELDS
+from Norsand_Sim.simulation import NorSandTriaxialSimulation
+
+
+def test_columnar_results_match_dicts():
+    for undrained in (False, True):
+        run_params = dict(params, undrained=undrained)
+        columns = NorSandTriaxialSimulation(run_params).run()
+        rows = NorSandTriaxialSimulation(run_params).run(output="dicts")
+
+        assert set(columns) == set(RESULT_FIELDS)
+        assert len(rows) == params["num_steps"]
+        for name in RESULT_FIELDS:
+            assert np.array_equal(columns[name], [row[name] for row in rows])
+
+
+def test_frame_and_records_outputs():
+    frame = NorSandTriaxialSimulation(params).run(output="frame")
+    records = NorSandTriaxialSimulation(params).run(output="records")
+
+    assert list(frame.columns) == list(RESULT_FIELDS)
+    assert np.array_equal(frame["q"].to_numpy(), records.q)
+
+
+def test_batch_matches_scalar_runs():
+    import pandas as pd
+    from Norsand_Sim.batch import BatchNorSandSimulation
+
+    table = pd.DataFrame([
+        dict(params, chi=0.1, sigM0=50.0),
+        dict(params, Mc=1.4, e0=0.8, undrained=True),
+        dict(params, N=1.05, H0=8.0, max_strain=0.1, undrained=True),
+    ])
+    batch = BatchNorSandSimulation(table)
+    batch.run()
+
+    for index, row in enumerate(table.to_dict("records")):
+        expected = NorSandTriaxialSimulation(row).run()
+        got = batch.run_results(index)
+        for name in RESULT_FIELDS:
+            assert np.array_equal(got[name], expected[name])
+
+
+def test_adaptive_matches_fine_fixed_step_run():
+    grid = np.linspace(0.0, params["max_strain"], 21)[1:]
+    for undrained in (False, True):
+        run_params = dict(params, undrained=undrained)
+        reference = NorSandTriaxialSimulation(dict(run_params, num_steps=40000)).run()
+
+        sim = NorSandTriaxialSimulation(run_params)
+        adaptive = sim.run_adaptive(grid, rtol=1e-4)
+
+        assert np.array_equal(adaptive["eps1"], grid)
+        assert sim.adaptive_stats["accepted"] < 1000
+        for name in ("p", "q", "e"):
+            expected = np.interp(grid, reference["eps1"], reference[name])
+            assert np.allclose(adaptive[name], expected, rtol=1e-3)
+
+
+def test_kernel_matches_python_loop():
+    from Norsand_Sim.kernel import KERNEL_FIELDS, allocate_kernel_output, shear_kernel, shear_kernel_py
+
+    for undrained in (False, True):
+        sim = NorSandTriaxialSimulation(dict(params, undrained=undrained))
+        expected = sim.run(jit=False)
+
+        material = np.array([sim.n, sim.lambda_, sim.mc, sim.chi, sim.pref, sim.k_over_g, sim.h0, sim.hy])
+        d_eps = sim.max_strain / (sim.num_steps - 1)
+        for kernel in (shear_kernel, shear_kernel_py):
+            state = np.array([sim.e0, sim.sigm0, 0.0, sim.sigm0, 0.0, 0.0, 0.0])
+            block = allocate_kernel_output(sim.num_steps)
+            kernel(state, material, d_eps, undrained, block)
+            for row, name in enumerate(KERNEL_FIELDS):
+                assert np.allclose(block[row], expected[name], rtol=1e-12, atol=0)
+
+
+def test_python_kernel_stays_pure_after_compiling():
+    pytest.importorskip("numba")
+    from Norsand_Sim import kernel
+    from Norsand_Sim.material import compute_gmax
+
+    kernel.compiled_shear_kernel()
+    assert kernel._gmax is compute_gmax
+    assert kernel.shear_kernel_py.__globals__["_gmax"] is compute_gmax
+
+
+def test_single_shear_program_matches_run():
+    from Norsand_Sim.program import NorSandProgramSimulation, shear
+
+    run_params = dict(params, num_steps=201, max_strain=0.2, undrained=True)
+    expected = NorSandTriaxialSimulation(run_params).run()
+    columns = NorSandProgramSimulation(run_params, [shear(0.201, 201, undrained=True)]).run()
+
+    for name in RESULT_FIELDS:
+        np.testing.assert_allclose(columns[name], expected[name], rtol=1e-12)
+    assert np.all(columns["stage"] == 0)
+
+
+def test_multi_stage_program_carries_state():
+    from Norsand_Sim.program import NorSandProgramSimulation, k0_consolidation, shear, unload_reload
+
+    sim = NorSandProgramSimulation(params, [
+        k0_consolidation(300.0, num_steps=50),
+        shear(0.05, 200, undrained=True),
+        unload_reload(q_min=0.0, num_steps=40, undrained=True),
+        shear(0.05, 200, name="Drained shear"),
+    ])
+    frame = sim.run(output="frame")
+
+    assert len(frame) == 490 and list(frame["stage"].unique()) == [0, 1, 2, 3]
+    consolidation = sim.stage_results("Consolidation")
+    assert abs(consolidation["p"][-1] - 300.0) < 1e-9
+    eta_k0 = 3 * (1 - params["K0"]) / (1 + 2 * params["K0"])
+    assert abs(consolidation["q"][-1] / consolidation["p"][-1] - eta_k0) < 1e-9
+    assert consolidation["e"][-1] < params["e0"]
+
+    # The unload/reload loop returns to the deviator stress it started from
+    sheared, loop = sim.stage_results(1), sim.stage_results(2)
+    assert abs(loop["q"].min()) < 1e-6
+    assert abs(loop["q"][-1] - sheared["q"][-1]) < 1e-6
+
+    # Undrained excess pore pressure dissipates at the start of the drained stage,
+    # with p' continuing from the effective stress the loop ended at
+    assert abs(loop["pore_pressure"][-1]) > 1.0
+    drained = sim.stage_results("Drained shear")
+    assert np.all(drained["pore_pressure"] == 0.0)
+    assert abs(drained["p"][0] - loop["p"][-1]) < 0.01 * loop["p"][-1]
+    assert drained["eps1"][0] > loop["eps1"][-1]
@@ -0,0 +1,297 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Norsand_Sim.config import params
+from Norsand_Sim.simulation import NorSandTriaxialSimulation
+from calipyr.triaxial.importer import import_all_tests
+from calipyr.triaxial.schema import canonicalize, resolve_columns
+from calipyr.triaxial.store import TriaxialStore, load_cached_triaxial_data, write_archive
+from scripts.generate_sample_tests import create_sample_excel, generate_dataset
+
+
+def sample_archive(tmp_path):
+    """Import the three generated sample workbooks from a single material folder."""
+    material_dir = tmp_path / "data" / "Sample Tailings"
+    material_dir.mkdir(parents=True)
+    create_sample_excel("TX1-CIU-150kPa", "CIU", material_dir)
+    create_sample_excel("TX2-CID-150kPa", "CID", material_dir)
+    create_sample_excel("TX3-DMIN-CID-150kPa", "DMIN CID", material_dir)
+    return import_all_tests(tmp_path / "data")
+
+
+def test_store_round_trip(tmp_path):
+    imported = sample_archive(tmp_path)
+    write_archive(tmp_path / "store", imported)
+
+    store = load_cached_triaxial_data(tmp_path / "store", mmap=True)
+    assert isinstance(store, TriaxialStore)
+    assert sorted(store["Sample Tailings"]) == sorted(imported["Sample Tailings"])
+
+    for test_id, phases in imported["Sample Tailings"].items():
+        for phase, df in phases.items():
+            pd.testing.assert_frame_equal(
+                store["Sample Tailings"][test_id][phase],
+                df.reset_index(drop=True),
+                check_column_type=False,
+            )
+
+
+def test_store_rewrites_only_written_tests(tmp_path):
+    imported = sample_archive(tmp_path)
+    store = write_archive(tmp_path / "store", imported)
+    untouched = tmp_path / "store" / store.entry("Sample Tailings", "TX2-CID-150kPa")["phases"]["Shear"]["numeric_path"]
+    mtime = untouched.stat().st_mtime_ns
+
+    shear = pd.DataFrame({"Axial strain %": np.linspace(0, 10, 5), "q": np.arange(5.0)})
+    store.write_tests("Sample Tailings", {"TX1-CIU-150kPa": {"Shear": shear}}, source="new.xlsx")
+    store.remove_tests("Sample Tailings", ["TX3-DMIN-CID-150kPa"])
+
+    reopened = TriaxialStore(tmp_path / "store")
+    assert list(reopened["Sample Tailings"]["TX1-CIU-150kPa"]) == ["Shear"]
+    assert "TX3-DMIN-CID-150kPa" not in reopened["Sample Tailings"]
+    assert reopened.entry("Sample Tailings", "TX1-CIU-150kPa")["source"] == "new.xlsx"
+    assert untouched.stat().st_mtime_ns == mtime
+
+
+def test_incremental_import_skips_unchanged(tmp_path):
+    from calipyr.triaxial.importer import import_incremental
+
+    sample_archive(tmp_path)
+    store = TriaxialStore(tmp_path / "store")
+    first = import_incremental(tmp_path / "data", store, hash_contents=True)
+    assert len(first["added"]) == 3 and len(first["tests"]) == 3
+
+    again = import_incremental(tmp_path / "data", TriaxialStore(tmp_path / "store"))
+    assert again["unchanged"] == 3 and not again["tests"]
+
+    material_dir = tmp_path / "data" / "Sample Tailings"
+    touched = material_dir / "TX1-CIU-150kPa.xlsx"
+    os.utime(touched, ns=(touched.stat().st_atime_ns, touched.stat().st_mtime_ns + 10**9))
+    rehashed = import_incremental(tmp_path / "data", TriaxialStore(tmp_path / "store"), hash_contents=True)
+    assert rehashed["unchanged"] == 3
+
+    (material_dir / "TX2-CID-150kPa.xlsx").unlink()
+    create_sample_excel("TX4-CIU-300kPa", "CIU", material_dir)
+    changed = import_incremental(tmp_path / "data", TriaxialStore(tmp_path / "store"))
+    assert changed["added"] == ["Sample Tailings/TX4-CIU-300kPa.xlsx"]
+    assert changed["removed"] == ["Sample Tailings/TX2-CID-150kPa.xlsx"]
+
+    reopened = TriaxialStore(tmp_path / "store")
+    assert sorted(reopened["Sample Tailings"]) == ["TX1-CIU-150kPa", "TX3-DMIN-CID-150kPa", "TX4-CIU-300kPa"]
+    assert not (tmp_path / "store" / "data" / "Sample Tailings" / "TX2-CID-150kPa").exists()
+
+    # Deleting the last of two workbooks that provide a test re-reads it from the other
+    shutil.copy(material_dir / "TX1-CIU-150kPa.xlsx", material_dir / "TX1 duplicate.xlsx")
+    import_incremental(tmp_path / "data", TriaxialStore(tmp_path / "store"))
+    writer = TriaxialStore(tmp_path / "store").entry("Sample Tailings", "TX1-CIU-150kPa")["source"]
+    (tmp_path / "data" / writer).unlink()
+    restored = import_incremental(tmp_path / "data", TriaxialStore(tmp_path / "store"))
+    assert restored["removed"] == [writer] and restored["tests"] == [("Sample Tailings", "TX1-CIU-150kPa")]
+    reopened = TriaxialStore(tmp_path / "store")
+    assert reopened.entry("Sample Tailings", "TX1-CIU-150kPa")["source"] != writer
+    assert list(reopened["Sample Tailings"]["TX1-CIU-150kPa"]) == ["Consolidation", "Shear"]
+
+
+def test_incremental_import_keeps_tests_of_unreadable_workbook(tmp_path):
+    from calipyr.triaxial.importer import import_incremental
+
+    sample_archive(tmp_path)
+    import_incremental(tmp_path / "data", TriaxialStore(tmp_path / "store"))
+    source = "Sample Tailings/TX1-CIU-150kPa.xlsx"
+    fingerprint = dict(TriaxialStore(tmp_path / "store").sources[source])
+
+    workbook = tmp_path / "data" / source
+    content = workbook.read_bytes()
+    workbook.write_bytes(content[: len(content) // 2])
+    summary = import_incremental(tmp_path / "data", TriaxialStore(tmp_path / "store"))
+    assert summary["failed"] == [source] and not summary["updated"] and not summary["removed"]
+
+    reopened = TriaxialStore(tmp_path / "store")
+    assert reopened.sources[source] == fingerprint
+    assert list(reopened["Sample Tailings"]["TX1-CIU-150kPa"]) == ["Consolidation", "Shear"]
+
+    workbook.write_bytes(content)
+    retried = import_incremental(tmp_path / "data", TriaxialStore(tmp_path / "store"))
+    assert retried["updated"] == [source] and not retried["failed"]
+
+
+def test_parallel_import_matches_serial(tmp_path):
+    serial = sample_archive(tmp_path)
+    parallel = import_all_tests(tmp_path / "data", jobs=2)
+
+    assert list(parallel["Sample Tailings"]) == list(serial["Sample Tailings"])
+    for test_id, phases in serial["Sample Tailings"].items():
+        for phase, df in phases.items():
+            pd.testing.assert_frame_equal(parallel["Sample Tailings"][test_id][phase], df)
+
+    # Single-read parsing gives the same frame as re-parsing with the detected header
+    xls = pd.ExcelFile(tmp_path / "data" / "Sample Tailings" / "TX1-CIU-150kPa.xlsx")
+    expected = canonicalize(xls.parse("TX1-CIU-150kPa-Shear", header=4).dropna(how="all"))
+    pd.testing.assert_frame_equal(serial["Sample Tailings"]["TX1-CIU-150kPa"]["Shear"], expected)
+
+
+def test_streaming_reader_matches_pandas(tmp_path):
+    serial = sample_archive(tmp_path)
+    streamed = import_all_tests(tmp_path / "data", engine="stream")
+
+    for test_id, phases in serial["Sample Tailings"].items():
+        for phase, df in phases.items():
+            pd.testing.assert_frame_equal(streamed["Sample Tailings"][test_id][phase], df)
+
+    # Mixed cells, blank header cells, duplicate headers and empty rows, across chunk boundaries
+    import openpyxl
+    from calipyr.triaxial.importer import load_test_sheets, read_sheet_streaming
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "TX9-CID-300kPa-Shear"
+    sheet.append(["Lab report"])
+    sheet.append(["Time (s)", "Axial strain %", None, "q", "q"])
+    for i in range(10):
+        sheet.append([i * 60, i / 10, None, "-" if i == 7 else i * 1.5, i] if i != 4 else [])
+    workbook.save(tmp_path / "mixed.xlsx")
+
+    expected = load_test_sheets(tmp_path / "mixed.xlsx")["TX9-CID-300kPa"]["Shear"]
+    read_only = openpyxl.load_workbook(tmp_path / "mixed.xlsx", read_only=True)
+    got = canonicalize(read_sheet_streaming(read_only["TX9-CID-300kPa-Shear"], chunk_rows=3))
+    read_only.close()
+    assert list(got.columns) == ["Time (s)", "Axial strain %", "Unnamed: 2", "q", "q.1", "time", "eps_a"]
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_resolve_columns_to_roles():
+    ciu = ("σ3' (kPa)", "σ1' (kPa)", "Deviator Stress q (kPa)", "Mean Effective stress p (kPa)",
+           "Induced PWP", "Axial strain ɛa %", "e", "φ'")
+    assert resolve_columns(ciu) == {
+        "e": ("e", 1.0),
+        "eps_a": ("Axial strain ɛa %", 0.01),
+        "sigma1": ("σ1' (kPa)", 1.0),
+        "sigma3": ("σ3' (kPa)", 1.0),
+        "u": ("Induced PWP", 1.0),
+        "p": ("Mean Effective stress p (kPa)", 1.0),
+        "q": ("Deviator Stress q (kPa)", 1.0),
+    }
+    # q/p' ratio and "Vol Offset" must not be taken for q or eps_v
+    assert resolve_columns(("p' (MPa)", "q/p'", "Vol Offset (cm³)")) == {"p": ("p' (MPa)", 1000.0)}
+
+    df = canonicalize(pd.DataFrame({"σ1' (kPa)": [150, 300], "σ3' (kPa)": [100, 100], "Axial strain %": ["0.5", "x"]}))
+    assert df["q"].tolist() == [50.0, 200.0]
+    assert np.allclose(df["p"], [350 / 3, 500 / 3])
+    assert df["eps_a"].iloc[0] == 0.005 and np.isnan(df["eps_a"].iloc[1])
+
+    # Raw headers that are already role names keep their data
+    stamps = pd.to_datetime(["2025-06-04 10:00", "2025-06-04 10:05"])
+    df = canonicalize(pd.DataFrame({"time": stamps, "q": ["12.5", "n/a"], "e": [1, 2]}))
+    assert df["time"].tolist() == list(stamps) and df["q"].tolist() == ["12.5", "n/a"]
+    assert df["e"].dtype == np.float64
+
+
+def test_generated_dataset_imports_to_ground_truth(tmp_path):
+    truth = generate_dataset(tmp_path / "data", n_materials=2, workbooks_per_material=2,
+                             tests_per_workbook=3, n_rows=50, seed=3)
+    imported = import_all_tests(tmp_path / "data", engine="stream")
+
+    assert sorted(imported) == sorted(truth["materials"])
+    for material, expected in truth["materials"].items():
+        assert sorted(imported[material]) == sorted(expected["tests"])
+        for test_id, conditions in expected["tests"].items():
+            shear = imported[material][test_id]["Shear"]
+            assert len(shear) == 50 and list(imported[material][test_id]) == ["Consolidation", "Shear"]
+            run = NorSandTriaxialSimulation(dict(
+                params, **expected["params"], undrained=conditions["undrained"], e0=conditions["e0"],
+                sigM0=conditions["confining_pressure"], num_steps=50, max_strain=0.2,
+            )).run()
+            np.testing.assert_allclose(shear["q"], run["q"], rtol=1e-12)
+            np.testing.assert_allclose(shear["eps_a"], run["eps1"], rtol=1e-12)
+
+
+def test_report_renders_figures_and_arrays(tmp_path):
+    from calipyr.triaxial.report import PLOTS, load_plot_data, render_report
+
+    imported = sample_archive(tmp_path)
+    store = write_archive(tmp_path / "store", imported)
+    written = render_report(store, tmp_path / "report", formats=("png", "svg"))
+
+    material_dir = tmp_path / "report" / "Sample Tailings"
+    assert len(written["Sample Tailings"]) == 2 * len(PLOTS) + 1
+    for plot in PLOTS:
+        assert (material_dir / f"{plot}.png").read_bytes().startswith(b"\x89PNG")
+        assert b"<svg" in (material_dir / f"{plot}.svg").read_bytes()
+
+    arrays = load_plot_data(material_dir)
+    shear = imported["Sample Tailings"]["TX1-CIU-150kPa"]["Shear"]
+    x, y = arrays["stress_path"]["TX1-CIU-150kPa"]
+    np.testing.assert_array_equal(x, shear["p"])
+    np.testing.assert_array_equal(y, shear["q"])
+    assert sorted(arrays["e_log_p"]) == sorted(imported["Sample Tailings"])
+
+
+def test_long_table_and_vectorized_derived_columns(tmp_path):
+    from calipyr.triaxial.table import add_derived, long_table
+
+    imported = sample_archive(tmp_path)
+    table = long_table(imported)
+    tests = imported["Sample Tailings"]
+    assert len(table) == sum(len(df) for phases in tests.values() for df in phases.values())
+    assert all(isinstance(table[key].dtype, pd.CategoricalDtype) for key in ("material", "test_id", "test_type", "phase"))
+    assert list(table["test_type"].cat.categories) == ["CIU", "CID", "DMIN-CID"]
+    assert (table["confining_pressure"] == 150.0).all()
+
+    add_derived(table, {"N": 0.9, "lambda": 0.05})
+    for (test_id, phase), rows in table.groupby(["test_id", "phase"], observed=True):
+        df = tests[test_id][phase]
+        assert rows["row"].tolist() == list(range(len(df)))
+        if phase != "Shear":
+            continue
+        eps_v = df["eps_v"].to_numpy() if "eps_v" in df else np.zeros(len(df))
+        eps_q = df["eps_a"].to_numpy() - eps_v / 3
+        assert np.allclose(rows["q_over_p"], df["q"] / df["p"])
+        assert np.allclose(rows["eps_q"], eps_q)
+        assert np.isnan(rows["dilatancy"].iloc[0])
+        assert np.allclose(rows["dilatancy"].iloc[1:], np.diff(eps_v) / np.diff(eps_q), equal_nan=True)
+        assert np.allclose(rows["psi"], df["e"] - (0.9 - 0.05 * np.log(df["p"] / 100)))
+
+    store = write_archive(tmp_path / "store", imported)
+    shear = long_table(store, phases=["Shear"])
+    assert list(shear["phase"].cat.categories) == ["Shear"]
+    assert len(shear) == sum(len(phases["Shear"]) for phases in tests.values())
+
+
+def test_archive_index_selects_and_loads_only_matching_phases(tmp_path, monkeypatch):
+    from calipyr.triaxial.importer import import_incremental
+    from calipyr.triaxial.index import ArchiveIndex
+
+    sample_archive(tmp_path)
+    create_sample_excel("TX4-CIU-300kPa", "CIU", tmp_path / "data" / "Sample Tailings")
+    store = TriaxialStore(tmp_path / "store")
+    import_incremental(tmp_path / "data", store)
+    assert store.entry("Sample Tailings", "TX4-CIU-300kPa")["keys"] == {
+        "tx": "TX4", "test_type": "CIU", "confining_pressure": 300.0}
+
+    index = ArchiveIndex.from_store(TriaxialStore(tmp_path / "store"))
+    assert len(index) == 8
+    ciu = index.select(test_type="ciu")
+    assert sorted(set(ciu.columns["test_id"])) == ["TX1-CIU-150kPa", "TX4-CIU-300kPa"]
+    assert len(index.select(test_type="CIU", confining_pressure=300)) == 2
+    assert len(index.select(pressure_range=(100, 200), phase="Shear")) == 3
+    record = index.select(test_id="TX3-DMIN-CID-150kPa", phase="Shear").records()[0]
+    assert record["source"] == "Sample Tailings/TX3-DMIN-CID-150kPa.xlsx" and record["tx"] == "TX3"
+
+    loaded = []
+    original = TriaxialStore.load_phase
+    monkeypatch.setattr(TriaxialStore, "load_phase", lambda self, *key: loaded.append(key) or original(self, *key))
+    tests = ciu.select(phase="Shear").tests()["Sample Tailings"]
+    assert list(tests["TX4-CIU-300kPa"]) == ["Shear"] and "Consolidation" not in tests["TX4-CIU-300kPa"]
+    assert not loaded
+    assert len(tests["TX1-CIU-150kPa"]["Shear"]) == index.select(test_id="TX1-CIU-150kPa", phase="Shear").columns["rows"][0]
+    assert loaded == [("Sample Tailings", "TX1-CIU-150kPa", "Shear")]
+
+    assert list(store.view("Sample Tailings", "TX4-CIU-300kPa", ["Shear", "Drained"])) == ["Shear"]
+    with pytest.raises(KeyError):
+        store.view("Sample Tailings", "TX9-CIU-300kPa")
+    with pytest.raises(TypeError):
+        index.select(pressure=300)